@@ -69,6 +69,22 @@ class UpdateBatchMetrics(CommandMessage):
 
         return len(self._batch_ids) < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if len(self._batch_ids) + len(message._batch_ids) > MAX_NUM:
+            return False
+
+        # Metrics only need to be updated once per batch
+        existing_ids = set(self._batch_ids)
+        for batch_id in message._batch_ids:
+            if batch_id not in existing_ids:
+                self.add_batch(batch_id)
+                existing_ids.add(batch_id)
+
+        return True
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
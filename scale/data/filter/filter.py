@@ -4,6 +4,7 @@ from __future__ import unicode_literals
 
 import copy
 import logging
+from collections import namedtuple
 
 from data.filter.exceptions import InvalidDataFilter
 from storage.models import ScaleFile
@@ -13,6 +14,10 @@ logger = logging.getLogger(__name__)
 
 FILE_TYPES = {'filename', 'media-type', 'data-type', 'meta-data'}
 
+# The file model field checked by each file type filter
+FILE_FIELDS = {'filename': 'file_name', 'media-type': 'media_type', 'data-type': 'data_type_tags',
+               'meta-data': 'meta_data'}
+
 STRING_TYPES = {'string', 'filename', 'media-type', 'data-type'}
 
 STRING_CONDITIONS = {'==', '!=', 'in', 'not in', 'contains'}
@@ -239,6 +244,11 @@ ALL_CONDITIONS = {'<': _less_than, '<=': _less_than_equal, '>': _greater_than,'>
                   '==': _equal, '!=': _not_equal, 'between': _between, 'in': _in, 'not in': _not_in,
                   'contains': _contains, 'subset of': _subset, 'superset of': _superset}
 
+# A filter definition with its condition function looked up and its optional fields resolved
+CompiledFilter = namedtuple('CompiledFilter', ['name', 'filter_type', 'condition_name', 'condition', 'values', 'fields',
+                                               'all_fields', 'all_files'])
+
+
 def _getNestedDictField(data_dict, map_list):
     try:
         for k in map_list: data_dict = data_dict[k]
@@ -264,6 +274,7 @@ class DataFilter(object):
             filter_list = []
         self.filter_list = filter_list
         self.all = all
+        self._compiled_filters = None  # Compiled from the filter list when first evaluated
 
     def add_filter(self, filter_dict):
         """Adds a filter definition
@@ -277,109 +288,158 @@ class DataFilter(object):
         filter_dict = DataFilter.validate_filter(filter_dict)
 
         self.filter_list.append(filter_dict)
+        self._compiled_filters = None
+
+    def get_file_fields(self):
+        """Returns the names of the file model fields that are checked by the file type filters
+
+        :returns: The file model field names
+        :rtype: set
+        """
+
+        return {FILE_FIELDS[f.filter_type] for f in self._get_compiled_filters() if f.filter_type in FILE_FIELDS}
 
-    def is_data_accepted(self, data):
-        """Indicates whether the given data passes the filter or not
+    def get_file_ids(self, data):
+        """Returns the IDs of the files in the given data that are checked by the file type filters
 
         :param data: The data to check against the filter
         :type data: :class:`data.data.data.Data`
+        :returns: The file IDs
+        :rtype: set
+        """
+
+        file_ids = set()
+        for f in self._get_compiled_filters():
+            if f.filter_type in FILE_TYPES and f.name in data.values:
+                file_ids.update(getattr(data.values[f.name], 'file_ids', []))
+        return file_ids
+
+    @staticmethod
+    def get_scale_files(file_ids, fields=None):
+        """Queries the file models with the given IDs for evaluating file type filters. Callers evaluating several
+        filters against the same data can query the files once with the union of the filters' file IDs and fields and
+        pass the result to :meth:`is_data_accepted`.
+
+        :param file_ids: The file IDs
+        :type file_ids: set
+        :param fields: The names of the file model fields to query, None for all fields used by file type filters
+        :type fields: set
+        :returns: The file models stored by ID
+        :rtype: dict
+        """
+
+        if not file_ids:
+            return {}
+        if fields is None:
+            fields = FILE_FIELDS.values()
+        scale_files = ScaleFile.objects.filter(id__in=file_ids).only('id', *fields)
+        return {scale_file.id: scale_file for scale_file in scale_files}
+
+    def is_data_accepted(self, data, scale_files=None):
+        """Indicates whether the given data passes the filter or not. The files checked by the file type filters are
+        queried together once, unless they are provided by the caller (see :meth:`get_scale_files`).
+
+        :param data: The data to check against the filter
+        :type data: :class:`data.data.data.Data`
+        :param scale_files: The file models checked by the file type filters stored by ID, possibly None
+        :type scale_files: dict
         :returns: True if the data is accepted, False if the data is denied
         :rtype: bool
         """
 
+        compiled_filters = self._get_compiled_filters()
+        if scale_files is None:
+            scale_files = DataFilter.get_scale_files(self.get_file_ids(data), self.get_file_fields())
+
         success = True
-        for f in self.filter_list:
-            name = f['name']
-            filter_type = f['type']
-            cond = f['condition']
-            values = f['values']
+        for f in compiled_filters:
+            cond = f.condition
+            values = f.values
+            all_fields = f.all_fields
+            all_files = f.all_files
             filter_success = False
-            all_fields = False
-            if 'all_fields' in f and f['all_files']:
-                all_fields = True
-            all_files = False
-            if 'all_files' in f and f['all_files']:
-                all_files = True
-            if name in data.values:
-                param = data.values[name]
+            if f.name in data.values and cond is None:
+                logger.error('Condition %s does not exist' % f.condition_name)
+                success = False
+            elif f.name in data.values:
+                param = data.values[f.name]
                 try:
-                    if filter_type in {'filename', 'media-type', 'data-type'}:
-                        if filter_type == 'filename':
-                            file_values = [scale_file.file_name for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
-                        elif filter_type == 'media-type':
-                            file_values = [scale_file.media_type for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
-                        elif filter_type == 'data-type':
-                            list_of_lists = [scale_file.data_type_tags for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
+                    if f.filter_type in FILE_TYPES:
+                        files = [scale_files[file_id] for file_id in param.file_ids if file_id in scale_files]
+                    if f.filter_type in {'filename', 'media-type', 'data-type'}:
+                        if f.filter_type == 'filename':
+                            file_values = [scale_file.file_name for scale_file in files]
+                        elif f.filter_type == 'media-type':
+                            file_values = [scale_file.media_type for scale_file in files]
+                        elif f.filter_type == 'data-type':
+                            list_of_lists = [scale_file.data_type_tags for scale_file in files]
                             file_values = [item for sublist in list_of_lists for item in sublist]
                         # attempt to run condition on list, i.e. in case we're checking 'contains'
-                        filter_success |= ALL_CONDITIONS[cond](file_values, values)
+                        filter_success |= cond(file_values, values)
                         file_success = all_files
                         for value in file_values:
                             if all_files:
                                 # attempt to run condition on individual items, if any fail we fail the filter
-                                file_success &= ALL_CONDITIONS[cond](value, values)
+                                file_success &= cond(value, values)
                             else:
                                 # attempt to run condition on individual items, if any succeed we pass the filter
-                                file_success |= ALL_CONDITIONS[cond](value, values)
+                                file_success |= cond(value, values)
                         filter_success |= file_success
-                    elif filter_type == 'meta-data':
-                        meta_data_list = [scale_file.meta_data for scale_file in ScaleFile.objects.filter(id__in=param.file_ids)]
-                        if 'fields' in f:
-                            if len(f['fields']) != len(values):
-                                logger.exception('Length of fields (%s) and values (%s) are not equal' % (f['fields'], values))
+                    elif f.filter_type == 'meta-data':
+                        meta_data_list = [scale_file.meta_data for scale_file in files]
+                        if f.fields is not None:
+                            if len(f.fields) != len(values):
+                                logger.exception('Length of fields (%s) and values (%s) are not equal' % (f.fields, values))
                                 return False
                             file_success = all_files
                             for meta_data in meta_data_list:
                                 field_success = all_fields
-                                for field_path, value in zip(f['fields'], values):
+                                for field_path, value in zip(f.fields, values):
                                     item = _getNestedDictField(meta_data, field_path)
                                     if all_fields:
                                         # attempt to run condition on individual items, if any fail we fail the filter
-                                        field_success &= ALL_CONDITIONS[cond](item, value)
+                                        field_success &= cond(item, value)
                                     else:
                                         # attempt to run condition on individual items, if any succeed we pass the filter
-                                        field_success |= ALL_CONDITIONS[cond](item, value)
+                                        field_success |= cond(item, value)
                                 if all_files:
                                     file_success &= field_success
                                 else:
                                     file_success |= field_success
                             filter_success |= file_success
                         else:
-                            filter_success |= ALL_CONDITIONS[cond](meta_data_list, values)
+                            filter_success |= cond(meta_data_list, values)
                             file_success = all_files
                             for item in meta_data_list:
                                 if all_files:
                                     # attempt to run condition on individual items, if any fail we fail the filter
-                                    file_success &= ALL_CONDITIONS[cond](item, values)
+                                    file_success &= cond(item, values)
                                 else:
                                     # attempt to run condition on individual items, if any succeed we pass the filter
-                                    file_success |= ALL_CONDITIONS[cond](item, values)
+                                    file_success |= cond(item, values)
                             filter_success |= file_success
-                    elif filter_type == 'object':
-                        if 'fields' in f:
-                            if len(f['fields']) != len(values):
-                                logger.exception('Length of fields (%s) and values (%s) are not equal' % (f['fields'], values))
+                    elif f.filter_type == 'object':
+                        if f.fields is not None:
+                            if len(f.fields) != len(values):
+                                logger.exception('Length of fields (%s) and values (%s) are not equal' % (f.fields, values))
                                 return False
                             field_success = all_fields
-                            for field_path, value in zip(f['fields'], values):
+                            for field_path, value in zip(f.fields, values):
                                 item = _getNestedDictField(param.value, field_path)
                                 if all_fields:
-                                    field_success &= ALL_CONDITIONS[cond](item, values)
+                                    field_success &= cond(item, values)
                                 else:
-                                    field_success |= ALL_CONDITIONS[cond](item, values)
+                                    field_success |= cond(item, values)
                             filter_success |= field_success
                         else:
-                            filter_success |= ALL_CONDITIONS[cond](param.value, values)
+                            filter_success |= cond(param.value, values)
                     else:
-                        filter_success |= ALL_CONDITIONS[cond](param.value, values)
+                        filter_success |= cond(param.value, values)
                 except AttributeError:
                     logger.error('Attempting to run file filter on json parameter or vice versa')
                     success = False
                 except KeyError:
-                    logger.error('Condition %s does not exist' % cond)
-                    success = False
-                except ScaleFile.DoesNotExist:
-                    logger.error('Attempting to run file filter on non-existant file(s): %d' % param.file_ids)
+                    logger.error('Condition %s does not exist' % f.condition_name)
                     success = False
             if filter_success and not self.all:
                 return True # One filter passed, so return True
@@ -521,4 +581,22 @@ class DataFilter(object):
 
         ret_val = copy.deepcopy(filter_dict)
         ret_val['values'] = filter_values
-        return ret_val
\ No newline at end of file
+        return ret_val
+
+    def _get_compiled_filters(self):
+        """Returns the compiled filters, compiling the filter list if it has changed
+
+        :returns: The compiled filters
+        :rtype: [:class:`data.filter.filter.CompiledFilter`]
+        """
+
+        if self._compiled_filters is None or len(self._compiled_filters) != len(self.filter_list):
+            compiled_filters = []
+            for f in self.filter_list:
+                cond = f['condition']
+                compiled_filters.append(CompiledFilter(name=f['name'], filter_type=f['type'], condition_name=cond,
+                                                       condition=ALL_CONDITIONS.get(cond), values=f['values'],
+                                                       fields=f.get('fields'), all_fields=bool(f.get('all_fields')),
+                                                       all_files=bool(f.get('all_files'))))
+            self._compiled_filters = compiled_filters
+        return self._compiled_filters
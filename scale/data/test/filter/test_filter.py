@@ -87,6 +87,34 @@ class TestDataFilter(TestCase):
 
         self.assertTrue(data_filter.is_data_accepted(data))
 
+    def test_is_data_accepted_file_queries(self):
+        """Tests that DataFilter.is_data_accepted() queries the files of all file type filters once"""
+
+        data_filter = DataFilter(all=True)
+        data_filter.add_filter({'name': 'input_a', 'type': 'media-type', 'condition': '==', 'values': ['application/json']})
+        data_filter.add_filter({'name': 'input_a', 'type': 'filename', 'condition': 'contains', 'values': ['']})
+        data_filter.add_filter({'name': 'input_b', 'type': 'meta-data', 'condition': 'in', 'values': [['foo']],
+                                'fields': [['a', 'b']]})
+
+        data = Data()
+        data.add_value(FileValue('input_a', [self.file1.id]))
+        data.add_value(FileValue('input_b', [self.file2.id]))
+
+        self.assertSetEqual(data_filter.get_file_ids(data), {self.file1.id, self.file2.id})
+        self.assertSetEqual(data_filter.get_file_fields(), {'file_name', 'media_type', 'meta_data'})
+        with self.assertNumQueries(1):
+            self.assertTrue(data_filter.is_data_accepted(data))
+
+        # Files provided by the caller are not queried again
+        scale_files = DataFilter.get_scale_files(data_filter.get_file_ids(data))
+        with self.assertNumQueries(0):
+            self.assertTrue(data_filter.is_data_accepted(data, scale_files))
+
+        # Filters appended directly to the filter list are also evaluated
+        data_filter.filter_list.append({'name': 'input_a', 'type': 'media-type', 'condition': '==',
+                                        'values': ['text/plain']})
+        self.assertFalse(data_filter.is_data_accepted(data, scale_files))
+
     def test_validate(self):
         """Tests calling DataFilter.validate()"""
 
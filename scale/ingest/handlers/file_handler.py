@@ -1,4 +1,13 @@
 """Defines the handler for files processed by Strike and Scan"""
+import re
+
+
+# Python 2 supports at most 100 groups in a regular expression
+MAX_GROUPS = 99
+
+# Patterns that cannot be embedded within a combined regular expression: numbered backreferences would refer to the
+# wrong groups, named groups may collide, and inline flags would apply to the entire combined expression
+UNCOMBINABLE_PATTERN = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?[iLmsux]+\)')
 
 
 class FileHandler(object):
@@ -10,6 +19,7 @@ class FileHandler(object):
         """
 
         self.rules = []
+        self._matchers = None  # Compiled list of (regex, group rules, rule) tuples, None when the rules have changed
 
     def add_rule(self, rule):
         """Adds the given rule to the handler
@@ -19,6 +29,7 @@ class FileHandler(object):
         """
 
         self.rules.append(rule)
+        self._matchers = None
 
     def match_file_name(self, file_name):
         """Checks the given file name and returns the first rule that matches it, returning None if no match is made
@@ -29,7 +40,49 @@ class FileHandler(object):
         :rtype: :class:`ingest.handlers.file_rule.FileRule`
         """
 
-        for rule in self.rules:
-            if rule.matches_file_name(file_name):
-                return rule
+        if self._matchers is None:
+            self._matchers = self._compile_matchers()
+
+        for regex, group_rules, rule in self._matchers:
+            match = regex.match(file_name)
+            if match:
+                # For combined rules, the matching rule's group is the outermost matched group, so it closed last
+                return group_rules[match.lastindex] if group_rules else rule
         return None
+
+    def _compile_matchers(self):
+        """Compiles the rules into as few regular expressions as possible. Consecutive rules are combined into a single
+        alternation where each rule's pattern is wrapped in a group. Since an alternation tries its alternatives in
+        order, the first group to match belongs to the first matching rule. Rules that cannot be combined keep their
+        own regular expression.
+
+        :returns: The list of (regex, {group index: rule}, None) tuples for combined rules and (regex, None, rule)
+            tuples for uncombined rules, in rule order
+        :rtype: [(:class:`re.RegexObject`, dict, :class:`ingest.handlers.file_rule.FileRule`)]
+        """
+
+        matchers = []
+        patterns = []
+        group_rules = {}
+        num_groups = 0
+
+        for rule in self.rules:
+            regex = rule.filename_regex
+            combinable = (not regex.flags & ~re.UNICODE and regex.groups < MAX_GROUPS and
+                          not UNCOMBINABLE_PATTERN.search(regex.pattern))
+            if patterns and (not combinable or num_groups + regex.groups + 1 > MAX_GROUPS):
+                matchers.append((re.compile('|'.join(patterns)), group_rules, None))
+                patterns = []
+                group_rules = {}
+                num_groups = 0
+
+            if combinable:
+                patterns.append('(%s)' % regex.pattern)
+                group_rules[num_groups + 1] = rule
+                num_groups += regex.groups + 1
+            else:
+                matchers.append((regex, None, rule))
+
+        if patterns:
+            matchers.append((re.compile('|'.join(patterns)), group_rules, None))
+        return matchers
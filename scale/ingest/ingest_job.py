@@ -9,6 +9,7 @@ from django.utils.timezone import now
 
 from ingest.models import Ingest
 from ingest.triggers.ingest_recipe_handler import IngestRecipeHandler
+from metrics.models import MetricsIngest
 from source.models import SourceFile
 from storage.brokers.broker import FileDownload, FileMove, FileUpload
 from storage.models import ScaleFile
@@ -70,6 +71,8 @@ def perform_ingest(ingest_id):
                             ingest.workspace.name)
                 file_move = FileMove(source_file, ingest.new_file_path)
                 ScaleFile.objects.move_files([file_move])
+                # Moving only saves the new path, so save the rest of the source file changes
+                _save_source_file(source_file)
             else:
                 logger.info('Registering %s in workspace %s', ingest.file_path, ingest.workspace.name)
                 _save_source_file(source_file)
@@ -108,6 +111,8 @@ def _complete_ingest(ingest, status):
         if status == 'INGESTED':
             ingest.ingest_ended = now()
         ingest.save()
+        if status == 'INGESTED':
+            MetricsIngest.objects.add_ingested(ingest)
     if status == 'INGESTED':
         if ingest.get_recipe_name():
             IngestRecipeHandler().process_ingested_source_file(ingest.id, ingest.get_ingest_source_event(),
@@ -0,0 +1,90 @@
+"""Defines the command that benchmarks matching file names against ingest file rules"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import logging
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from ingest.handlers.file_handler import FileHandler
+from ingest.handlers.file_rule import FileRule
+
+
+logger = logging.getLogger(__name__)
+
+# Products, levels, and extensions used to generate realistic file names and rules
+PRODUCTS = ['S1A_IW_GRDH', 'S1B_IW_SLC', 'S2A_MSIL1C', 'S2B_MSIL2A', 'LC08_L1TP', 'LE07_L1GT', 'MOD09GA', 'MYD11A1',
+            'VNP46A1', 'ATL03', 'GEDI02_A', 'OMI_NO2', 'GOES16_ABI', 'HIMAWARI8_AHI', 'SENTINEL3_OLCI', 'WV03_P1BS']
+EXTENSIONS = ['h5', 'nc', 'tif', 'zip', 'xml', 'json', 'jp2', 'ntf']
+
+
+class Command(BaseCommand):
+    """Command that matches synthetic file names against a synthetic list of file rules using both the compiled file
+    handler and a linear scan of the rules and reports how long each took
+    """
+
+    help = 'Benchmarks matching file names against ingest file rules with the compiled matcher and a linear scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-r', '--rules', action='store', type=int, default=50,
+                            help='Number of synthetic file rules.')
+        parser.add_argument('-f', '--files', action='store', type=int, default=100000,
+                            help='Number of synthetic file names.')
+        parser.add_argument('-s', '--seed', action='store', type=int, default=1,
+                            help='Random seed for generating the synthetic rules and file names.')
+
+    def handle(self, *args, **options):
+        """See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the command.
+        """
+
+        logger.info('Command starting: scale_benchmark_file_handler')
+
+        rand = random.Random(options.get('seed'))
+        file_handler = FileHandler()
+        for i in range(options.get('rules')):
+            pattern = r'%s_.*_%02d\.%s' % (rand.choice(PRODUCTS), i, rand.choice(EXTENSIONS))
+            file_handler.add_rule(FileRule(re.compile(pattern), [], None, None))
+        # Catch-all rule for the remaining files
+        file_handler.add_rule(FileRule(re.compile(r'.*'), [], None, None))
+
+        file_names = ['%s_%08d_%02d.%s' % (rand.choice(PRODUCTS), rand.randint(0, 99999999),
+                                           rand.randint(0, options.get('rules')), rand.choice(EXTENSIONS))
+                      for _ in range(options.get('files'))]
+
+        started = time.time()
+        linear_results = [self._linear_scan(file_handler.rules, file_name) for file_name in file_names]
+        linear_duration = time.time() - started
+
+        started = time.time()
+        compiled_results = [file_handler.match_file_name(file_name) for file_name in file_names]
+        compiled_duration = time.time() - started
+
+        logger.info('Matched %d file names against %d rules', len(file_names), len(file_handler.rules))
+        logger.info('Linear scan took %.3f seconds', linear_duration)
+        logger.info('Compiled matcher took %.3f seconds', compiled_duration)
+        if linear_results != compiled_results:
+            logger.error('Compiled matcher selected different rules than the linear scan')
+
+        logger.info('Command completed: scale_benchmark_file_handler')
+
+    def _linear_scan(self, rules, file_name):
+        """Returns the first rule that matches the given file name by checking every rule in order
+
+        :param rules: The list of file rules
+        :type rules: [:class:`ingest.handlers.file_rule.FileRule`]
+        :param file_name: The name of the file
+        :type file_name: string
+        :returns: The matched rule, possibly None
+        :rtype: :class:`ingest.handlers.file_rule.FileRule`
+        """
+
+        for rule in rules:
+            if rule.matches_file_name(file_name):
+                return rule
+        return None
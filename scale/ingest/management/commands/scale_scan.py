@@ -36,6 +36,8 @@ class Command(BaseCommand):
                             help='Perform a dry-run of scan, skipping ingest')
         parser.add_argument('-l', '--local', action="store_true", default=False,
                             help='Perform a patch on workspace for local testing')
+        parser.add_argument('-s', '--start-after', action='store', default=None,
+                            help='Resume the scan after the file with this workspace path')
 
     def __init__(self):
         """Constructor
@@ -57,6 +59,7 @@ class Command(BaseCommand):
         scan_id = options.get('scan_id')
         dry_run = bool(strtobool(options.get('dry_run')))
         local = options.get('local')
+        start_after = options.get('start_after')
 
         if not scan_id:
             logger.error('-i or --scan-id parameter must be specified for Scan configuration.')
@@ -66,6 +69,8 @@ class Command(BaseCommand):
         logger.info('Scan ID: %i', scan_id)
         logger.info('Dry Run: %s', str(dry_run))
         logger.info('Local Test: %s', local)
+        if start_after:
+            logger.info('Start After: %s', start_after)
 
         logger.info('Querying database for Scan configuration')
         scan = Scan.objects.select_related('job').get(pk=scan_id)
@@ -81,12 +86,12 @@ class Command(BaseCommand):
             if 'broker' in workspace.json_config and 'host_path' in workspace.json_config['broker']:
                 with patch.object(Workspace, '_get_volume_path',
                                   return_value=workspace.json_config['broker']['host_path']) as mock_method:
-                    self._scanner.run(dry_run=dry_run)
+                    self._scanner.run(dry_run=dry_run, start_after=start_after)
                     logger.info('Scanner has stopped running')
                     logger.info('Command completed: scale_scan')
                     return
 
-        self._scanner.run(dry_run=dry_run)
+        self._scanner.run(dry_run=dry_run, start_after=start_after)
         logger.info('Scanner has stopped running')
 
         logger.info('Command completed: scale_scan')
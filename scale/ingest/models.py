@@ -235,7 +235,8 @@ class IngestManager(models.Manager):
         return ingests
 
     def get_dupe_ingests_by_scan(self, scan_id, new_ingests):
-        """Returns a list of ingests associated with a scan and file name/sizes
+        """Returns a list of ingests associated with a scan and file name/sizes. All of the file names are checked with
+        a single query.
 
         :param scan_id: Query ingests created by a specific scan processor.
         :type scan_id: int
@@ -244,15 +245,16 @@ class IngestManager(models.Manager):
         :returns: The list of ingests that match the scan, filenames and file sizes
         :rtype: [:class:`ingest.models.Ingest`]
         """
-        ingests = Ingest.objects.all().filter(scan_id=scan_id)
 
-        duplicates = []
-        for new_ingest in new_ingests:
-            dupes = ingests.filter(file_name=new_ingest['file_name'], file_size=new_ingest['file_size'])
-            if dupes.count():
-                duplicates.append(dupes.values())
+        if not new_ingests:
+            return []
 
-        return duplicates
+        name_sizes = {(new_ingest['file_name'], new_ingest['file_size']) for new_ingest in new_ingests}
+        file_names = {file_name for file_name, _ in name_sizes}
+        ingests = Ingest.objects.filter(scan_id=scan_id, file_name__in=file_names)
+        ingests = ingests.only('id', 'file_name', 'file_size')
+
+        return [ingest for ingest in ingests.iterator() if (ingest.file_name, ingest.file_size) in name_sizes]
 
     def get_details(self, ingest_id, is_staff=False):
         """Gets additional details for the given ingest model based on related model attributes.
@@ -318,20 +320,20 @@ class IngestManager(models.Manager):
             else:
                 raise Exception('One of scan_id or strike_id must be set')
 
-        data = Data()
-        data.add_value(JsonValue('ingest_id', ingest_id))
-        data.add_value(JsonValue('workspace', ingest.workspace.name))
-        if ingest.new_workspace:
-            data.add_value(JsonValue('new_workspace', ingest.new_workspace.name))
+            data = Data()
+            data.add_value(JsonValue('ingest_id', ingest_id))
+            data.add_value(JsonValue('workspace', ingest.workspace.name))
+            if ingest.new_workspace:
+                data.add_value(JsonValue('new_workspace', ingest.new_workspace.name))
 
-        ingest_job = None
-        with transaction.atomic():
-            ingest_job = Queue.objects.queue_new_job_v6(ingest_job_type, data, event)
-            ingest.job = ingest_job
-            ingest.status = 'QUEUED'
-            ingest.save()
+            ingest_job = None
+            with transaction.atomic():
+                ingest_job = Queue.objects.queue_new_job_v6(ingest_job_type, data, event)
+                ingest.job = ingest_job
+                ingest.status = 'QUEUED'
+                ingest.save()
 
-        logger.debug('Successfully created ingest task for %s', ingest.file_name)
+            logger.debug('Successfully created ingest task for %s', ingest.file_name)
 
     def start_ingest_tasks_cm(self, ingests, scan_id=None, strike_id=None):
         """Starts a batch of tasks for the given scan in an atomic transaction.
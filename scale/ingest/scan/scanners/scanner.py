@@ -5,11 +5,13 @@ import logging
 import os
 from abc import ABCMeta, abstractmethod
 
+from django.conf import settings
 from django.db import transaction
 
 from ingest.models import Ingest, Scan
 from ingest.scan.scanners.exceptions import ScannerInterruptRequested
 from storage.models import Workspace
+from util.bloom_filter import BloomFilter
 
 logger = logging.getLogger(__name__)
 
@@ -34,8 +36,10 @@ class Scanner(object):
         self.scan_id = None
         self._batch_size = 1000  # Use a batch size of 1000 for scan
         self._count = 0
+        self._dedupe_filter = None  # Filter of the ingests created by this scan, used to skip duplicate checks
         self._dry_run = False  # Used to only scan and skip ingest process
         self._file_handler = None  # The file handler configured for this scanner
+        self._last_file_path = None  # The path of the last processed file, used to resume an interrupted scan
         self._recursive = True
         self._scanned_workspace = None  # The workspace model that is being scanned
         self._scanner_type = scanner_type
@@ -82,31 +86,52 @@ class Scanner(object):
 
         raise NotImplementedError
 
-    def run(self, dry_run=False):
+    @property
+    def last_file_path(self):
+        """The path of the last file that was processed, which can be given to run() to resume an interrupted scan
+
+        :returns: The path of the last processed file, possibly None
+        :rtype: string
+        """
+
+        return self._last_file_path
+
+    def run(self, dry_run=False, start_after=None):
         """Runs the scanner until signaled to stop by the stop() method or processing complete.
 
         :param dry_run: Flag to enable file scanning only, no file ingestion will occur
         :type dry_run: bool
+        :param start_after: The path of the file after which to resume scanning, None to scan the entire workspace
+        :type start_after: string
         """
 
         logger.info('Running %s scanner %s...' % (self.scanner_type, 'in dry run mode ' if dry_run else ''))
         self._dry_run = dry_run
+        self._last_file_path = start_after
 
-        # Initialize workspace scan via storage broker. Configuration determines if recursive workspace walk.
-        files = self._scanned_workspace.list_files(recursive=self._recursive)
+        if not dry_run and self.scan_id and settings.SCAN_DEDUPE_DIR:
+            self._dedupe_filter = self._open_dedupe_filter(self.scan_id)
 
-        batched_files = []
-        for file in files:
-            batched_files.append(file)
+        try:
+            # Initialize workspace scan via storage broker. Configuration determines if recursive workspace walk.
+            files = self._scanned_workspace.list_files(recursive=self._recursive, start_after=start_after)
 
-            # Process files every time a batch size is reached
-            if len(batched_files) >= self._batch_size:
-                self._process_scanned(batched_files)
-                batched_files = []
+            batched_files = []
+            for file in files:
+                batched_files.append(file)
+
+                # Process files every time a batch size is reached
+                if len(batched_files) >= self._batch_size:
+                    self._process_scanned(batched_files)
+                    batched_files = []
 
-        # If any remaining files, process
-        if len(batched_files):
-            self._process_scanned(batched_files)
+            # If any remaining files, process
+            if len(batched_files):
+                self._process_scanned(batched_files)
+        finally:
+            if self._dedupe_filter:
+                self._dedupe_filter.close()
+                self._dedupe_filter = None
 
         logger.info('%s %i files during scan.' % ('Detected' if self._dry_run else 'Processed', self._count))
 
@@ -175,15 +200,18 @@ class Scanner(object):
                     ingests.append(ingest)
                 self._count += 1
             else:
+                logger.info('Scan interrupted, resume after file: %s', self._last_file_path)
                 raise ScannerInterruptRequested
 
         # If no ingests were added, don't bother moving on
         if not len(ingests):
             logger.debug('No ingests for batch, this will always be the case during a dry-run.')
+            if file_list:
+                self._last_file_path = file_list[-1].file
             return
 
         # Once all ingest rules have been applied, de-duplicate and then bulk insert
-        ingests = self._deduplicate_ingest_list(self.scan_id, ingests)
+        ingests = self._deduplicate_ingest_list(self.scan_id, ingests, self._dedupe_filter)
 
         # bulk insert remaining as queued and note detected files in Scan mode
         with transaction.atomic():
@@ -191,39 +219,74 @@ class Scanner(object):
             Scan.objects.filter(pk=self.scan_id).update(file_count=self._count)
 
         Ingest.objects.start_ingest_tasks(ingests, scan_id=self.scan_id)
+        self._last_file_path = file_list[-1].file
 
     @staticmethod
-    def _deduplicate_ingest_list(scan_id, new_ingests):
+    def _deduplicate_ingest_list(scan_id, new_ingests, dedupe_filter=None):
         """Check the ingest records to ensure these ingests are not already created by previous scan run
 
         :param scan_id: ID of scan to check against
         :type scan_id: integer
         :param new_ingests: List of ingest models to validate for uniqueness
         :type new_ingests: :class:`ingest.models.Ingest`
+        :param dedupe_filter: Filter of every ingest created by the scan, only ingests that may be in the filter are
+            checked against the ingest records. If None, every ingest is checked.
+        :type dedupe_filter: :class:`util.bloom_filter.BloomFilter`
         :returns: List of deduplicated ingest models
         :rtype: List[:class:`ingest.models.Ingest`]
         """
-        name_sizes = [{'file_name': ingest.file_name, 'file_size': ingest.file_size} for ingest in new_ingests]
 
         list_count = len(new_ingests)
-        existing_ingests = Ingest.objects.get_dupe_ingests_by_scan(scan_id, name_sizes)
-        existing_name_sizes = [{'file_name': ingest.file_name, 'file_size': ingest.file_size} for ingest in existing_ingests]
+        possible_dupes = []
+        for ingest in new_ingests:
+            if dedupe_filter is None or _get_dedupe_key(ingest.file_name, ingest.file_size) in dedupe_filter:
+                possible_dupes.append({'file_name': ingest.file_name, 'file_size': ingest.file_size})
+        existing_ingests = Ingest.objects.get_dupe_ingests_by_scan(scan_id, possible_dupes)
+        name_sizes = {(ingest.file_name, ingest.file_size) for ingest in existing_ingests}
 
-        final_ingest_name_sizes = []
         final_ingests = []
         for ingest in new_ingests:
-            the_ingest = {'file_name': ingest.file_name, 'file_size': ingest.file_size}
-            if the_ingest not in existing_name_sizes and the_ingest not in final_ingest_name_sizes:
-                final_ingest_name_sizes.append(the_ingest)
+            the_ingest = (ingest.file_name, ingest.file_size)
+            if the_ingest not in name_sizes:
+                name_sizes.add(the_ingest)
                 final_ingests.append(ingest)
+                if dedupe_filter is not None:
+                    # Added before the ingest is saved so that the filter never misses a saved ingest
+                    dedupe_filter.add(_get_dedupe_key(ingest.file_name, ingest.file_size))
             else:
-                logging.info('Removed duplicate file_name %s file_size %d from ingests at file_path %s',
-                             ingest.file_name, ingest.file_size, ingest.file_path)
+                logger.info('Removed duplicate file_name %s file_size %d from ingests at file_path %s',
+                            ingest.file_name, ingest.file_size, ingest.file_path)
 
         logger.info('Removed %i duplicates of pre-existing ingests.', list_count - len(final_ingests))
 
         return final_ingests
 
+    @staticmethod
+    def _open_dedupe_filter(scan_id):
+        """Opens the filter of the ingests created by the given scan. The filter's watermark is the highest ID of the
+        scan's ingests that have been added to it, so any ingests created past the watermark, such as by a previous run
+        of the scan on a different node, are added to the filter first.
+
+        :param scan_id: ID of the scan
+        :type scan_id: integer
+        :returns: The filter of the ingests created by the scan
+        :rtype: :class:`util.bloom_filter.BloomFilter`
+        """
+
+        path = os.path.join(settings.SCAN_DEDUPE_DIR, 'scan_%d.bloom' % scan_id)
+        dedupe_filter = BloomFilter(path, settings.SCAN_DEDUPE_CAPACITY)
+
+        ingests = Ingest.objects.filter(scan_id=scan_id, id__gt=dedupe_filter.watermark).order_by('id')
+        watermark = None
+        for ingest_id, file_name, file_size in ingests.values_list('id', 'file_name', 'file_size').iterator():
+            dedupe_filter.add(_get_dedupe_key(file_name, file_size))
+            watermark = ingest_id
+        if watermark is not None:
+            logger.info('Updated de-duplication filter for scan %d with ingests up to ID %d', scan_id, watermark)
+            dedupe_filter.watermark = watermark
+
+        return dedupe_filter
+
     def _process_ingest(self, file_path, file_size):
         """Processes the ingest file by applying the Scan configuration rules.
         
@@ -249,3 +312,17 @@ class Scanner(object):
             return ingest
 
         # If is_there_rule_match matches a rule, ingest will be returned above, otherwise None is default
+
+
+def _get_dedupe_key(file_name, file_size):
+    """Returns the de-duplication filter key for the given file name and size
+
+    :param file_name: The file name
+    :type file_name: string
+    :param file_size: The file size in bytes
+    :type file_size: long
+    :returns: The filter key
+    :rtype: string
+    """
+
+    return '%s\x00%d' % (file_name, file_size)
@@ -2,16 +2,14 @@
 from __future__ import unicode_literals
 
 import logging
-import math
 import os
 import time
 from datetime import datetime
 
-from django.utils.timezone import now
-
 from ingest.models import Ingest
 from ingest.strike.monitors.exceptions import InvalidMonitorConfiguration
 from ingest.strike.monitors.monitor import Monitor
+from util.inotify import IN_CLOSE_WRITE, IN_MOVED_TO, Inotify
 from util.os_helper import makedirs
 from util.validation import ValidationWarning
 
@@ -19,7 +17,9 @@ logger = logging.getLogger(__name__)
 
 
 class DirWatcherMonitor(Monitor):
-    """A monitor that watches a file system directory for incoming files
+    """A monitor that watches a file system directory for incoming files. Files are processed as soon as inotify reports
+    that they have been written or moved into the directory, and the entire directory is processed periodically to
+    reconcile any missed events. If inotify is not available, the directory is only processed periodically.
     """
 
     def __init__(self):
@@ -32,6 +32,10 @@ class DirWatcherMonitor(Monitor):
         self._deferred_dir = None
         self._ingest_dir = None
         self._transfer_suffix = None
+        self._watcher = None  # The inotify instance watching the Strike directory, None when not watching
+        self._watched_dir = None
+        self._processing_mode = 'poll'  # How the current file was detected, either 'event' or 'poll'
+        self._latencies = {}  # Ingest latency stats stored by processing mode {string: [count, total secs, max secs]}
 
     def load_configuration(self, configuration):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.load_configuration`
@@ -50,28 +54,33 @@ class DirWatcherMonitor(Monitor):
         """
 
         throttle = 60
+        next_reconcile = 0  # When to next process the entire directory
 
-        while self._running:
-            secs_passed = 0
-            try:
-                self.reload_configuration()
-
-                # Process the directory and record number of seconds used
-                started = now()
-                self._mount_and_process_dir()
-                ended = now()
-
-                secs_passed = (ended - started).total_seconds()
-            except:
-                logger.exception('Strike encountered error')
-            finally:
-                if self._running:
-                    # If process time takes less than throttle, delay
-                    if secs_passed < throttle:
-                        # Delay until full throttle time reached
-                        delay = math.ceil(throttle - secs_passed)
-                        logger.debug('Pausing for %i seconds', delay)
-                        time.sleep(delay)
+        try:
+            while self._running:
+                if time.time() >= next_reconcile:
+                    started = time.time()
+                    try:
+                        self.reload_configuration()
+                        # Start watching before processing the directory so that no new files are missed
+                        self._start_watcher()
+                        self._processing_mode = 'poll'
+                        self._mount_and_process_dir()
+                    except:
+                        logger.exception('Strike encountered error')
+                    self._log_latencies()
+                    next_reconcile = started + throttle
+
+                # Wait for new files until the next reconciliation, waking up regularly to check for stop
+                timeout = min(max(next_reconcile - time.time(), 0), 1)
+                if self._watcher:
+                    if not self._process_events(timeout):
+                        next_reconcile = 0
+                elif self._running:
+                    logger.debug('Pausing for %.1f seconds', timeout)
+                    time.sleep(timeout)
+        finally:
+            self._stop_watcher()
 
     def stop(self):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.stop`
@@ -96,6 +105,19 @@ class DirWatcherMonitor(Monitor):
         
         return warnings
 
+    def _find_ingest(self, final_name):
+        """Returns the ingest that still needs to be processed for the file with the given final name, possibly None
+
+        :param final_name: The final name of the file
+        :type final_name: string
+        :returns: The ingest model, possibly None
+        :rtype: :class:`ingest.models.Ingest`
+        """
+
+        ingests_qry = Ingest.objects.filter(status__in=['TRANSFERRING', 'TRANSFERRED'], strike_id=self.strike_id,
+                                            file_name=final_name)
+        return ingests_qry.order_by('-last_modified').first()
+
     def _final_filename(self, file_name):
         """Returns the final name (after transferring is done) for the given file. If the file is already done
         transferring the name given is simply returned.
@@ -144,6 +166,17 @@ class DirWatcherMonitor(Monitor):
         except Exception:
             logger.exception('Strike encountered error')
 
+    def _log_latencies(self):
+        """Logs and resets the ingest latency stats, which measure the time from when a file finished transferring to
+        when its ingest was processed
+        """
+
+        for mode in sorted(self._latencies.keys()):
+            count, total, maximum = self._latencies[mode]
+            logger.info('Ingest latency (%s): %i file(s), average %.3f seconds, max %.3f seconds', mode, count,
+                        total / count, maximum)
+        self._latencies = {}
+
     def _move_deferred_file(self, ingest):
         """Moves the deferred ingest file
 
@@ -215,6 +248,42 @@ class DirWatcherMonitor(Monitor):
                 msg = 'Error processing ingest for missing file %s'
                 logger.exception(msg, file_name)
 
+    def _process_events(self, timeout):
+        """Waits up to the given timeout for inotify events and processes the files they report
+
+        :param timeout: The maximum number of seconds to wait
+        :type timeout: float
+        :returns: False if events may have been missed and the directory should be reconciled, True otherwise
+        :rtype: bool
+        """
+
+        try:
+            events = self._watcher.read_events(timeout)
+        except Exception:
+            logger.exception('Error reading events for %s, falling back to polling', self._strike_dir)
+            self._stop_watcher()
+            return True
+
+        file_names = []
+        for event in events:
+            if event.is_overflow:
+                logger.warning('Events were lost for %s, reconciling the directory', self._strike_dir)
+                return False
+            if event.name and not event.is_dir and event.name not in file_names:
+                file_names.append(event.name)
+
+        self._processing_mode = 'event'
+        for file_name in file_names:
+            file_path = os.path.join(self._strike_dir, file_name)
+            if not os.path.isfile(file_path):
+                continue  # Already processed
+            logger.info('Processing %s', file_path)
+            try:
+                self._process_file(file_name, self._find_ingest(self._final_filename(file_name)))
+            except Exception:
+                logger.exception('Error processing %s', file_path)
+        return True
+
     def _process_file(self, file_name, ingest):
         """Processes the given file in the Strike directory. The file_name argument represents a file in the Strike
         directory to process. If file_name is None, then the ingest argument represents an ongoing transfer where the
@@ -275,7 +344,9 @@ class DirWatcherMonitor(Monitor):
             if not ingest.status == 'TRANSFERRED':
                 raise Exception('Cannot ingest %s unless it has TRANSFERRED status' % file_path)
 
+            transferred = None
             if os.path.exists(file_path):
+                transferred = os.path.getmtime(file_path)
                 # File is in Strike dir (expected) so move it
                 logger.info('Moving %s to %s', file_path, ingest_path)
                 os.rename(file_path, ingest_path)
@@ -292,10 +363,60 @@ class DirWatcherMonitor(Monitor):
                     return
 
             self._process_ingest(ingest, rel_ingest_path, ingest.file_size)
+            if transferred is not None:
+                self._record_latency(time.time() - transferred)
 
         if ingest.status == 'DEFERRED':
             self._move_deferred_file(ingest)
 
+    def _record_latency(self, latency):
+        """Records the ingest latency of a file for the current processing mode
+
+        :param latency: The number of seconds from when the file finished transferring to when it was processed
+        :type latency: float
+        """
+
+        if self._processing_mode not in self._latencies:
+            self._latencies[self._processing_mode] = [0, 0.0, 0.0]
+        stats = self._latencies[self._processing_mode]
+        stats[0] += 1
+        stats[1] += latency
+        stats[2] = max(stats[2], latency)
+
+    def _start_watcher(self):
+        """Starts watching the Strike directory for new files if it is not already being watched. If inotify is not
+        available, the directory will only be processed periodically.
+        """
+
+        if self._watcher and self._watched_dir == self._strike_dir:
+            return
+        self._stop_watcher()
+
+        try:
+            watcher = Inotify()
+        except OSError:
+            logger.exception('Unable to watch %s for events, falling back to polling', self._strike_dir)
+            return
+        try:
+            watcher.add_watch(self._strike_dir, IN_CLOSE_WRITE | IN_MOVED_TO)
+        except OSError:
+            logger.exception('Unable to watch %s for events, falling back to polling', self._strike_dir)
+            watcher.close()
+            return
+
+        logger.info('Watching %s for events', self._strike_dir)
+        self._watcher = watcher
+        self._watched_dir = self._strike_dir
+
+    def _stop_watcher(self):
+        """Stops watching the Strike directory for new files
+        """
+
+        if self._watcher:
+            self._watcher.close()
+        self._watcher = None
+        self._watched_dir = None
+
     def _get_ingest_path(self, file_name, ingest):
         from storage.models import ScaleFile
         same_files = ScaleFile.objects.filter(file_name=file_name, workspace=ingest.workspace)
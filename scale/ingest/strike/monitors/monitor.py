@@ -186,6 +186,32 @@ class Monitor(object):
             ingest.status = 'DEFERRED'
             ingest.save()
 
+    def _process_ingests(self, ingests):
+        """Processes a batch of new ingest files by applying the Strike configuration rules. This method will create the
+        ingest models in the database and create the ingest task messages (if applicable) for the entire batch. Each
+        ingest must have come from Ingest.objects.create_ingest() and have its file_path and file_size set.
+
+        :param ingests: The new ingest models
+        :type ingests: [:class:`ingest.models.Ingest`]
+        """
+
+        matched_ingests = []
+        for ingest in ingests:
+            if ingest.status not in ['TRANSFERRING', 'TRANSFERRED']:
+                raise Exception('Invalid ingest status: %s' % ingest.status)
+
+            if ingest.is_there_rule_match(self._file_handler, self._workspaces):
+                matched_ingests.append(ingest)
+            else:
+                ingest.status = 'DEFERRED'
+
+        # Create the ingest models and start their tasks together so that a failure does not leave ingest models behind
+        # for files that will be received again
+        with transaction.atomic():
+            Ingest.objects.bulk_create(ingests)
+            if matched_ingests:
+                Ingest.objects.start_ingest_tasks(matched_ingests, strike_id=self.strike_id)
+
     def _start_transfer(self, ingest, when):
         """Starts recording the transfer of the given ingest into a workspace. The database save is the caller's
         responsibility. This method should only be used immediately after Ingest.objects.create_ingest().
@@ -4,8 +4,11 @@ from __future__ import unicode_literals
 import json
 import logging
 import os
+import threading
+import time
 
 from botocore.exceptions import ClientError
+from django.db import connection
 
 from ingest.models import Ingest
 from ingest.strike.monitors.exceptions import (InvalidMonitorConfiguration, S3NoDataNotificationError,
@@ -30,6 +33,8 @@ class S3Monitor(Monitor):
         self._sqs_name = None
         self._credentials = None
         self._region_name = None
+        self._num_receivers = 1
+        self._receivers = {}  # Receiver threads stored by receiver index {int: Thread}
 
         # Set the event version supported in message
         # We are going to support all 2.x versions trusting AWS will not break interface until 3.x
@@ -62,6 +67,7 @@ class S3Monitor(Monitor):
         self._region_name = configuration.get('region_name')
         # TODO Change credentials to use an encrypted store key reference
         self._credentials = AWSClient.instantiate_credentials_from_config(configuration)
+        self._num_receivers = configuration.get('receivers', 1)
 
     def run(self):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.run`
@@ -69,37 +75,31 @@ class S3Monitor(Monitor):
 
         logger.info('Running experimental S3 Strike processor')
 
-        # Loop endlessly polling SQS queue
-        while self._running:
-            # Between each pass over the SQS, refresh configuration from database in case of credential changes.
-            # This eliminates the need to stop and restart a Strike job to pick up configuration updates.
-            self.reload_configuration()
-
-            with SQSClient(self._credentials, self._region_name) as client:
-                # For each new file we receive a notification about:
-                logger.debug('Beginning long-poll against queue with wait time of %s seconds.' % self.wait_time)
-                messages = client.receive_messages(self._sqs_name,
-                                                   batch_size=10,
-                                                   wait_time_seconds=self.wait_time,
-                                                   visibility_timeout_seconds=self.visibility_timeout)
-
-                for message in messages:
-                    try:
-                        # Perform message extraction and then callback to ingest
-                        self._process_s3_notification(message)
-
-                        # Remove message from queue now that the message is processed
-                        message.delete()
-                    except SQSNotificationError:
-                        logger.exception('Unable to process message. Invalid SQS S3 notification.')
-
-                        if self.sqs_discard_unrecognized:
-                            # Remove message from queue when unrecognized
-                            logger.warning('Removing message that cannot be processed.')
-                            message.delete()
-                    except S3NoDataNotificationError:
-                        logger.exception('Unable to process message. File size of 0')
-                        message.delete()
+        # Receivers long-poll the SQS queue concurrently while this thread periodically refreshes configuration from
+        # the database in case of credential changes. This eliminates the need to stop and restart a Strike job to pick
+        # up configuration updates.
+        try:
+            while self._running:
+                self.reload_configuration()
+
+                for index in range(self._num_receivers):
+                    if index not in self._receivers or not self._receivers[index].is_alive():
+                        logger.info('Starting SQS receiver %i', index)
+                        thread = threading.Thread(target=self._run_receiver, args=(index,),
+                                                  name='SQS receiver %i' % index)
+                        thread.daemon = True
+                        thread.start()
+                        self._receivers[index] = thread
+
+                for _ in range(self.wait_time):
+                    if not self._running:
+                        break
+                    time.sleep(1)
+        finally:
+            self._running = False
+            for thread in self._receivers.values():
+                thread.join()
+            self._receivers = {}
 
     def stop(self):
         """See :meth:`ingest.strike.monitors.monitor.Monitor.stop`
@@ -118,6 +118,10 @@ class S3Monitor(Monitor):
             raise InvalidMonitorConfiguration('sqs_name must be a string')
         if not configuration['sqs_name']:
             raise InvalidMonitorConfiguration('sqs_name must be a non-empty string')
+        if 'receivers' in configuration:
+            receivers = configuration['receivers']
+            if not isinstance(receivers, (int, long)) or isinstance(receivers, bool) or receivers < 1:
+                raise InvalidMonitorConfiguration('receivers must be a positive integer')
 
         # If credentials exist, validate them.
         credentials = AWSClient.instantiate_credentials_from_config(configuration)
@@ -134,7 +138,45 @@ class S3Monitor(Monitor):
 
         return warnings
 
-    def _process_s3_notification(self, message):
+    def _process_messages(self, client, messages):
+        """Processes a batch of received SQS messages. The ingests for all of the S3 notifications in the batch are
+        created together and then all of the processed messages are deleted together.
+
+        :param client: The SQS client
+        :type client: :class:`util.aws.SQSClient`
+        :param messages: The received SQS messages
+        :type messages: [`boto3.sqs.Message`]
+        """
+
+        ingests = []
+        processed_messages = []
+        for message in messages:
+            try:
+                # Perform message extraction and then callback to ingest
+                self._process_s3_notification(message, ingests)
+
+                # Remove message from queue once the batch is processed
+                processed_messages.append(message)
+            except SQSNotificationError:
+                logger.exception('Unable to process message. Invalid SQS S3 notification.')
+
+                if self.sqs_discard_unrecognized:
+                    # Remove message from queue when unrecognized
+                    logger.warning('Removing message that cannot be processed.')
+                    processed_messages.append(message)
+            except S3NoDataNotificationError:
+                logger.exception('Unable to process message. File size of 0')
+                processed_messages.append(message)
+
+        if ingests:
+            self._process_ingests(ingests)
+            for ingest in ingests:
+                logger.info('New ingest in %s: %s', ingest.workspace.name, ingest.file_name)
+
+        if processed_messages:
+            client.delete_messages(self._sqs_name, processed_messages)
+
+    def _process_s3_notification(self, message, ingests=None):
         """Extracts an S3 notification object from SQS message body and calls on to ingest.
         We want to ensure we have the following minimal values before passing S3 object on:
         - body.Records[x].eventName starts with 'ObjectCreated'
@@ -143,6 +185,8 @@ class S3Monitor(Monitor):
         exception will be raised
         :param message: SQS message containing S3 notification object
         :type message: object
+        :param ingests: The list to which the new ingest models are added, possibly None
+        :type ingests: [:class:`ingest.models.Ingest`]
         """
 
         try:
@@ -164,7 +208,9 @@ class S3Monitor(Monitor):
                             record['eventName'].startswith('ObjectCreated') and \
                             'eventVersion' in record and \
                             record['eventVersion'].startswith(self.event_version_supported):
-                        self._ingest_s3_notification_object(record['s3'])
+                        ingest = self._ingest_s3_notification_object(record['s3'])
+                        if ingests is not None:
+                            ingests.append(ingest)
                     else:
                         # Log message that didn't match with valid EventName and EventVersion
                         raise SQSNotificationError('Unable to process message as it does not match '
@@ -180,11 +226,14 @@ class S3Monitor(Monitor):
                                                                                                     message))
 
     def _ingest_s3_notification_object(self, s3_notification):
-        """Extracts S3 specific object metadata and call the final ingest
+        """Extracts S3 specific object metadata and creates the ingest model for it. The database save is the caller's
+        responsibility, see _process_ingests().
         We are going to additionally ignore any object of size 0 as these are generally
         folder create operations.
         :param s3_notification: S3 bucket and object metadata associated with notification
         :type s3_notification: dict
+        :returns: The new ingest model
+        :rtype: :class:`ingest.models.Ingest`
         """
 
         try:
@@ -199,6 +248,42 @@ class S3Monitor(Monitor):
 
         object_name = os.path.basename(object_key)
         ingest = Ingest.objects.create_ingest(object_name, self._monitored_workspace, strike_id=self.strike_id)
-        logger.info('New ingest in %s: %s', ingest.workspace.name, ingest.file_name)
-        self._process_ingest(ingest, object_key, object_size)
-        logger.info("Strike ingested '%s' from bucket '%s'..." % (object_key, bucket_name))
+        ingest.file_path = object_key
+        ingest.file_size = object_size
+        logger.info("Strike received '%s' from bucket '%s'..." % (object_key, bucket_name))
+        return ingest
+
+    def _run_receiver(self, index):
+        """Runs a receiver that long-polls the SQS queue and processes each batch of received messages until the monitor
+        is stopped or the number of receivers drops below this receiver's index. The receiver keeps a single SQS client
+        for as long as the credentials and region are unchanged.
+
+        :param index: The index of this receiver
+        :type index: int
+        """
+
+        client = None
+        try:
+            while self._running and index < self._num_receivers:
+                try:
+                    if not client or (client.credentials, client.region_name) != (self._credentials,
+                                                                                   self._region_name):
+                        client = SQSClient(self._credentials, self._region_name)
+                        client.__enter__()
+
+                    logger.debug('Beginning long-poll against queue with wait time of %s seconds.' % self.wait_time)
+                    messages = list(client.receive_messages(self._sqs_name,
+                                                            batch_size=10,
+                                                            wait_time_seconds=self.wait_time,
+                                                            visibility_timeout_seconds=self.visibility_timeout))
+                    if messages:
+                        self._process_messages(client, messages)
+                except Exception:
+                    logger.exception('SQS receiver %i encountered error', index)
+                    # Start over with a new client in case it was the cause of the error
+                    client = None
+                    time.sleep(1)
+        finally:
+            # Each thread has its own database connection
+            connection.close()
+            logger.info('SQS receiver %i stopped', index)
@@ -0,0 +1,65 @@
+from __future__ import unicode_literals
+
+import re
+
+import django
+from django.test import TestCase
+
+from ingest.handlers.file_handler import FileHandler
+from ingest.handlers.file_rule import FileRule
+
+
+class TestFileHandler(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def _create_handler(self, patterns):
+        file_handler = FileHandler()
+        for pattern in patterns:
+            file_handler.add_rule(FileRule(re.compile(pattern), [], None, None))
+        return file_handler
+
+    def test_match_file_name_first_rule(self):
+        """Tests calling FileHandler.match_file_name() where multiple rules match"""
+
+        file_handler = self._create_handler([r'.*\.txt', r'(a)(b)?.*\.h5', r'.*\.h5', r'.*'])
+
+        self.assertEqual(file_handler.match_file_name('test.txt'), file_handler.rules[0])
+        self.assertEqual(file_handler.match_file_name('ab.h5'), file_handler.rules[1])
+        self.assertEqual(file_handler.match_file_name('test.h5'), file_handler.rules[2])
+        self.assertEqual(file_handler.match_file_name('test.tif'), file_handler.rules[3])
+
+    def test_match_file_name_no_match(self):
+        """Tests calling FileHandler.match_file_name() where no rules match"""
+
+        file_handler = self._create_handler([r'.*\.txt', r'.*\.h5'])
+
+        self.assertIsNone(file_handler.match_file_name('test.tif'))
+
+    def test_match_file_name_uncombinable(self):
+        """Tests calling FileHandler.match_file_name() with rules that cannot be combined"""
+
+        file_handler = self._create_handler([r'(a)\1.*', r'(?i).*\.TXT', r'(?P<date>\d{8}).*', r'.*\.txt', r'aa.*'])
+
+        self.assertEqual(file_handler.match_file_name('aab'), file_handler.rules[0])
+        self.assertEqual(file_handler.match_file_name('test.txt'), file_handler.rules[1])
+        self.assertEqual(file_handler.match_file_name('20200101.h5'), file_handler.rules[2])
+        self.assertIsNone(file_handler.match_file_name('abc'))
+
+    def test_match_file_name_many_groups(self):
+        """Tests calling FileHandler.match_file_name() with more groups than a single regular expression supports"""
+
+        file_handler = self._create_handler([r'file_%d_(\d)(\d)\.h5' % i for i in range(100)])
+
+        for i in range(100):
+            self.assertEqual(file_handler.match_file_name('file_%d_12.h5' % i), file_handler.rules[i])
+
+    def test_add_rule_after_match(self):
+        """Tests calling FileHandler.add_rule() after matching file names"""
+
+        file_handler = self._create_handler([r'.*\.txt'])
+        self.assertIsNone(file_handler.match_file_name('test.h5'))
+
+        file_handler.add_rule(FileRule(re.compile(r'.*\.h5'), [], None, None))
+
+        self.assertEqual(file_handler.match_file_name('test.h5'), file_handler.rules[1])
@@ -1,14 +1,20 @@
 from __future__ import unicode_literals
 
+import os
+import shutil
+import tempfile
+
 import django
-from django.test import TestCase
-from mock import patch
+from django.test import TestCase, override_settings
+from mock import MagicMock, patch
 
+import ingest.test.utils as ingest_test_utils
 import storage.test.utils as storage_test_utils
 from ingest.models import Ingest
 from ingest.scan.scanners.exceptions import ScannerInterruptRequested
 from ingest.scan.scanners.s3_scanner import S3Scanner
 from storage.brokers.broker import FileDetails
+from util.bloom_filter import BloomFilter
 
 
 class TestS3Scanner(TestCase):
@@ -133,6 +139,20 @@ class TestScanner(TestCase):
         self.assertTrue(dedup.called)
         self.assertTrue(start_ingests.called)
 
+    @patch('ingest.scan.scanners.s3_scanner.S3Scanner._ingest_file', return_value=None)
+    def test_run_resume(self, ingest_file):
+        """Tests calling S3Scanner.run() to resume a scan after a given file"""
+
+        scanner = S3Scanner()
+        scanner._scanned_workspace = MagicMock()
+        scanner._scanned_workspace.list_files.return_value = iter([FileDetails('test2', 0), FileDetails('test3', 0)])
+
+        scanner.run(dry_run=True, start_after='test1')
+
+        scanner._scanned_workspace.list_files.assert_called_once_with(recursive=True, start_after='test1')
+        self.assertEquals(scanner._count, 2)
+        self.assertEquals(scanner.last_file_path, 'test3')
+
     @patch('ingest.models.Ingest.objects.get_dupe_ingests_by_scan')
     def test_deduplicate_ingest_list_no_existing(self, ingests_by_scan):
         """Tests calling S3Scanner._deduplicate_ingest_list() without existing"""
@@ -168,6 +188,55 @@ class TestScanner(TestCase):
         self.assertEquals(len(final_ingests), 1)
         self.assertEquals(final_ingests[0].file_name, 'test2')
 
+    def test_open_dedupe_filter(self):
+        """Tests calling S3Scanner._open_dedupe_filter() adds the scan's ingests past the filter's watermark"""
+
+        scan = ingest_test_utils.create_scan()
+        ingest_1 = ingest_test_utils.create_ingest(file_name='test1', scan=scan)
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            with override_settings(SCAN_DEDUPE_DIR=temp_dir):
+                dedupe_filter = S3Scanner._open_dedupe_filter(scan.id)
+                self.assertTrue('test1\x00%d' % ingest_1.file_size in dedupe_filter)
+                self.assertEquals(dedupe_filter.watermark, ingest_1.id)
+                dedupe_filter.close()
+
+                # An ingest created elsewhere (such as by a run on another node) is added on the next open
+                ingest_2 = ingest_test_utils.create_ingest(file_name='test2', scan=scan)
+                dedupe_filter = S3Scanner._open_dedupe_filter(scan.id)
+                self.assertTrue('test2\x00%d' % ingest_2.file_size in dedupe_filter)
+                self.assertEquals(dedupe_filter.watermark, ingest_2.id)
+                self.assertEquals(dedupe_filter.count, 2)
+                dedupe_filter.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
+    @patch('ingest.models.Ingest.objects.get_dupe_ingests_by_scan')
+    def test_deduplicate_ingest_list_with_filter(self, ingests_by_scan):
+        """Tests calling S3Scanner._deduplicate_ingest_list() with a de-duplication filter"""
+
+        ingests_by_scan.return_value = [Ingest(file_name='test1', file_size=10)]
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            dedupe_filter = BloomFilter(os.path.join(temp_dir, 'scan_1.bloom'), 100)
+            dedupe_filter.add('test1\x0010')
+
+            ingests = [Ingest(file_name='test1', file_size=10), Ingest(file_name='test2', file_size=10),
+                       Ingest(file_name='test2', file_size=10)]
+            final_ingests = S3Scanner._deduplicate_ingest_list(1, ingests, dedupe_filter)
+
+            # Only the file that may be in the filter is checked against existing ingests
+            ingests_by_scan.assert_called_once_with(1, [{'file_name': 'test1', 'file_size': 10}])
+            self.assertEquals(len(final_ingests), 1)
+            self.assertEquals(final_ingests[0].file_name, 'test2')
+            self.assertTrue('test2\x0010' in dedupe_filter)
+            self.assertEquals(dedupe_filter.count, 2)
+            dedupe_filter.close()
+        finally:
+            shutil.rmtree(temp_dir)
+
     def test_set_recursive_false(self):
         """Tests calling S3Scanner.set_recursive() to false"""
 
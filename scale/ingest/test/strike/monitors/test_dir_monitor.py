@@ -1,11 +1,16 @@
 from __future__ import unicode_literals
 
+import os
+import shutil
+import tempfile
+
 import django
 from django.test import TestCase
-from mock import Mock
+from mock import MagicMock, Mock, patch
 
 from ingest.strike.monitors.dir_monitor import DirWatcherMonitor
 from ingest.strike.monitors.exceptions import InvalidMonitorConfiguration
+from util.inotify import IN_CLOSE_WRITE, IN_ISDIR, IN_MOVED_TO, IN_Q_OVERFLOW, InotifyEvent
 
 
 class TestDirWatcherMonitor(TestCase):
@@ -64,3 +69,94 @@ class TestDirWatcherMonitor(TestCase):
         self.assertEqual(ingest_file.status, 'DEFERRED')
         self.assertEqual(ingest_file.file_size, file_size)
         self.assertEqual(ingest_file.file_path, file_path)
+
+
+class TestDirWatcherMonitorEvents(TestCase):
+    def setUp(self):
+        django.setup()
+
+        self.strike_dir = tempfile.mkdtemp()
+        self.monitor = DirWatcherMonitor()
+        self.monitor._strike_dir = self.strike_dir
+        self.monitor._transfer_suffix = '_tmp'
+        self.monitor._watcher = MagicMock()
+
+    def tearDown(self):
+        shutil.rmtree(self.strike_dir)
+
+    @patch('ingest.strike.monitors.dir_monitor.DirWatcherMonitor._find_ingest')
+    @patch('ingest.strike.monitors.dir_monitor.DirWatcherMonitor._process_file')
+    def test_process_events(self, process_file, find_ingest):
+        """Tests calling DirWatcherMonitor._process_events() with new files"""
+
+        for file_name in ['test1.txt_tmp', 'test2.txt']:
+            with open(os.path.join(self.strike_dir, file_name), 'w') as the_file:
+                the_file.write('data')
+        ingest = MagicMock()
+        find_ingest.side_effect = lambda final_name: ingest if final_name == 'test2.txt' else None
+        self.monitor._watcher.read_events.return_value = [InotifyEvent(1, IN_CLOSE_WRITE, 'test1.txt_tmp'),
+                                                          InotifyEvent(1, IN_MOVED_TO, 'test2.txt'),
+                                                          InotifyEvent(1, IN_CLOSE_WRITE, 'test2.txt'),
+                                                          InotifyEvent(1, IN_MOVED_TO | IN_ISDIR, 'ingesting'),
+                                                          InotifyEvent(1, IN_CLOSE_WRITE, 'missing.txt')]
+
+        self.assertTrue(self.monitor._process_events(1))
+
+        self.monitor._watcher.read_events.assert_called_once_with(1)
+        self.assertListEqual(process_file.call_args_list, [(('test1.txt_tmp', None),), (('test2.txt', ingest),)])
+        self.assertEqual(self.monitor._processing_mode, 'event')
+
+    @patch('ingest.strike.monitors.dir_monitor.DirWatcherMonitor._process_file')
+    def test_process_events_overflow(self, process_file):
+        """Tests calling DirWatcherMonitor._process_events() when events were lost"""
+
+        self.monitor._watcher.read_events.return_value = [InotifyEvent(-1, IN_Q_OVERFLOW, None)]
+
+        self.assertFalse(self.monitor._process_events(1))
+        self.assertFalse(process_file.called)
+
+    def test_process_events_error(self):
+        """Tests calling DirWatcherMonitor._process_events() when reading events fails"""
+
+        watcher = self.monitor._watcher
+        watcher.read_events.side_effect = OSError()
+
+        self.assertTrue(self.monitor._process_events(1))
+        watcher.close.assert_called_once_with()
+        self.assertIsNone(self.monitor._watcher)
+
+    @patch('ingest.strike.monitors.dir_monitor.Inotify')
+    def test_start_watcher_unavailable(self, mock_inotify):
+        """Tests calling DirWatcherMonitor._start_watcher() when inotify is not available"""
+
+        self.monitor._watcher = None
+        mock_inotify.side_effect = OSError()
+
+        self.monitor._start_watcher()
+
+        self.assertIsNone(self.monitor._watcher)
+
+    @patch('ingest.strike.monitors.dir_monitor.Inotify')
+    def test_start_watcher(self, mock_inotify):
+        """Tests calling DirWatcherMonitor._start_watcher() successfully"""
+
+        self.monitor._watcher = None
+
+        self.monitor._start_watcher()
+        self.monitor._start_watcher()
+
+        mock_inotify.return_value.add_watch.assert_called_once_with(self.strike_dir, IN_CLOSE_WRITE | IN_MOVED_TO)
+        self.assertEqual(self.monitor._watcher, mock_inotify.return_value)
+
+    def test_record_latency(self):
+        """Tests calling DirWatcherMonitor._record_latency() for both processing modes"""
+
+        self.monitor._processing_mode = 'event'
+        self.monitor._record_latency(1.0)
+        self.monitor._record_latency(3.0)
+        self.monitor._processing_mode = 'poll'
+        self.monitor._record_latency(30.0)
+
+        self.assertDictEqual(self.monitor._latencies, {'event': [2, 4.0, 3.0], 'poll': [1, 30.0, 30.0]})
+        self.monitor._log_latencies()
+        self.assertDictEqual(self.monitor._latencies, {})
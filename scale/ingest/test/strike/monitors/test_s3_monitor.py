@@ -5,7 +5,7 @@ import json
 
 import django
 from django.test import TestCase
-from mock import patch
+from mock import MagicMock, patch
 
 from ingest.strike.monitors.exceptions import (InvalidMonitorConfiguration, SQSNotificationError)
 from ingest.strike.monitors.s3_monitor import S3Monitor
@@ -43,6 +43,16 @@ class TestS3Monitor(TestCase):
         }
         self.assertRaises(InvalidMonitorConfiguration, S3Monitor().validate_configuration, config)
 
+    def test_validate_configuration_bad_receivers(self):
+        """Tests calling S3Monitor.validate_configuration() with a bad number of receivers"""
+
+        config = {
+            'type': 's3',
+            'sqs_name': 'my-sqs',
+            'receivers': 0
+        }
+        self.assertRaises(InvalidMonitorConfiguration, S3Monitor().validate_configuration, config)
+
     @patch('ingest.strike.monitors.s3_monitor.SQSClient')
     def test_validate_configuration_success(self, mock_client_class):
         """Tests calling S3Monitor.validate_configuration() successfully"""
@@ -376,3 +386,69 @@ class TestS3Monitor(TestCase):
         monitor = S3Monitor()
         with self.assertRaises(SQSNotificationError):
             monitor._process_s3_notification(message)
+
+    @patch('ingest.strike.monitors.s3_monitor.S3Monitor._process_ingests')
+    @patch('ingest.strike.monitors.s3_monitor.S3Monitor._ingest_s3_notification_object')
+    def test_process_messages(self, ingest_mock, process_ingests):
+        """Tests calling S3Monitor._process_messages() with a batch of messages"""
+
+        def notification(key, size):
+            record = {'eventVersion': '2.0', 'eventName': 'ObjectCreated:Put',
+                      's3': {'bucket': {'name': 'mybucket'}, 'object': {'key': key, 'size': size}}}
+            return SQSMessage(json.dumps({'Records': [record]}))
+
+        ingests = [MagicMock(), MagicMock()]
+        ingest_mock.side_effect = ingests
+        messages = [notification('file1.h5', 10), SQSMessage('{"incomplete":"message"}'), notification('file2.h5', 20)]
+        client = MagicMock()
+
+        monitor = S3Monitor()
+        monitor._sqs_name = 'my-sqs'
+        monitor._process_messages(client, messages)
+
+        # Ingests for the whole batch are processed together and the unrecognized message is not deleted
+        process_ingests.assert_called_once_with(ingests)
+        client.delete_messages.assert_called_once_with('my-sqs', [messages[0], messages[2]])
+
+    @patch('ingest.strike.monitors.monitor.Ingest.objects.start_ingest_tasks')
+    @patch('ingest.strike.monitors.monitor.Ingest.objects.bulk_create')
+    def test_process_ingests(self, bulk_create, start_ingest_tasks):
+        """Tests calling S3Monitor._process_ingests() with matched and unmatched ingests"""
+
+        matched_ingest = MagicMock(status='TRANSFERRING')
+        matched_ingest.is_there_rule_match.return_value = True
+        unmatched_ingest = MagicMock(status='TRANSFERRING')
+        unmatched_ingest.is_there_rule_match.return_value = False
+
+        monitor = S3Monitor()
+        monitor.strike_id = 1
+        monitor._process_ingests([matched_ingest, unmatched_ingest])
+
+        bulk_create.assert_called_once_with([matched_ingest, unmatched_ingest])
+        start_ingest_tasks.assert_called_once_with([matched_ingest], strike_id=1)
+        self.assertEqual(unmatched_ingest.status, 'DEFERRED')
+
+    @patch('ingest.strike.monitors.monitor.transaction.atomic')
+    @patch('ingest.strike.monitors.monitor.Ingest.objects.start_ingest_tasks')
+    @patch('ingest.strike.monitors.monitor.Ingest.objects.bulk_create')
+    def test_process_ingests_atomic(self, bulk_create, start_ingest_tasks, atomic):
+        """Tests that S3Monitor._process_ingests() creates the ingests and starts their tasks in one transaction"""
+
+        events = []
+
+        def start_tasks(*args, **kwargs):
+            events.append('start_ingest_tasks')
+            raise Exception('Failed to start tasks')
+
+        atomic.return_value.__enter__.side_effect = lambda *args: events.append('enter')
+        atomic.return_value.__exit__.side_effect = lambda *args: events.append('exit')
+        bulk_create.side_effect = lambda *args: events.append('bulk_create')
+        start_ingest_tasks.side_effect = start_tasks
+        matched_ingest = MagicMock(status='TRANSFERRING')
+        matched_ingest.is_there_rule_match.return_value = True
+
+        monitor = S3Monitor()
+        monitor.strike_id = 1
+        self.assertRaises(Exception, monitor._process_ingests, [matched_ingest])
+
+        self.assertListEqual(events, ['enter', 'bulk_create', 'start_ingest_tasks', 'exit'])
@@ -4,6 +4,7 @@ import django
 from django.test import TestCase, TransactionTestCase
 from mock import patch
 
+import ingest.test.utils as ingest_test_utils
 import recipe.test.utils as recipe_test_utils
 import storage.test.utils as storage_test_utils
 from ingest.strike.configuration.json.configuration_v6 import StrikeConfigurationV6
@@ -71,6 +72,34 @@ class TestIngestGetDataTypeTags(TestCase):
         self.assertSetEqual(tags, set())
 
 
+class TestIngestManagerGetDupeIngestsByScan(TestCase):
+    def setUp(self):
+        django.setup()
+
+    def test_dupes(self):
+        """Tests calling get_dupe_ingests_by_scan() with a mix of new and duplicate files"""
+
+        scan = ingest_test_utils.create_scan()
+        other_scan = ingest_test_utils.create_scan()
+        ingest_1 = ingest_test_utils.create_ingest(file_name='test1.txt', scan=scan)
+        ingest_2 = ingest_test_utils.create_ingest(file_name='test2.txt', scan=scan)
+        ingest_test_utils.create_ingest(file_name='test3.txt', scan=other_scan)
+
+        new_ingests = [{'file_name': 'test1.txt', 'file_size': ingest_1.file_size},
+                       {'file_name': 'test2.txt', 'file_size': ingest_2.file_size + 1},
+                       {'file_name': 'test3.txt', 'file_size': 10}]
+        with self.assertNumQueries(1):
+            dupes = Ingest.objects.get_dupe_ingests_by_scan(scan.id, new_ingests)
+
+        self.assertListEqual([ingest.id for ingest in dupes], [ingest_1.id])
+
+    def test_no_ingests(self):
+        """Tests calling get_dupe_ingests_by_scan() with no files"""
+
+        with self.assertNumQueries(0):
+            self.assertListEqual(Ingest.objects.get_dupe_ingests_by_scan(1, []), [])
+
+
 class TestStrikeManagerCreateStrikeProcess(TransactionTestCase):
     fixtures = ['ingest_job_types.json']
 
@@ -23,7 +23,6 @@ from job.execution.container import get_job_exe_input_vol_name, get_job_exe_outp
     get_workspace_volume_name, SCALE_JOB_EXE_INPUT_PATH, SCALE_JOB_EXE_OUTPUT_PATH, SCALE_INPUT_METADATA_PATH
 from job.execution.tasks.post_task import POST_TASK_COMMAND_ARGS
 from job.execution.tasks.pre_task import PRE_TASK_COMMAND_ARGS
-from job.seed.manifest import SeedManifest
 from job.tasks.pull_task import create_pull_command
 from node.resources.node_resources import NodeResources
 from node.resources.resource import Disk
@@ -55,6 +54,15 @@ class QueuedExecutionConfigurator(object):
         self._input_files = input_files
         self._cached_workspace_names = {}  # {ID: Name}
 
+        # Parsed definitions shared by all of the jobs configured by this configurator
+        self._cached_batch_configs = {}  # {Batch ID: BatchConfiguration}
+        self._cached_input_interfaces = {}  # {Job type revision ID: Interface}
+        self._cached_job_configs = {}  # {Job type ID: JobConfiguration}
+        self._cached_job_type_manifests = {}  # {Job type ID: SeedManifest}
+        self._cached_manifests = {}  # {Job type revision ID: SeedManifest}
+        self._parse_counts = {'batch_configs': 0, 'input_interfaces': 0, 'job_configs': 0, 'job_type_manifests': 0,
+                              'manifests': 0}
+
     def configure_queued_job(self, job):
         """Creates and returns an execution configuration for the given queued job. The given job model should have its
         related job_type, job_type_rev, and batch models populated.
@@ -74,7 +82,7 @@ class QueuedExecutionConfigurator(object):
 
         # Set up env vars for job's input data
         input_values = data.get_injected_input_values(input_files_dict)
-        interface = job.job_type_rev.get_input_interface()
+        interface = self.get_input_interface(job)
 
         env_vars = {}
         if isinstance(data, JobData):
@@ -102,8 +110,8 @@ class QueuedExecutionConfigurator(object):
             if not output_workspaces:
                 # Set output workspaces from job configuration
                 output_workspaces = {}
-                job_config = job.get_job_configuration()
-                interface = SeedManifest(job.job_type_rev.manifest, do_validate=False)
+                job_config = self.get_job_configuration(job)
+                interface = self.get_manifest(job)
                 for output_name in interface.get_file_output_names():
                     output_workspace = job_config.get_output_workspace(output_name)
                     if output_workspace:
@@ -111,11 +119,96 @@ class QueuedExecutionConfigurator(object):
                 config.set_output_workspaces(output_workspaces)
 
         # Create main task with fields populated from input data
-        args = job.get_job_interface().get_injected_command_args(input_values, env_vars)
+        args = self.get_manifest(job).get_injected_command_args(input_values, env_vars)
         config.create_tasks(['main'])
         config.add_to_task('main', args=args, env_vars=env_vars, workspaces=task_workspaces)
         return config
 
+    def get_batch_configuration(self, job):
+        """Returns the configuration of the given job's batch, parsing it only once for each batch
+
+        :param job: The job model with its related batch model populated
+        :type job: :class:`job.models.Job`
+        :returns: The batch configuration, None if the job is not in a batch
+        :rtype: :class:`batch.configuration.configuration.BatchConfiguration`
+        """
+
+        if not job.batch:
+            return None
+        if job.batch_id not in self._cached_batch_configs:
+            self._cached_batch_configs[job.batch_id] = job.batch.get_configuration()
+            self._parse_counts['batch_configs'] += 1
+        return self._cached_batch_configs[job.batch_id]
+
+    def get_input_interface(self, job):
+        """Returns the input interface of the given job's job type revision, parsing it only once for each revision
+
+        :param job: The job model with its related job_type_rev model populated
+        :type job: :class:`job.models.Job`
+        :returns: The input interface
+        :rtype: :class:`data.interface.interface.Interface`
+        """
+
+        if job.job_type_rev_id not in self._cached_input_interfaces:
+            self._cached_input_interfaces[job.job_type_rev_id] = self.get_manifest(job).get_input_interface()
+            self._parse_counts['input_interfaces'] += 1
+        return self._cached_input_interfaces[job.job_type_rev_id]
+
+    def get_job_configuration(self, job):
+        """Returns the configuration for the given job. A job without its own configuration uses its job type's
+        configuration, which is parsed only once for each job type.
+
+        :param job: The job model with its related job_type model populated
+        :type job: :class:`job.models.Job`
+        :returns: The job configuration
+        :rtype: :class:`job.configuration.configuration.JobConfiguration`
+        """
+
+        if job.configuration:
+            self._parse_counts['job_configs'] += 1
+            return job.get_job_configuration()
+        if job.job_type_id not in self._cached_job_configs:
+            self._cached_job_configs[job.job_type_id] = job.job_type.get_job_configuration()
+            self._parse_counts['job_configs'] += 1
+        return self._cached_job_configs[job.job_type_id]
+
+    def get_job_type_manifest(self, job):
+        """Returns the current manifest of the given job's job type, parsing it only once for each job type
+
+        :param job: The job model with its related job_type model populated
+        :type job: :class:`job.models.Job`
+        :returns: The job type manifest
+        :rtype: :class:`job.seed.manifest.SeedManifest`
+        """
+
+        if job.job_type_id not in self._cached_job_type_manifests:
+            self._cached_job_type_manifests[job.job_type_id] = job.job_type.get_job_interface()
+            self._parse_counts['job_type_manifests'] += 1
+        return self._cached_job_type_manifests[job.job_type_id]
+
+    def get_manifest(self, job):
+        """Returns the manifest of the given job's job type revision, parsing it only once for each revision
+
+        :param job: The job model with its related job_type_rev model populated
+        :type job: :class:`job.models.Job`
+        :returns: The job type revision manifest
+        :rtype: :class:`job.seed.manifest.SeedManifest`
+        """
+
+        if job.job_type_rev_id not in self._cached_manifests:
+            self._cached_manifests[job.job_type_rev_id] = job.get_job_interface()
+            self._parse_counts['manifests'] += 1
+        return self._cached_manifests[job.job_type_rev_id]
+
+    def get_parse_counts(self):
+        """Returns how many definitions of each kind this configurator has parsed
+
+        :returns: The number of parsed definitions stored by kind
+        :rtype: dict
+        """
+
+        return dict(self._parse_counts)
+
 
     def _cache_workspace_names(self, workspace_ids):
         """Queries and caches the workspace names for the given IDs
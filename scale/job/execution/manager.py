@@ -256,25 +256,21 @@ class JobExecutionManager(object):
         :rtype: :func:`list`
         """
 
-        job_ids = []
-        running_job_exes = []
         with self._lock:
-            for running_job_exe in self._running_job_exes.values():
-                job_ids.append(running_job_exe.job_id)
-                running_job_exes.append(running_job_exe)
+            running_job_exes = list(self._running_job_exes.values())
 
-        # Query job models from database to check if any running executions have been canceled
-        job_models = {}
-        for job in Job.objects.filter(id__in=job_ids):
-            job_models[job.id] = job
+        # Query the database to check if any running executions have been canceled (job is canceled or has a newer
+        # execution)
+        job_exes = [(running_job_exe.job_id, running_job_exe.exe_num) for running_job_exe in running_job_exes]
+        canceled_job_exes = Job.objects.get_canceled_job_exes(job_exes)
+        if not canceled_job_exes:
+            return []
 
         finished_job_exes = []
         when_canceled = now()
         with self._lock:
             for running_job_exe in running_job_exes:
-                job_model = job_models[running_job_exe.job_id]
-                # If the job has been canceled or the job has a newer execution, this execution must be canceled
-                if job_model.status == 'CANCELED' or job_model.num_exes > running_job_exe.exe_num:
+                if (running_job_exe.job_id, running_job_exe.exe_num) in canceled_job_exes:
                     running_job_exe.execution_canceled(when_canceled)
                     if running_job_exe.is_finished():
                         self._handle_finished_job_exe(running_job_exe)
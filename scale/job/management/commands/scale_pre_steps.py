@@ -94,43 +94,92 @@ class Command(BaseCommand):
         return JobExecution.objects.get_job_exe_with_job_and_job_type(job_id, exe_num)
 
     def _generate_input_metadata(self, job_exe):
-        """Generate the input metadata file for the job execution
+        """Generate the input metadata file for the job execution. All of the input files are queried and serialized
+        together and the metadata manifest is streamed to the file one input at a time.
 
         :param job_exe: The job_exe model
         :type job_exe: `job.models.JobExecution`
         """
 
-        # Generate input metadata dict
-        input_metadata = {}
+        # Gather the input data for the job and its recipe
+        input_datas = []
         config = job_exe.get_execution_configuration()
         if 'input_files' in config.get_dict():
-            input_metadata['JOB'] = {}
-            input_data = job_exe.job.get_input_data()
-            for i in input_data.values.keys():
-                if type(input_data.values[i]) is JsonValue:
-                    input_metadata['JOB'][i] = input_data.values[i].value
-                elif type(input_data.values[i]) is FileValue:
-                    input_metadata['JOB'][i] = [serialize(ScaleFile.objects.get_details(file_id=f)).data for f in
-                                                input_data.values[i].file_ids]
+            input_datas.append(('JOB', job_exe.job.get_input_data()))
         if job_exe.recipe_id and job_exe.recipe.has_input():
-            input_metadata['RECIPE'] = {}
-            input_data = job_exe.recipe.get_input_data()
-            for i in input_data.values.keys():
-                if type(input_data.values[i]) is JsonValue:
-                    input_metadata['RECIPE'][i] = input_data.values[i].value
-                elif type(input_data.values[i]) is FileValue:
-                    input_metadata['RECIPE'][i] = [serialize(ScaleFile.objects.get_details(file_id=f)).data for f in
-                                                   input_data.values[i].file_ids]
-
-        logger.debug("Scale Input Metadata Manifest Generated:")
-        log_str = json.dumps(input_metadata, sort_keys=True, indent=4, separators=(',', ': '))
-        logger.debug(log_str)
+            input_datas.append(('RECIPE', job_exe.recipe.get_input_data()))
+
+        # Serialize every referenced file once, the same file may be an input to both the job and the recipe
+        file_ids = set()
+        for _, input_data in input_datas:
+            for data_value in input_data.values.values():
+                if type(data_value) is FileValue:
+                    file_ids.update(data_value.file_ids)
+        serialized_files = self._serialize_input_files(file_ids)
 
         try:
             with open(SCALE_INPUT_METADATA_PATH, 'w+') as metadata_file:
-                json.dump(input_metadata, metadata_file)
+                self._write_input_metadata(metadata_file, input_datas, serialized_files)
         except Exception as ex:
             logger.exception('Error dumping input metadata manifest to file %s: %s' % (SCALE_INPUT_METADATA_PATH, ex))
+            return
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Scale Input Metadata Manifest Generated:")
+            with open(SCALE_INPUT_METADATA_PATH, 'r') as metadata_file:
+                log_str = json.dumps(json.load(metadata_file), sort_keys=True, indent=4, separators=(',', ': '))
+            logger.debug(log_str)
+
+    def _serialize_input_files(self, file_ids):
+        """Queries and serializes the details of the input files with the given IDs
+
+        :param file_ids: The file IDs
+        :type file_ids: :func:`set`
+        :returns: The JSON encoded details of each file stored by file ID
+        :rtype: dict
+        """
+
+        serialized_files = {}
+        if file_ids:
+            for scale_file in ScaleFile.objects.get_files_for_input_metadata(file_ids):
+                serialized_files[scale_file.id] = json.dumps(serialize(scale_file).data)
+
+        missing_ids = file_ids - set(serialized_files.keys())
+        if missing_ids:
+            raise ScaleFile.DoesNotExist('Input files %s do not exist' % sorted(missing_ids))
+
+        return serialized_files
+
+    def _write_input_metadata(self, metadata_file, input_datas, serialized_files):
+        """Writes the input metadata manifest to the given file
+
+        :param metadata_file: The file to write to
+        :type metadata_file: file
+        :param input_datas: The metadata keys ('JOB' or 'RECIPE') and their input data
+        :type input_datas: [(str, :class:`data.data.data.Data`)]
+        :param serialized_files: The JSON encoded details of each file stored by file ID
+        :type serialized_files: dict
+        """
+
+        metadata_file.write('{')
+        for input_num, (key, input_data) in enumerate(input_datas):
+            if input_num:
+                metadata_file.write(', ')
+            metadata_file.write('%s: {' % json.dumps(key))
+            value_num = 0
+            for name, data_value in input_data.values.items():
+                if type(data_value) is JsonValue:
+                    value_json = json.dumps(data_value.value)
+                elif type(data_value) is FileValue:
+                    value_json = '[%s]' % ', '.join(serialized_files[f] for f in data_value.file_ids)
+                else:
+                    continue
+                if value_num:
+                    metadata_file.write(', ')
+                metadata_file.write('%s: %s' % (json.dumps(name), value_json))
+                value_num += 1
+            metadata_file.write('}')
+        metadata_file.write('}')
 
     def _calculate_remote_path(self, job_exe):
         """Returns the remote path for storing the manifest
@@ -119,6 +119,24 @@ class CompletedJobs(CommandMessage):
 
         return len(self._completed_jobs) < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if self.ended != message.ended or len(self._completed_jobs) + len(message._completed_jobs) > MAX_NUM:
+            return False
+
+        for completed_job in message._completed_jobs:
+            self.add_completed_job(completed_job)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', completed_job.job_id) for completed_job in self._completed_jobs}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -149,6 +167,8 @@ class CompletedJobs(CommandMessage):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
+        from metrics.models import MetricsJobType
+
         when = now()
         job_ids = [job.job_id for job in self._completed_jobs]
 
@@ -174,6 +194,10 @@ class CompletedJobs(CommandMessage):
                 completed_job_ids = Job.objects.update_jobs_to_completed(jobs_to_complete, self.ended)
                 logger.info('Set %d job(s) to COMPLETED status', len(completed_job_ids))
 
+                # Update the hourly job type metrics
+                completed_jobs = [job_models[job_id] for job_id in completed_job_ids]
+                MetricsJobType.objects.add_ended_jobs(completed_jobs, 'COMPLETED', self.ended)
+
             # Create messages for jobs that are both COMPLETED and have output
             if job_ids_to_complete:
                 msgs = process_completed_jobs_with_output(job_ids_to_complete, when)
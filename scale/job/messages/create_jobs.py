@@ -156,6 +156,13 @@ class CreateJobs(CommandMessage):
         elif self.create_jobs_type == RECIPE_TYPE:
             return len(self.recipe_jobs) < MAX_NUM
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        recipe_ids = [self.recipe_id, self.root_recipe_id, self.superseded_recipe_id]
+        return {('recipe', recipe_id) for recipe_id in recipe_ids if recipe_id is not None}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
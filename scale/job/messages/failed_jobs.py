@@ -88,6 +88,25 @@ class FailedJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if self.ended != message.ended or self._count + message._count > MAX_NUM:
+            return False
+
+        for failed_jobs in message._failed_jobs.values():
+            for failed_job in failed_jobs:
+                self.add_failed_job(failed_job)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', failed_job.job_id) for failed_jobs in self._failed_jobs.values() for failed_job in failed_jobs}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -123,6 +142,7 @@ class FailedJobs(CommandMessage):
         """See :meth:`messaging.messages.message.CommandMessage.execute`
         """
 
+        from metrics.models import MetricsError, MetricsJobType
         from queue.messages.queued_jobs import create_queued_jobs_messages, QueuedJob
 
         job_ids = []
@@ -146,15 +166,19 @@ class FailedJobs(CommandMessage):
 
             jobs_to_retry = []
             all_failed_job_ids = []
+            job_errors = {}  # Errors of the jobs set to FAILED, stored by job ID
+            error_exe_counts = {}  # Number of failed job executions, stored by error
             for error_id, job_list in self._failed_jobs.items():
                 error = get_error(error_id)
                 jobs_to_fail = []
+                num_failed_exes = 0
                 for failed_job in job_list:
                     job_model = job_models[failed_job.job_id]
                     # If job cannot be failed or execution number does not match, then this update is obsolete
                     if not job_model.can_be_failed() or job_model.num_exes != failed_job.exe_num:
                         # Ignore this job
                         continue
+                    num_failed_exes += 1
 
                     # Re-try job if error supports re-try and there are more tries left
                     retry = error.should_be_retried and job_model.num_exes < job_model.max_tries
@@ -173,6 +197,16 @@ class FailedJobs(CommandMessage):
                     failed_job_ids = Job.objects.update_jobs_to_failed(jobs_to_fail, error_id, self.ended)
                     logger.info('Set %d job(s) to FAILED status with error %s', len(failed_job_ids), error.name)
                     all_failed_job_ids.extend(failed_job_ids)
+                    for job_id in failed_job_ids:
+                        job_errors[job_id] = error
+
+                # Every job execution failed with this error, whether or not its job will be re-tried
+                error_exe_counts[error] = num_failed_exes
+
+            # Update the metrics once for the whole message so that their entries are locked in a consistent order
+            failed_jobs = [job_models[job_id] for job_id in all_failed_job_ids]
+            MetricsJobType.objects.add_ended_jobs(failed_jobs, 'FAILED', self.ended, job_errors)
+            MetricsError.objects.add_failed_job_exes(error_exe_counts, self.ended)
 
             # Need to update recipes of failed jobs so that dependent jobs are BLOCKED
             if root_recipe_ids:
@@ -72,6 +72,24 @@ class CreateJobExecutionEnd(CommandMessage):
 
         return len(self._job_exe_ends) < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if len(self._job_exe_ends) + len(message._job_exe_ends) > MAX_NUM:
+            return False
+
+        for job_exe_end in message._job_exe_ends:
+            self.add_job_exe_end(job_exe_end)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', job_exe_end.job_id) for job_exe_end in self._job_exe_ends}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -79,6 +79,24 @@ class PendingJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if self.status_change != message.status_change or self._count + message._count > MAX_NUM:
+            return False
+
+        for job_id in message._pending_job_ids:
+            self.add_job(job_id)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', job_id) for job_id in self._pending_job_ids}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -46,6 +46,12 @@ class ProcessJobInput(CommandMessage):
         self.job_id = None
         # self.tries = 0
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', self.job_id)}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -39,6 +39,12 @@ class PublishJob(CommandMessage):
 
         self.job_id = None
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', self.job_id)}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -88,6 +88,12 @@ class PurgeJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', job_id) for job_id in self._purge_job_ids}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
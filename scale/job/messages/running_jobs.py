@@ -93,6 +93,25 @@ class RunningJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if self._started != message._started or self._count + message._count > MAX_NUM:
+            return False
+
+        for node_id, job_list in message._running_jobs.items():
+            for job_id, exe_num in job_list:
+                self.add_running_job(job_id, exe_num, node_id)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', job_id) for running_jobs in self._running_jobs.values() for job_id, _ in running_jobs}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
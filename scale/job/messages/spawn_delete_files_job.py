@@ -54,6 +54,12 @@ class SpawnDeleteFilesJob(CommandMessage):
         self.source_file_id = None
         self.purge = False
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', self.job_id)} if self.job_id is not None else set()
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -77,6 +77,24 @@ class UnpublishJobs(CommandMessage):
 
         return self._count < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if self.when != message.when or self._count + message._count > MAX_NUM:
+            return False
+
+        for job_id in message._job_ids:
+            self.add_job(job_id)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', job_id) for job_id in self._job_ids}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
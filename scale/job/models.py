@@ -449,6 +449,30 @@ class JobManager(models.Manager):
 
         return self.get_locked_jobs([job_id])[0]
 
+    def get_canceled_job_exes(self, job_exes):
+        """Returns the given job executions that should no longer be running, either because their job has been
+        canceled or because their job has a newer execution. Only the job status and number of executions are queried
+        so that the cost is proportional to the executions that have been canceled.
+
+        :param job_exes: The (job ID, execution number) pairs of the running job executions
+        :type job_exes: :func:`list`
+        :returns: The (job ID, execution number) pairs of the job executions that should be canceled
+        :rtype: set
+        """
+
+        if not job_exes:
+            return set()
+
+        values = ', '.join(['(%s, %s)'] * len(job_exes))
+        qry = 'SELECT v.id, v.exe_num FROM job j JOIN (VALUES %s) AS v(id, exe_num) ON j.id = v.id' % values
+        qry += ' WHERE j.status = \'CANCELED\' OR j.num_exes > v.exe_num'
+        params = []
+        for job_id, exe_num in job_exes:
+            params.extend([job_id, exe_num])
+        with connection.cursor() as cursor:
+            cursor.execute(qry, params)
+            return {(row[0], row[1]) for row in cursor.fetchall()}
+
     def get_locked_jobs(self, job_ids):
         """Locks and returns the job models for the given IDs with no related fields. Caller must be within an atomic
         transaction.
@@ -1131,22 +1155,24 @@ class Job(models.Model):
 
         return rest_utils.strip_schema_version(convert_data_to_v6_json(self.get_output_data()).get_dict())
 
-    def get_resources(self):
+    def get_resources(self, interface=None):
         """Returns the resources required for this job
 
+        :param interface: The already parsed manifest of this job's job type, parsed from the job type if None
+        :type interface: :class:`job.seed.manifest.SeedManifest`
         :returns: The required resources
         :rtype: :class:`node.resources.node_resources.NodeResources`
         """
 
-        resources = self.job_type.get_resources()
+        if interface is None:
+            interface = self.job_type.get_job_interface()
+        resources = self.job_type.get_resources(interface)
 
         # Input File Size in MiB
         input_file_size = self.input_file_size
         if not input_file_size:
             input_file_size = 0.0
 
-        interface = self.job_type.get_job_interface()
-
         scalar_resources = []
         # Iterate over all scalar resources and
         for resource in interface.get_scalar_resources():
@@ -2535,6 +2561,23 @@ class JobTypeManager(models.Manager):
         secrets_handler = SecretsHandler()
         secrets_handler.set_job_type_secrets(secrets_key, secrets)
 
+    def update_unmet_resources(self, unmet_resources):
+        """Updates the unmet resources of the given job types in a single query
+
+        :param unmet_resources: The comma-separated names of the unmet resources (possibly None) stored by job type ID
+        :type unmet_resources: dict
+        """
+
+        if unmet_resources:
+            values = ', '.join(['(%s, %s)'] * len(unmet_resources))
+            qry = 'UPDATE job_type jt SET unmet_resources = v.unmet_resources FROM (VALUES %s)' % values
+            qry += ' AS v(id, unmet_resources) WHERE jt.id = v.id'
+            params = []
+            for job_type_id, resources in unmet_resources.items():
+                params.extend([job_type_id, resources])
+            with connection.cursor() as cursor:
+                cursor.execute(qry, params)
+
     def validate_job_type_v6(self, manifest_dict, configuration_dict=None):
         """Validates a new job type prior to attempting a save
 
@@ -2865,14 +2908,17 @@ class JobType(models.Model):
 
         return JobConfigurationV6(config=self.configuration, do_validate=False).get_configuration()
 
-    def get_resources(self):
+    def get_resources(self, interface=None):
         """Returns the resources required for jobs of this type
 
+        :param interface: The already parsed manifest of this job type, parsed from the job type if None
+        :type interface: :class:`job.seed.manifest.SeedManifest`
         :returns: The required resources
         :rtype: :class:`node.resources.node_resources.NodeResources`
         """
 
-        interface = self.get_job_interface()
+        if interface is None:
+            interface = self.get_job_interface()
         seed_resources = {}
         resources = None
         # Check all specified resources
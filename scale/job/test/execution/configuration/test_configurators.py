@@ -104,6 +104,25 @@ class TestQueuedExecutionConfigurator(TestCase):
         self.assertEqual(main_task['args'], expected_args)
         self.assertDictEqual(main_task['env_vars'], expected_env_vars)
 
+    def test_configure_queued_job_parses_once(self):
+        """Tests that configure_queued_job() parses each job type's definitions once for many jobs"""
+
+        workspace = storage_test_utils.create_workspace()
+        job_type = job_test_utils.create_seed_job_type(configuration={'output_workspaces': {'default': workspace.name}})
+        job_1 = job_test_utils.create_job(job_type=job_type, status='QUEUED')
+        job_2 = job_test_utils.create_job(job_type=job_type, status='QUEUED')
+        configurator = QueuedExecutionConfigurator({})
+
+        # Test method
+        for job in Job.objects.get_jobs_with_related([job_1.id, job_2.id]):
+            configurator.configure_queued_job(job)
+            self.assertIs(configurator.get_manifest(job), configurator.get_manifest(job_1))
+
+        parse_counts = configurator.get_parse_counts()
+        self.assertEqual(parse_counts['manifests'], 1)
+        self.assertEqual(parse_counts['input_interfaces'], 1)
+        self.assertEqual(parse_counts['job_configs'], 1)
+
     def test_configure_queued_job_empty_output_data(self):
         """Tests calling configure_queued_job() on a regular (non-system) job with empty output_data"""
 
@@ -6,7 +6,7 @@ import django
 from django.utils.timezone import now
 from django.test import TransactionTestCase
 
-from job.messages.pending_jobs import PendingJobs
+from job.messages.pending_jobs import MAX_NUM, PendingJobs
 from job.models import Job
 from job.test import utils as job_test_utils
 
@@ -61,6 +61,31 @@ class TestPendingJobs(TransactionTestCase):
         self.assertEqual(jobs[4].status, 'QUEUED')
         self.assertEqual(jobs[4].last_status_change, original_status_change)
 
+    def test_coalesce(self):
+        """Tests coalescing PendingJobs messages"""
+
+        status_change = now()
+        message_1 = PendingJobs()
+        message_1.status_change = status_change
+        message_1.add_job(1)
+        message_2 = PendingJobs()
+        message_2.status_change = status_change
+        message_2.add_job(2)
+        message_3 = PendingJobs()
+        message_3.status_change = status_change + datetime.timedelta(minutes=1)
+        message_3.add_job(3)
+        message_4 = PendingJobs()
+        message_4.status_change = status_change
+        for job_id in range(MAX_NUM):
+            message_4.add_job(job_id)
+
+        self.assertTrue(message_1.coalesce(message_2))
+        # Different status change time
+        self.assertFalse(message_1.coalesce(message_3))
+        # Too many jobs to fit
+        self.assertFalse(message_1.coalesce(message_4))
+        self.assertListEqual(message_1.to_json()['job_ids'], [1, 2])
+
     def test_execute(self):
         """Tests calling PendingJobs.execute() successfully"""
 
@@ -1,5 +1,7 @@
 from __future__ import unicode_literals
 
+import datetime
+
 import django
 from django.utils.timezone import now
 from django.test import TransactionTestCase
@@ -64,6 +66,25 @@ class TestRunningJobs(TransactionTestCase):
         self.assertEqual(jobs[4].started, started)
         self.assertEqual(jobs[4].node_id, node_2.id)
 
+    def test_coalesce(self):
+        """Tests coalescing RunningJobs messages"""
+
+        started = now()
+        message_1 = RunningJobs(started)
+        message_1.add_running_job(1, 1, 1)
+        message_2 = RunningJobs(started)
+        message_2.add_running_job(2, 1, 1)
+        message_2.add_running_job(3, 2, 2)
+        message_3 = RunningJobs(started + datetime.timedelta(minutes=1))
+        message_3.add_running_job(4, 1, 1)
+
+        self.assertTrue(message_1.coalesce(message_2))
+        # Different start time
+        self.assertFalse(message_1.coalesce(message_3))
+        self.assertEqual(message_1._count, 3)
+        self.assertListEqual(message_1._running_jobs[1], [(1, 1), (2, 1)])
+        self.assertListEqual(message_1._running_jobs[2], [(3, 2)])
+
     def test_execute(self):
         """Tests calling RunningJobs.execute() successfully"""
 
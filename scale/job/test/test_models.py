@@ -156,6 +156,19 @@ class TestJobManager(TransactionTestCase):
         self.assertDictEqual(input_files_dict, {'Input 1': {file_6.id}, 'Input 2': {file_7.id, file_8.id, file_9.id,
                                                                                     file_10.id}})
 
+    def test_get_canceled_job_exes(self):
+        """Tests calling JobManager.get_canceled_job_exes()"""
+
+        job_1 = job_test_utils.create_job(status='RUNNING', num_exes=1)
+        job_2 = job_test_utils.create_job(status='CANCELED', num_exes=1)
+        job_3 = job_test_utils.create_job(status='RUNNING', num_exes=2)
+
+        job_exes = [(job_1.id, 1), (job_2.id, 1), (job_3.id, 1), (job_3.id, 2)]
+        canceled_job_exes = Job.objects.get_canceled_job_exes(job_exes)
+
+        self.assertSetEqual(canceled_job_exes, {(job_2.id, 1), (job_3.id, 1)})
+        self.assertSetEqual(Job.objects.get_canceled_job_exes([]), set())
+
     def test_process_job_output(self):
         """Tests calling JobManager.process_job_output()"""
 
@@ -453,6 +466,19 @@ class TestJobType(TransactionTestCase):
         self.assertEqual([0,0,0,0], value)
 
 
+    def test_update_unmet_resources(self):
+        """Tests calling JobTypeManager.update_unmet_resources() successfully"""
+
+        job_type_1 = job_test_utils.create_seed_job_type()
+        job_type_2 = job_test_utils.create_seed_job_type()
+        JobType.objects.filter(id=job_type_2.id).update(unmet_resources='gpus')
+
+        JobType.objects.update_unmet_resources({job_type_1.id: 'cpus,mem', job_type_2.id: None})
+
+        self.assertEqual(JobType.objects.get(id=job_type_1.id).unmet_resources, 'cpus,mem')
+        self.assertIsNone(JobType.objects.get(id=job_type_2.id).unmet_resources)
+
+
 class TestJobTypeRevision(TransactionTestCase):
 
     def setUp(self):
@@ -6,9 +6,11 @@ from __future__ import unicode_literals
 
 import Queue
 import logging
-from contextlib import closing
+import threading
 
-from kombu import Connection
+from django.conf import settings
+from kombu import Connection, Exchange
+from kombu import Queue as BrokerQueue
 
 from messaging.backends.backend import MessagingBackend
 
@@ -16,7 +18,10 @@ logger = logging.getLogger(__name__)
 
 
 class AMQPMessagingBackend(MessagingBackend):
-    """Backend supporting message passing via AMQP 0.9.1 broker, targeting RabbitMQ"""
+    """Backend supporting message passing via AMQP 0.9.1 broker, targeting RabbitMQ
+
+    Broker connections are pooled and reused across calls. Each connection is re-established as needed if it is lost.
+    """
 
     def __init__(self):
         super(AMQPMessagingBackend, self).__init__('amqp')
@@ -24,35 +29,169 @@ class AMQPMessagingBackend(MessagingBackend):
         # Message retrieval timeout
         self._timeout = 1
 
+        # Number of attempts to re-establish a lost broker connection
+        self._max_retries = 3
+
+        # Number of unacknowledged messages the broker will deliver to the consumer at once
+        self._prefetch_count = settings.MESSAGE_PREFETCH_COUNT
+
+        # Same queue and exchange that kombu.simple.SimpleQueue declares for the queue name
+        self._queue = BrokerQueue(self._queue_name, Exchange(self._queue_name, type='direct'), self._queue_name)
+
+        # Pool of connections for sending messages and checking queue size, connections are created lazily. With
+        # publisher confirms, the broker acknowledges each sent message before its publish returns.
+        transport_options = {'confirm_publish': settings.MESSAGE_CONFIRM_PUBLISH}
+        connection = Connection(self._broker_url, transport_options=transport_options)
+        self._pool = connection.Pool(limit=settings.MESSAGE_CONNECTION_POOL_LIMIT)
+
+        # Long-lived consumer so that prefetched messages are kept between batches
+        self._consumer_connection = None
+        self._consumer_lock = threading.Lock()
+        self._consumer_queue = None
+
     def send_messages(self, messages):
         """See :meth:`messaging.backends.backend.MessagingBackend.send_messages`"""
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
+
+        with self._pool.acquire(block=True) as connection:
+            try:
+                connection.ensure_connection(max_retries=self._max_retries)
+                producer = connection.Producer(connection.default_channel, exchange=self._queue.exchange,
+                                               routing_key=self._queue_name, auto_declare=False)
                 for message in messages:
                     logger.debug('Sending message of type: %s', message['type'])
-                    simple_queue.put(message)
+                    # Declarations are cached per connection, so the queue is only declared once
+                    producer.publish(message, declare=[self._queue])
+            except Exception:
+                # Drop the connection instead of returning a channel in an unknown state to the pool, it is
+                # re-established the next time it is acquired
+                connection.collect()
+                raise
 
     def receive_messages(self, batch_size):
         """See :meth:`messaging.backends.backend.MessagingBackend.receive_messages`"""
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
+
+        with self._consumer_lock:
+            simple_queue = self._get_consumer_queue()
+            # Received messages that still need to be returned to the queue, including the message being processed
+            failed_messages = []
+            try:
                 for _ in range(batch_size):
                     try:
                         message = simple_queue.get(timeout=self._timeout)
+                    except Queue.Empty:
+                        # We've reached the end of the queue... exit loop
+                        break
+
+                    # Accept success back via generator send
+                    failed_messages.append(message)
+                    success = yield message.payload
+                    if success:
+                        failed_messages.pop()
+                        message.ack()
+            except self._consumer_connection.connection_errors + self._consumer_connection.channel_errors:
+                # Drop the broken consumer so that it is re-established on the next call
+                self._close_consumer()
+                raise
+            finally:
+                # The consumer is long-lived, so return failed messages to the queue to be received again, even if the
+                # generator is closed early or an error occurs
+                self._requeue_messages(failed_messages)
+
+    def receive_message_batch(self, batch_size):
+        """See :meth:`messaging.backends.backend.MessagingBackend.receive_message_batch`"""
 
-                        # Accept success back via generator send
-                        success = yield message.payload
-                        if success:
-                            message.ack()
+        with self._consumer_lock:
+            simple_queue = self._get_consumer_queue()
+            # Received messages that still need to be returned to the queue
+            failed_messages = []
+            try:
+                for _ in range(batch_size):
+                    try:
+                        failed_messages.append(simple_queue.get(timeout=self._timeout))
                     except Queue.Empty:
                         # We've reached the end of the queue... exit loop
                         break
 
+                # Accept success of each message back via generator send
+                received_messages = failed_messages
+                successes = yield [message.payload for message in received_messages]
+                failed_messages = [message for message, success in zip(received_messages, successes) if not success]
+                failed_messages.extend(received_messages[len(successes):])
+                for message, success in zip(received_messages, successes):
+                    if success:
+                        message.ack()
+            except self._consumer_connection.connection_errors + self._consumer_connection.channel_errors:
+                # Drop the broken consumer so that it is re-established on the next call
+                self._close_consumer()
+                raise
+            finally:
+                # The consumer is long-lived, so return failed messages to the queue to be received again, even if the
+                # generator is closed early or an error occurs
+                self._requeue_messages(failed_messages)
+
     def get_queue_size(self):
         """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
 
-        queue_size = 0
-        with Connection(self._broker_url) as connection:
-            with closing(connection.SimpleQueue(self._queue_name)) as simple_queue:
-                queue_size = simple_queue.qsize()
+        with self._pool.acquire(block=True) as connection:
+            try:
+                connection.ensure_connection(max_retries=self._max_retries)
+                _, queue_size, _ = self._queue(connection.default_channel).queue_declare()
+            except connection.connection_errors + connection.channel_errors:
+                # Drop the broken connection so that it is re-established the next time it is acquired
+                connection.collect()
+                raise
         return queue_size
+
+    def _close_consumer(self):
+        """Closes the long-lived consumer and its connection, ignoring any errors
+        """
+
+        if self._consumer_queue:
+            try:
+                self._consumer_queue.close()
+            except Exception:
+                logger.exception('Error closing message consumer')
+        if self._consumer_connection:
+            self._consumer_connection.collect()
+        self._consumer_connection = None
+        self._consumer_queue = None
+
+    def _get_consumer_queue(self):
+        """Returns the long-lived consumer queue, creating it and its connection if needed. The caller must hold the
+        consumer lock.
+
+        :return: The consumer queue
+        :rtype: :class:`kombu.simple.SimpleQueue`
+        """
+
+        if self._consumer_queue is None:
+            connection = Connection(self._broker_url)
+            try:
+                connection.ensure_connection(max_retries=self._max_retries)
+                simple_queue = connection.SimpleQueue(self._queue_name)
+                simple_queue.consumer.qos(prefetch_count=self._prefetch_count)
+            except Exception:
+                connection.collect()
+                raise
+            self._consumer_connection = connection
+            self._consumer_queue = simple_queue
+        return self._consumer_queue
+
+    def _requeue_messages(self, messages):
+        """Returns the given received messages to the queue. If a message cannot be requeued, the consumer is closed so
+        that the broker returns all of its unacknowledged messages to the queue instead. Nothing is done if the consumer
+        has already been closed. The caller must hold the consumer lock.
+
+        :param messages: The received messages
+        :type messages: list
+        """
+
+        if self._consumer_queue is None:
+            return
+
+        try:
+            for message in messages:
+                message.requeue()
+        except Exception:
+            logger.exception('Error requeuing messages, closing message consumer')
+            self._close_consumer()
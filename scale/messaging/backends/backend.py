@@ -50,6 +50,20 @@ class MessagingBackend(object):
         :rtype: Generator[dict]
         """
 
+    @abstractmethod
+    def receive_message_batch(self, batch_size):
+        """Receive a batch of messages from the backend, deferring acknowledgement until the entire batch is processed
+
+        Implementing function must yield a single list of messages from backend. Messages must be in dict form. It is
+        also the responsibility of the function to handle a list of boolean responses (one per message, in the same
+        order) and appropriately acknowledge / delete each message whose response is True
+
+        :param batch_size: Maximum number of messages to be processed
+        :type batch_size: int
+        :return: Yielded list of messages
+        :rtype: Generator[[dict]]
+        """
+
     @abstractmethod
     def get_queue_size(self):
         """Gets the current length of the queue
@@ -43,7 +43,19 @@ class SQSMessagingBackend(MessagingBackend):
                 success = yield json.loads(message.body)
                 if success:
                     message.delete()
-                    
+
+    def receive_message_batch(self, batch_size):
+        """See :meth:`messaging.backends.backend.MessagingBackend.receive_message_batch`"""
+
+        with SQSClient(self._credentials, self._region_name) as client:
+            received_messages = list(client.receive_messages(self._queue_name, batch_size=batch_size))
+
+            # Accept success of each message back via generator send
+            successes = yield [json.loads(message.body) for message in received_messages]
+            for message, success in zip(received_messages, successes):
+                if success:
+                    message.delete()
+
     def get_queue_size(self):
         """See :meth:`messaging.backends.backend.MessagingBackend.get_queue_size`"""
 
@@ -4,8 +4,11 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import logging
+import threading
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
+from django.db import close_old_connections
 from django.utils.timezone import now
 from six import raise_from
 
@@ -18,6 +21,15 @@ logger = logging.getLogger(__name__)
 
 
 class CommandMessageManager(object):
+
+    # Bounded pool of threads for executing messages concurrently, created lazily
+    _worker_pool = None
+
+    # Counts of downstream messages before and after coalescing
+    _coalesce_lock = threading.Lock()
+    _num_messages_in = 0
+    _num_messages_out = 0
+
     def __new__(cls):
         """Singleton support for manager"""
         if not hasattr(cls, 'instance'):
@@ -33,6 +45,17 @@ class CommandMessageManager(object):
 
         self._backend = get_message_backend(broker_type)
 
+    def get_coalesce_counts(self):
+        """Returns the total number of downstream messages produced by executed messages and the total number actually
+        sent after compatible messages were coalesced
+
+        :return: Tuple of the number of messages in and the number of messages out
+        :rtype: tuple
+        """
+
+        with CommandMessageManager._coalesce_lock:
+            return CommandMessageManager._num_messages_in, CommandMessageManager._num_messages_out
+
     def get_queue_size(self):
         """Gets the current length of the queue
 
@@ -58,37 +81,177 @@ class CommandMessageManager(object):
     def receive_messages(self):
         """Main entry point to message processing.
 
-        This will process up to a batch of 10 messages at a time. Behavior may
+        This will process up to a batch of MESSAGE_BATCH_SIZE messages at a time. Behavior may
         differ slightly based on message backend. RabbitMQ will immediately
-        iterate over up to 10 messages, process and return. SQS will long-poll
-        up to 20 seconds or until 10 messages have been processed, process and
+        iterate over up to a batch of messages, process and return. SQS will long-poll
+        up to 20 seconds or until a batch of messages have been processed, process and
         then return.
 
+        If MESSAGE_WORKER_THREADS is greater than 1, the messages in a batch are executed concurrently on a bounded
+        pool of threads. Messages that touch the same job or recipe IDs are always executed serially in the order they
+        were received.
+
         New messages will potentially be sent within this method, if CommandMessage populates
         the new_messages list.
         """
 
-        message_generator = self._backend.receive_messages(10)
+        if settings.MESSAGE_WORKER_THREADS > 1:
+            self._receive_messages_concurrently(settings.MESSAGE_BATCH_SIZE, settings.MESSAGE_WORKER_THREADS)
+            return
+
+        message_generator = self._backend.receive_messages(settings.MESSAGE_BATCH_SIZE)
 
         # Manually control iteration, so we can pass back success/failure to co-routine
         try:
             # Seed message to start processing
             message = message_generator.next()
             while True:
-                success = False
-                try:
-                    self._process_message(message)
-                    success = True
-                except InvalidCommandMessage:
-                    logger.exception('Exception encountered processing message payload. Message remains on queue.')
-                except CommandMessageExecuteFailure:
-                    logger.exception('CommandMessage failure during execute call. Message remains on queue.')
+                success = self._try_process_message(message)
 
                 # Feed boolean to backend generator and grab next message
                 message = message_generator.send(success)
         except StopIteration:
             pass
 
+    def _receive_messages_concurrently(self, batch_size, num_workers):
+        """Receives a batch of messages and executes them concurrently on the worker pool, passing the success of each
+        message back to the backend once the entire batch has been processed
+
+        :param batch_size: The maximum number of messages in the batch
+        :type batch_size: int
+        :param num_workers: The number of worker threads
+        :type num_workers: int
+        """
+
+        message_generator = self._backend.receive_message_batch(batch_size)
+        messages = message_generator.next()
+        successes = [False] * len(messages)
+
+        if messages:
+            groups = self._group_messages(messages)
+            logger.debug('Executing %d message(s) in %d serialized group(s)', len(messages), len(groups))
+            try:
+                group_messages = [[messages[i] for i in group] for group in groups]
+                results = self._get_worker_pool(num_workers).map(self._process_message_group, group_messages, 1)
+                for group, group_results in zip(groups, results):
+                    for i, success in zip(group, group_results):
+                        successes[i] = success
+            except Exception:
+                logger.exception('Unexpected error executing messages. Messages remain on queue.')
+
+        # Feed booleans to backend generator so it can acknowledge each message
+        try:
+            message_generator.send(successes)
+        except StopIteration:
+            pass
+
+    def _get_worker_pool(self, num_workers):
+        """Returns the pool of worker threads, creating it if needed
+
+        :param num_workers: The number of worker threads
+        :type num_workers: int
+        :return: The pool of worker threads
+        :rtype: :class:`multiprocessing.pool.ThreadPool`
+        """
+
+        if CommandMessageManager._worker_pool is None:
+            CommandMessageManager._worker_pool = ThreadPool(num_workers)
+        return CommandMessageManager._worker_pool
+
+    def _process_message_group(self, messages):
+        """Processes the given group of messages serially, returning the success of each. This is run on a worker
+        thread. If a message raises an unexpected error, it and the rest of the group are not successful, while the
+        messages that were already processed keep their results.
+
+        :param messages: The message payloads to process in order
+        :type messages: [dict]
+        :return: The success of each message
+        :rtype: [bool]
+        """
+
+        # Each worker thread holds its own database connection, so drop it if it has become unusable or expired
+        close_old_connections()
+        results = []
+        for message in messages:
+            try:
+                results.append(self._try_process_message(message))
+            except Exception:
+                logger.exception('Unexpected error executing message. Message and rest of its group remain on queue.')
+                break
+        results.extend([False] * (len(messages) - len(results)))
+        return results
+
+    def _try_process_message(self, message):
+        """Processes the given message, logging any failure
+
+        :param message: message payload
+        :type message: dict
+        :return: True if the message was successfully processed, False otherwise
+        :rtype: bool
+        """
+
+        try:
+            self._process_message(message)
+            return True
+        except InvalidCommandMessage:
+            logger.exception('Exception encountered processing message payload. Message remains on queue.')
+        except CommandMessageExecuteFailure:
+            logger.exception('CommandMessage failure during execute call. Message remains on queue.')
+        return False
+
+    @staticmethod
+    def _group_messages(messages):
+        """Groups the given messages so that messages that touch the same job or recipe IDs are in the same group.
+        Each group lists the indexes of its messages in the order they were received.
+
+        :param messages: The message payloads
+        :type messages: [dict]
+        :return: The list of groups of message indexes
+        :rtype: [[int]]
+        """
+
+        groups = []  # [[Message index]], merged groups are replaced with None
+        key_groups = {}  # {Serialization key: Group index}
+
+        for index, message in enumerate(messages):
+            keys = CommandMessageManager._get_serialization_keys(message)
+            group_indexes = sorted({key_groups[key] for key in keys if key in key_groups})
+            if group_indexes:
+                # Merge every group that shares a key with this message into the earliest group
+                target = group_indexes[0]
+                for other in group_indexes[1:]:
+                    groups[target].extend(groups[other])
+                    groups[other] = None
+                for key, group_index in key_groups.items():
+                    if group_index in group_indexes:
+                        key_groups[key] = target
+                groups[target].sort()
+            else:
+                target = len(groups)
+                groups.append([])
+            groups[target].append(index)
+            for key in keys:
+                key_groups[key] = target
+
+        return [group for group in groups if group is not None]
+
+    @staticmethod
+    def _get_serialization_keys(message):
+        """Returns the set of (model, ID) keys for the jobs and recipes whose state the given message changes, as
+        reported by the message itself. A message that cannot be parsed has no keys since it fails when it is processed.
+
+        :param message: message payload
+        :type message: dict
+        :return: The set of serialization keys
+        :rtype: set
+        """
+
+        try:
+            command = CommandMessageManager._extract_command(message)
+        except Exception:
+            return set()
+        return command.get_serialization_keys()
+
     @staticmethod
     def _extract_command(message):
         """Reconstitute a CommandMessage from incoming raw message payload
@@ -145,10 +308,43 @@ class CommandMessageManager(object):
         logger.info('Successfully completed message of type %s', command.type)
 
     def _send_downstream(self, messages):
-        """Send any required downstream messages following a CommandMessage.execute
+        """Send any required downstream messages following a CommandMessage.execute. Compatible messages of the same
+        type are coalesced before they are sent.
+
         :param messages: List of CommandMessage instances to send downstream
         :type messages: [`messaging.message.CommandMessage`]
         """
         if len(messages):
-            logger.info('Sending %i downstream CommandMessage(s).', len(messages))
-            self.send_messages(messages)
+            coalesced_messages = self._coalesce_messages(messages)
+            with CommandMessageManager._coalesce_lock:
+                CommandMessageManager._num_messages_in += len(messages)
+                CommandMessageManager._num_messages_out += len(coalesced_messages)
+            logger.info('Sending %i downstream CommandMessage(s), coalesced from %i.', len(coalesced_messages),
+                        len(messages))
+            self.send_messages(coalesced_messages)
+
+    @staticmethod
+    def _coalesce_messages(messages):
+        """Merges compatible messages of the same type together so that fewer messages are sent. Messages are not
+        guaranteed to be processed in order, so merged messages may be sent before messages of other types that
+        originally preceded them.
+
+        :param messages: List of CommandMessage instances
+        :type messages: [`messaging.message.CommandMessage`]
+        :return: The coalesced list of CommandMessage instances
+        :rtype: [`messaging.message.CommandMessage`]
+        """
+
+        coalesced_messages = []
+        messages_by_type = {}  # {Message type: [CommandMessage]}
+        for message in messages:
+            merged = False
+            for coalesced_message in messages_by_type.get(message.type, []):
+                if coalesced_message.coalesce(message):
+                    merged = True
+                    break
+            if not merged:
+                coalesced_messages.append(message)
+                messages_by_type.setdefault(message.type, []).append(message)
+
+        return coalesced_messages
@@ -17,6 +17,30 @@ class CommandMessage(object):
         # Unique type of CommandMessage, each type must be registered in apps.py
         self.type = message_type
 
+    def coalesce(self, message):
+        """Attempts to merge the contents of the given message of the same type into this message so that fewer
+        messages need to be sent. The given message is only merged if it is compatible with this message and all of its
+        contents fit within this message. Subclasses that support merging should override this method.
+
+        :param message: The message of the same type to merge into this message
+        :type message: :class:`messaging.messages.message.CommandMessage`
+        :return: True if the given message was merged into this message, False otherwise
+        :rtype: bool
+        """
+
+        return False
+
+    def get_serialization_keys(self):
+        """Returns the keys of the jobs and recipes whose state this message changes. Messages that share a key are
+        always executed serially in the order they were received, while other messages may be executed concurrently.
+        Subclasses that change the state of jobs or recipes must override this method.
+
+        :return: The set of (model, ID) keys, where model is either 'job' or 'recipe'
+        :rtype: set
+        """
+
+        return set()
+
     @abstractmethod
     def to_json(self):
         """JSON Serializer for CommandMessage subclasses. Must be implemented in all subclasses.
@@ -8,7 +8,7 @@ import json
 
 import django
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from mock import MagicMock
 from mock import call, patch
 
@@ -28,6 +28,9 @@ class DummyBackend(MessagingBackend):
 
     def receive_messages(self, batch_size):  # pragma: no cover
         pass
+
+    def receive_message_batch(self, batch_size):  # pragma: no cover
+        pass
     
     def get_queue_size(self):  # pragma: no cover
         pass
@@ -42,6 +45,7 @@ class TestAMQPBackend(TestCase):
         backend = AMQPMessagingBackend()
         self.assertEqual(backend.type, 'amqp')
         self.assertEqual(backend._timeout, 1)
+        self.assertEqual(backend._prefetch_count, settings.MESSAGE_PREFETCH_COUNT)
 
     @patch('messaging.backends.amqp.Connection')
     def test_valid_send_message(self, connection):
@@ -52,10 +56,11 @@ class TestAMQPBackend(TestCase):
         backend = AMQPMessagingBackend()
         backend.send_messages(messages)
 
-        # Deep diving through context managers to assert put call
-        put = connection.return_value.__enter__.return_value.SimpleQueue.return_value.put
-        put.assert_called_with(messages[0])
-        self.assertEquals(put.call_count, 1)
+        # Deep diving through the connection pool to assert publish call
+        pooled_connection = connection.return_value.Pool.return_value.acquire.return_value.__enter__.return_value
+        publish = pooled_connection.Producer.return_value.publish
+        publish.assert_called_with(messages[0], declare=[backend._queue])
+        self.assertEquals(publish.call_count, 1)
 
     @patch('messaging.backends.amqp.Connection')
     def test_valid_send_messages(self, connection):
@@ -69,10 +74,49 @@ class TestAMQPBackend(TestCase):
         backend = AMQPMessagingBackend()
         backend.send_messages(messages)
 
-        # Deep diving through context managers to assert put call
-        put = connection.return_value.__enter__.return_value.SimpleQueue.return_value.put
-        put.assert_has_calls([call(x) for x in messages])
-        self.assertEquals(put.call_count, 2)
+        # Deep diving through the connection pool to assert publish call
+        pooled_connection = connection.return_value.Pool.return_value.acquire.return_value.__enter__.return_value
+        publish = pooled_connection.Producer.return_value.publish
+        publish.assert_has_calls([call(x, declare=[backend._queue]) for x in messages])
+        self.assertEquals(publish.call_count, 2)
+
+    @override_settings(MESSAGE_CONFIRM_PUBLISH=True)
+    @patch('messaging.backends.amqp.Connection')
+    def test_send_messages_publisher_confirms(self, connection):
+        """Validate sent messages use publisher confirms on pooled connections via the AMQP backend"""
+
+        messages = [
+            {'type': 'echo', 'body': '1'},
+            {'type': 'echo', 'body': '2'}
+        ]
+
+        backend = AMQPMessagingBackend()
+        backend.send_messages(messages)
+        backend.send_messages(messages)
+
+        connection.assert_called_once_with(backend._broker_url, transport_options={'confirm_publish': True})
+        # Connection is acquired from the pool for each call rather than created
+        pool = connection.return_value.Pool.return_value
+        self.assertEquals(pool.acquire.call_count, 2)
+        channel = pool.acquire.return_value.__enter__.return_value.default_channel
+        channel.tx_select.assert_not_called()
+        channel.tx_commit.assert_not_called()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_send_messages_error(self, connection):
+        """Validate the pooled connection is dropped when sending a batch fails via the AMQP backend"""
+
+        messages = [
+            {'type': 'echo', 'body': '1'},
+            {'type': 'echo', 'body': '2'}
+        ]
+
+        backend = AMQPMessagingBackend()
+        pooled_connection = connection.return_value.Pool.return_value.acquire.return_value.__enter__.return_value
+        pooled_connection.Producer.return_value.publish.side_effect = [None, ValueError]
+        self.assertRaises(ValueError, backend.send_messages, messages)
+
+        pooled_connection.collect.assert_called_once()
 
     @patch('messaging.backends.amqp.Connection')
     def test_valid_receive_messages(self, connection):
@@ -82,8 +126,8 @@ class TestAMQPBackend(TestCase):
         message2 = MagicMock(payload={'type': 'echo', 'body': '2'})
         get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        # Patch get call of the long-lived consumer
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
         generator = backend.receive_messages(5)
@@ -98,6 +142,8 @@ class TestAMQPBackend(TestCase):
         self.assertEqual(len(results), 2)
         message1.ack.assert_called()
         message2.ack.assert_called()
+        simple_queue = connection.return_value.SimpleQueue.return_value
+        simple_queue.consumer.qos.assert_called_with(prefetch_count=backend._prefetch_count)
 
     @patch('messaging.backends.amqp.Connection')
     def test_valid_single_batch_receive_message(self, connection):
@@ -108,8 +154,8 @@ class TestAMQPBackend(TestCase):
         message3 = MagicMock(payload={'type': 'echo', 'body': '3'})
         get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        # Patch get call of the long-lived consumer
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
         generator = backend.receive_messages(2)
@@ -127,6 +173,19 @@ class TestAMQPBackend(TestCase):
         message2.ack.assert_called()
         message3.ack.assert_not_called()
 
+    @patch('messaging.backends.amqp.Connection')
+    def test_consumer_reused_across_receive_messages(self, connection):
+        """Validate the consumer connection is reused across calls in AMQP backend"""
+
+        get_func = MagicMock(side_effect=Queue.Empty)
+        connection.return_value.SimpleQueue.return_value.get = get_func
+
+        backend = AMQPMessagingBackend()
+        list(backend.receive_messages(5))
+        list(backend.receive_messages(5))
+
+        self.assertEqual(connection.return_value.SimpleQueue.call_count, 1)
+
     @patch('messaging.backends.amqp.Connection')
     def test_false_result_during_receive_message_yield(self, connection):
         """Validate message ack is not done with yield returns False in AMQP backend"""
@@ -135,8 +194,8 @@ class TestAMQPBackend(TestCase):
         message.payload = 'test'
         get_func = MagicMock(return_value=message)
 
-        # Deep diving through context managers to patch get call
-        connection.return_value.__enter__.return_value.SimpleQueue.return_value.get = get_func
+        # Patch get call of the long-lived consumer
+        connection.return_value.SimpleQueue.return_value.get = get_func
 
         backend = AMQPMessagingBackend()
 
@@ -148,6 +207,86 @@ class TestAMQPBackend(TestCase):
             pass
 
         message.ack.assert_not_called()
+        message.requeue.assert_called()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_receive_message_batch(self, connection):
+        """Validate each message in a batch is acked or requeued by its result via AMQP backend"""
+
+        message1 = MagicMock(payload={'type': 'echo', 'body': '1'})
+        message2 = MagicMock(payload={'type': 'echo', 'body': '2'})
+        get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
+
+        # Patch get call of the long-lived consumer
+        connection.return_value.SimpleQueue.return_value.get = get_func
+
+        backend = AMQPMessagingBackend()
+        generator = backend.receive_message_batch(5)
+        results = generator.next()
+        with self.assertRaises(StopIteration):
+            generator.send([True, False])
+
+        self.assertEqual(results, [message1.payload, message2.payload])
+        message1.ack.assert_called()
+        message1.requeue.assert_not_called()
+        message2.ack.assert_not_called()
+        message2.requeue.assert_called()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_receive_messages_closed_early(self, connection):
+        """Validate the in-flight and failed messages are requeued when the generator is closed early in AMQP backend"""
+
+        message1 = MagicMock(payload={'type': 'echo', 'body': '1'})
+        message2 = MagicMock(payload={'type': 'echo', 'body': '2'})
+        message3 = MagicMock(payload={'type': 'echo', 'body': '3'})
+        get_func = MagicMock(side_effect=[message1, message2, message3, Queue.Empty])
+
+        # Patch get call of the long-lived consumer
+        connection.return_value.SimpleQueue.return_value.get = get_func
+
+        backend = AMQPMessagingBackend()
+        generator = backend.receive_messages(5)
+        generator.next()
+        generator.send(False)
+        generator.close()
+
+        message1.ack.assert_not_called()
+        message1.requeue.assert_called_once()
+        message2.ack.assert_not_called()
+        message2.requeue.assert_called_once()
+        self.assertEqual(get_func.call_count, 2)
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_receive_message_batch_error(self, connection):
+        """Validate the received messages are requeued when an error is raised into the generator in AMQP backend"""
+
+        message1 = MagicMock(payload={'type': 'echo', 'body': '1'})
+        message2 = MagicMock(payload={'type': 'echo', 'body': '2'})
+        get_func = MagicMock(side_effect=[message1, message2, Queue.Empty])
+
+        # Patch get call of the long-lived consumer
+        connection.return_value.SimpleQueue.return_value.get = get_func
+
+        backend = AMQPMessagingBackend()
+        generator = backend.receive_message_batch(5)
+        generator.next()
+        with self.assertRaises(ValueError):
+            generator.throw(ValueError('test'))
+
+        message1.ack.assert_not_called()
+        message1.requeue.assert_called_once()
+        message2.ack.assert_not_called()
+        message2.requeue.assert_called_once()
+
+    @patch('messaging.backends.amqp.Connection')
+    def test_get_queue_size(self, connection):
+        """Validate queue size is retrieved via a pooled connection in AMQP backend"""
+
+        backend = AMQPMessagingBackend()
+        backend._queue = MagicMock()
+        backend._queue.return_value.queue_declare.return_value = ('scale-command-messages', 5, 1)
+
+        self.assertEqual(backend.get_queue_size(), 5)
 
 
 class TestBackendsFactory(TestCase):
@@ -303,3 +442,23 @@ class TestSQSBackend(TestCase):
 
         self.assertEquals(results, [value])
         message.delete.assert_not_called()
+
+    @patch('messaging.backends.sqs.SQSClient')
+    def test_receive_message_batch(self, client):
+        """Validate each message in a batch is deleted by its result via SQS backend"""
+
+        message1 = MagicMock(body=json.dumps({'type': 'echo', 'body': '1'}))
+        message2 = MagicMock(body=json.dumps({'type': 'echo', 'body': '2'}))
+        get_func = MagicMock(return_value=[message1, message2])
+
+        client.return_value.__enter__.return_value.receive_messages = get_func
+
+        backend = SQSMessagingBackend()
+        generator = backend.receive_message_batch(5)
+        results = generator.next()
+        with self.assertRaises(StopIteration):
+            generator.send([False, True])
+
+        self.assertEqual(len(results), 2)
+        message1.delete.assert_not_called()
+        message2.delete.assert_called()
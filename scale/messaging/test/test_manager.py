@@ -4,13 +4,20 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import django
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
 from mock import MagicMock
 from mock import call, patch
 
+from job.messages.completed_jobs import CompletedJob, CompletedJobs
+from job.messages.failed_jobs import FailedJob, FailedJobs
+from job.messages.running_jobs import RunningJobs
 from messaging.exceptions import CommandMessageExecuteFailure, InvalidCommandMessage
 from messaging.manager import CommandMessageManager
 from messaging.messages.message import CommandMessage
+from queue.messages.queued_jobs import QueuedJobs
+from queue.messages.requeue_jobs import RequeueJobs
+from recipe.messages.update_recipe import create_update_recipe_message
 
 
 class TestCommandMessageManager(TestCase):
@@ -95,6 +102,102 @@ class TestCommandMessageManager(TestCase):
         process_message.assert_has_calls(calls)
         self.assertEquals(process_message.call_count, 10)
 
+    @override_settings(MESSAGE_WORKER_THREADS=4)
+    def test_receive_messages_concurrently(self):
+        """Validate receive_messages processes a batch on the worker pool and passes back the result of each message"""
+
+        messages = [{'type': 'test', 'body': {'job_id': 1}}, {'type': 'fail', 'body': {'job_id': 2}},
+                    {'type': 'test', 'body': {'job_ids': [1, 3]}}]
+        successes = []
+
+        def gen():
+            results = yield messages
+            successes.extend(results)
+
+        def process_message(message):
+            if message['type'] == 'fail':
+                raise CommandMessageExecuteFailure
+
+        manager = CommandMessageManager()
+        manager._backend = MagicMock()
+        manager._backend.receive_message_batch = MagicMock(return_value=gen())
+        manager._process_message = MagicMock(side_effect=process_message)
+        manager.receive_messages()
+
+        self.assertEqual(successes, [True, False, True])
+        self.assertEquals(manager._process_message.call_count, 3)
+        self.assertFalse(manager._backend.receive_messages.called)
+
+    @override_settings(MESSAGE_WORKER_THREADS=4)
+    def test_receive_messages_concurrently_unexpected_error(self):
+        """Validate an unexpected error in one group of messages does not affect the results of the other groups"""
+
+        messages = [{'type': 'test', 'body': {'job_id': 1}}, {'type': 'error', 'body': {'job_id': 2}},
+                    {'type': 'test', 'body': {'job_id': 2}}, {'type': 'test', 'body': {'job_id': 3}}]
+        successes = []
+
+        def gen():
+            results = yield messages
+            successes.extend(results)
+
+        def process_message(message):
+            if message['type'] == 'error':
+                raise ValueError
+
+        def get_serialization_keys(message):
+            return {('job', message['body']['job_id'])}
+
+        manager = CommandMessageManager()
+        manager._backend = MagicMock()
+        manager._backend.receive_message_batch = MagicMock(return_value=gen())
+        manager._process_message = MagicMock(side_effect=process_message)
+        with patch('messaging.manager.CommandMessageManager._get_serialization_keys',
+                   side_effect=get_serialization_keys):
+            manager.receive_messages()
+
+        self.assertEqual(successes, [True, False, False, True])
+        self.assertEquals(manager._process_message.call_count, 3)
+
+    def test_group_messages(self):
+        """Validate messages changing the same jobs or recipes are grouped in the order they were received"""
+
+        when = now()
+        running_jobs = RunningJobs(when)
+        running_jobs.add_running_job(1, 1, 1)
+        completed_jobs = CompletedJobs()
+        completed_jobs.ended = when
+        completed_jobs.add_completed_job(CompletedJob(1, 1))
+        failed_jobs = FailedJobs()
+        failed_jobs.ended = when
+        failed_jobs.add_failed_job(FailedJob(2, 1, 1))
+        queued_jobs = QueuedJobs()
+        queued_jobs.add_job(2, 1)
+        queued_jobs.add_job(3, 1)
+        requeue_jobs = RequeueJobs()
+        requeue_jobs.add_job(4, 1)
+        commands = [running_jobs, create_update_recipe_message(5), completed_jobs, failed_jobs, queued_jobs,
+                    requeue_jobs]
+        messages = [{'type': command.type, 'body': command.to_json()} for command in commands]
+
+        groups = CommandMessageManager._group_messages(messages)
+
+        self.assertEqual(groups, [[0, 2], [1], [3, 4], [5]])
+
+    def test_get_serialization_keys(self):
+        """Validate the job and recipe IDs changed by a message are reported by the message itself"""
+
+        failed_jobs = FailedJobs()
+        failed_jobs.ended = now()
+        failed_jobs.add_failed_job(FailedJob(1, 1, 1))
+        failed_jobs.add_failed_job(FailedJob(2, 1, 2))
+        message = {'type': failed_jobs.type, 'body': failed_jobs.to_json()}
+
+        keys = CommandMessageManager._get_serialization_keys(message)
+        self.assertSetEqual(keys, {('job', 1), ('job', 2)})
+
+        message = {'type': 'unknown', 'body': {'job_id': 1}}
+        self.assertSetEqual(CommandMessageManager._get_serialization_keys(message), set())
+
     @patch('messaging.manager.CommandMessageManager._extract_command')
     @patch('messaging.manager.CommandMessageManager._send_downstream')
     def test_successful_process_message(self, send_downstream, extract_command):
@@ -151,13 +254,33 @@ class TestCommandMessageManager(TestCase):
     def test_successful_send_downstream(self, send_messages):
         """Validate call of send_message for each downstream message"""
 
-        messages = ['one', 'two']
+        messages = [MagicMock(type='one'), MagicMock(type='two')]
 
         manager = CommandMessageManager()
         manager._send_downstream(messages)
 
         send_messages.assert_called_with(messages)
 
+    @patch('messaging.manager.CommandMessageManager.send_messages')
+    def test_coalesced_send_downstream(self, send_messages):
+        """Validate compatible downstream messages of the same type are coalesced before being sent"""
+
+        message_1 = MagicMock(type='one')
+        message_1.coalesce.return_value = True
+        message_2 = MagicMock(type='two')
+        message_2.coalesce.return_value = False
+        message_3 = MagicMock(type='one')
+        message_4 = MagicMock(type='two')
+
+        manager = CommandMessageManager()
+        num_in, num_out = manager.get_coalesce_counts()
+        manager._send_downstream([message_1, message_2, message_3, message_4])
+
+        send_messages.assert_called_with([message_1, message_2, message_4])
+        message_1.coalesce.assert_called_once_with(message_3)
+        message_2.coalesce.assert_called_once_with(message_4)
+        self.assertTupleEqual(manager.get_coalesce_counts(), (num_in + 4, num_out + 3))
+
     @patch('messaging.manager.CommandMessageManager.send_messages')
     def test_no_message_send_downstream(self, send_messages):
         """Validate send_message is not called when messages is empty"""
@@ -17,7 +17,8 @@ logger = logging.getLogger(__name__)
 
 
 class DailyMetricsProcessor(ClockEventProcessor):
-    """This class schedules daily metrics jobs on the cluster."""
+    """This class schedules daily metrics jobs on the cluster. Each job recalculates an entire day of metrics, which
+    reconciles the hourly metrics that were incrementally updated during that day."""
 
     def process_event(self, event, last_event=None):
         """See :meth:`job.clock.ClockEventProcessor.process_event`.
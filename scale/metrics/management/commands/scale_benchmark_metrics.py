@@ -0,0 +1,172 @@
+"""Defines the command that benchmarks calculating job type metrics for a generated day of data"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import datetime
+import logging
+import random
+import time
+
+import django.utils.timezone as timezone
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from job.models import Job, JobExecution, JobExecutionEnd, JobType, JobTypeRevision
+from metrics.models import MetricsJobType
+from util.parse import datetime_to_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command that generates a day of finished jobs, calculates the job type metrics for that day using grouped SQL and
+    a per-row scan like the previous implementation, and reports how long each took. The generated data is rolled back
+    when the command completes.
+    """
+
+    help = 'Benchmarks calculating job type metrics for a generated day of data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-j', '--jobs', action='store', type=int, default=100000,
+                            help='Number of generated finished jobs.')
+        parser.add_argument('-t', '--job-types', action='store', type=int, default=10, dest='job_types',
+                            help='Maximum number of existing job types to generate jobs for.')
+        parser.add_argument('-d', '--day', action='store', default='2000-01-01',
+                            help='The ISO 8601 date to generate jobs for, should not have any real jobs.')
+        parser.add_argument('-s', '--seed', action='store', type=int, default=1,
+                            help='Random seed for generating the jobs.')
+
+    def handle(self, *args, **options):
+        """See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the command.
+        """
+
+        logger.info('Command starting: scale_benchmark_metrics')
+
+        day = parse_date(options.get('day'))
+        revisions = []
+        for job_type in JobType.objects.all().order_by('id')[:options.get('job_types')]:
+            revisions.append(JobTypeRevision.objects.get(job_type_id=job_type.id, revision_num=job_type.revision_num))
+        if not revisions:
+            logger.error('At least one job type is required')
+            return
+
+        with transaction.atomic():
+            self._generate_jobs(day, revisions, options.get('jobs'), random.Random(options.get('seed')))
+
+            started = time.time()
+            scan_counts, scan_job_times = self._scan(day)
+            scan_duration = time.time() - started
+
+            started = time.time()
+            MetricsJobType.objects.calculate(day)
+            sql_duration = time.time() - started
+
+            day_started = self._get_started(day)
+            entries = MetricsJobType.objects.filter(occurred__gte=day_started,
+                                                    occurred__lt=day_started + datetime.timedelta(days=1))
+            entries = list(entries)
+            sql_counts = {(entry.job_type_id, entry.occurred): entry.total_count for entry in entries}
+            sql_job_times = {(entry.job_type_id, entry.occurred): entry.job_time_sum for entry in entries
+                             if entry.job_time_sum is not None}
+
+            logger.info('Calculated %d metrics entries for %d jobs', len(sql_counts), options.get('jobs'))
+            logger.info('Per-row scan took %.3f seconds', scan_duration)
+            logger.info('Grouped SQL took %.3f seconds', sql_duration)
+            if scan_counts != sql_counts or scan_job_times != sql_job_times:
+                logger.error('Grouped SQL calculated different metrics than the per-row scan')
+
+            # Discard the generated data
+            transaction.set_rollback(True)
+
+        logger.info('Command completed: scale_benchmark_metrics')
+
+    def _generate_jobs(self, day, revisions, num_jobs, rand):
+        """Generates finished jobs, each with a single job execution, that ended on the given day
+
+        :param day: The day
+        :type day: :class:`datetime.date`
+        :param revisions: The job type revisions to generate jobs for
+        :type revisions: [:class:`job.models.JobTypeRevision`]
+        :param num_jobs: The number of jobs to generate
+        :type num_jobs: int
+        :param rand: The random number generator
+        :type rand: :class:`random.Random`
+        """
+
+        day_started = self._get_started(day)
+        jobs = []
+        for _ in range(num_jobs):
+            revision = rand.choice(revisions)
+            ended = day_started + datetime.timedelta(seconds=rand.randint(0, 86399))
+            jobs.append(Job(job_type_id=revision.job_type_id, job_type_rev=revision, max_tries=3, num_exes=1,
+                            status=rand.choice(['COMPLETED', 'COMPLETED', 'COMPLETED', 'FAILED', 'CANCELED']),
+                            queued=ended - datetime.timedelta(seconds=rand.randint(60, 3600)), ended=ended))
+        Job.objects.bulk_create(jobs, batch_size=1000)
+
+        job_exes = [JobExecution(job=job, job_type_id=job.job_type_id, exe_num=1, timeout=3600, queued=job.queued,
+                                 started=job.queued + datetime.timedelta(seconds=rand.randint(0, 60)))
+                    for job in jobs]
+        JobExecution.objects.bulk_create(job_exes, batch_size=1000)
+
+        job_exe_ends = []
+        for job, job_exe in zip(jobs, job_exes):
+            main_started = job_exe.started + datetime.timedelta(seconds=rand.randint(0, 30))
+            main_ended = min(main_started + datetime.timedelta(seconds=rand.randint(0, 1800)), job.ended)
+            task_results = {'version': '1.0',
+                            'tasks': [{'task_id': '%d_main' % job.id, 'type': 'main', 'was_launched': True,
+                                       'started': datetime_to_string(main_started),
+                                       'ended': datetime_to_string(main_ended)}]}
+            job_exe_ends.append(JobExecutionEnd(job_exe=job_exe, job=job, job_type_id=job.job_type_id, exe_num=1,
+                                                task_results=task_results,
+                                                status='COMPLETED' if job.status == 'COMPLETED' else 'FAILED',
+                                                queued=job_exe.queued, started=job_exe.started, ended=job.ended))
+        JobExecutionEnd.objects.bulk_create(job_exe_ends, batch_size=1000)
+
+    def _get_started(self, day):
+        """Returns the start of the given day
+
+        :param day: The day
+        :type day: :class:`datetime.date`
+        :returns: The start of the day
+        :rtype: :class:`datetime.datetime`
+        """
+
+        return datetime.datetime.combine(day, datetime.time.min).replace(tzinfo=timezone.utc)
+
+    def _scan(self, day):
+        """Counts the finished jobs of the given day grouped by job type and hour by iterating over every job and
+        completed job execution in Python, as the previous implementation did
+
+        :param day: The day
+        :type day: :class:`datetime.date`
+        :returns: The total job counts and the sums of the job times, each stored by (job type ID, hour)
+        :rtype: (dict, dict)
+        """
+
+        started = self._get_started(day)
+        ended = datetime.datetime.combine(day, datetime.time.max).replace(tzinfo=timezone.utc)
+
+        counts = {}
+        jobs = Job.objects.filter(status__in=['CANCELED', 'COMPLETED', 'FAILED'], ended__gte=started, ended__lte=ended)
+        jobs = jobs.select_related('job_type', 'error').defer('input', 'output')
+        for job in jobs.iterator():
+            key = (job.job_type_id, job.ended.replace(minute=0, second=0, microsecond=0))
+            counts[key] = counts.get(key, 0) + 1
+
+        # The previous implementation loaded each execution's job individually and parsed its task results in Python
+        job_times = {}
+        job_exe_ends = JobExecutionEnd.objects.filter(status='COMPLETED', job__ended__gte=started,
+                                                      job__ended__lte=ended)
+        for job_exe_end in job_exe_ends.iterator():
+            job = Job.objects.get(pk=job_exe_end.job_id)
+            key = (job.job_type_id, job.ended.replace(minute=0, second=0, microsecond=0))
+            job_time = job_exe_end.get_task_results().get_task_run_length('main')
+            if job_time is not None:
+                job_times[key] = job_times.get(key, 0) + int(job_time.total_seconds())
+
+        return counts, job_times
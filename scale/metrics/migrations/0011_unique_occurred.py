@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metrics', '0010_occurred_datetime'),
+    ]
+
+    operations = [
+        # Remove any duplicate hourly entries, keeping the most recent one, before adding the unique constraints
+        migrations.RunSQL(
+            sql='DELETE FROM metrics_error a USING metrics_error b '
+                'WHERE a.error_id = b.error_id AND a.occurred = b.occurred AND a.id < b.id',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql='DELETE FROM metrics_ingest a USING metrics_ingest b '
+                'WHERE a.strike_id = b.strike_id AND a.occurred = b.occurred AND a.id < b.id',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            sql='DELETE FROM metrics_job_type a USING metrics_job_type b '
+                'WHERE a.job_type_id = b.job_type_id AND a.occurred = b.occurred AND a.id < b.id',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterUniqueTogether(
+            name='metricserror',
+            unique_together=set([('error', 'occurred')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='metricsingest',
+            unique_together=set([('strike', 'occurred')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='metricsjobtype',
+            unique_together=set([('job_type', 'occurred')]),
+        ),
+    ]
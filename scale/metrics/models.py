@@ -7,10 +7,13 @@ import sys
 
 import django.contrib.gis.db.models as models
 import django.utils.timezone as timezone
-from django.db import transaction
+from django.conf import settings
+from django.db import connection, transaction, IntegrityError
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest, Least
 
 from error.models import Error
-from job.models import Job, JobExecutionEnd, JobType
+from job.models import JobExecutionEnd, JobType
 from ingest.models import Ingest, Strike
 from metrics.registry import MetricsPlotData, MetricsType, MetricsTypeGroup, MetricsTypeFilter
 
@@ -67,6 +70,72 @@ class PlotIntegerField(models.IntegerField):
 PLOT_FIELD_TYPES = [PlotBigIntegerField, PlotIntegerField]
 
 
+@transaction.atomic
+def _increment_entries(model, choice_field, occurred, entry_values, count_field=None):
+    """Adds the given values to the hourly metrics entries of the given model, creating any entries that do not exist
+    yet. Each value is applied based on the aggregate of its plot field: sum fields are incremented while min and max
+    fields keep the smaller or larger value. If a count field is given, each avg field whose sum field is included is
+    recalculated as the new sum divided by the new count. New entries start with every count field at zero, matching the
+    entries created when the daily metrics are calculated. Nothing is done if incremental metrics are disabled.
+
+    :param model: The metrics model class
+    :type model: class
+    :param choice_field: The name of the field with the ID of the metrics choice, such as job_type_id
+    :type choice_field: string
+    :param occurred: When the metrics occurred, the entry is for the hour containing this time
+    :type occurred: :class:`datetime.datetime`
+    :param entry_values: The values to add stored by choice ID, each a dict of field name to value
+    :type entry_values: dict
+    :param count_field: The name of the count field the avg fields are based on, possibly None
+    :type count_field: string
+    """
+
+    if not settings.METRICS_INCREMENTAL:
+        return
+
+    occurred = occurred.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    fields = {field.name: field for field in model._meta.get_fields()}
+    count_names = [count_field_name for count_field_name in fields if count_field_name.endswith('_count') and
+                   getattr(fields[count_field_name], 'aggregate', None) == 'sum']
+
+    # Update the entries in a consistent order to avoid deadlocks between concurrent updates
+    for choice_id in sorted(entry_values):
+        values = entry_values[choice_id]
+        updates = {}
+        for name, value in values.items():
+            aggregate = fields[name].aggregate
+            if aggregate == 'min':
+                updates[name] = Least(Coalesce(F(name), value), value)
+            elif aggregate == 'max':
+                updates[name] = Greatest(Coalesce(F(name), value), value)
+            else:
+                updates[name] = Coalesce(F(name), 0) + value
+        avg_fields = {}
+        if count_field:
+            for field in fields.values():
+                sum_name = '%s_sum' % getattr(field, 'group', None)
+                if getattr(field, 'aggregate', None) == 'avg' and sum_name in values:
+                    avg_fields[field.name] = sum_name
+                    updates[field.name] = updates[sum_name] / updates[count_field]
+
+        entries = model.objects.filter(occurred=occurred, **{choice_field: choice_id})
+        if entries.update(**updates):
+            continue
+        try:
+            # Use a savepoint so that a concurrent insert of the same entry only rolls back this insert
+            with transaction.atomic():
+                entry = model(occurred=occurred, created=timezone.now(), **{choice_field: choice_id})
+                for name in count_names:
+                    setattr(entry, name, 0)
+                for name, value in values.items():
+                    setattr(entry, name, value)
+                for avg_name, sum_name in avg_fields.items():
+                    setattr(entry, avg_name, values[sum_name] // values[count_field])
+                entry.save()
+        except IntegrityError:
+            entries.update(**updates)
+
+
 class MetricsErrorManager(models.Manager):
     """Provides additional methods for computing daily error metrics."""
 
@@ -97,9 +166,26 @@ class MetricsErrorManager(models.Manager):
             entry.total_count += 1
 
         # Save the new metrics to the database
-        for entry in entry_map:
-            for entry_time in entry_map[entry]:
-                self._replace_entries(entry_time, entry, [entry_map[entry][entry_time]])
+        entries = [time_entry for time_map in entry_map.values() for time_entry in time_map.values()]
+        self._replace_entries(started, ended, entries)
+
+    def add_failed_job_exes(self, error_counts, when):
+        """Adds job executions that failed with the given errors to the hourly metrics, which are reconciled when the
+        daily metrics are calculated. Only built-in errors are included in the metrics.
+
+        :param error_counts: The number of failed job executions stored by the error that caused the failures
+        :type error_counts: dict
+        :param when: When the job executions failed
+        :type when: :class:`datetime.datetime`
+        """
+
+        entry_values = {}
+        for error, count in error_counts.items():
+            if error.is_builtin and count:
+                entry_values[error.id] = {'total_count': count}
+
+        if entry_values:
+            _increment_entries(MetricsError, 'error_id', when, entry_values)
 
     def get_metrics_type(self, include_choices=False):
         """See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`."""
@@ -129,24 +215,24 @@ class MetricsErrorManager(models.Manager):
             entries = entries.filter(error_id__in=choice_ids)
         if not columns:
             columns = self.get_metrics_type().columns
-        column_names = [c.name for c in columns]
-        entries = entries.values('error_id', 'occurred', *column_names)
 
         # Convert the database models to plot models
         return MetricsPlotData.create(entries, 'occurred', 'error_id', choice_ids, columns)
 
     @transaction.atomic
-    def _replace_entries(self, date, error, entries):
-        """Replaces all the existing metric entries for the given date with new ones.
+    def _replace_entries(self, started, ended, entries):
+        """Replaces all the existing metric entries within the given range with new ones.
 
-        :param date: The date when job executions associated with the metrics ended.
-        :type date: datetime.date
+        :param started: The start of the range
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the range
+        :type ended: :class:`datetime.datetime`
         :param entries: The new metrics model to save.
         :type entries: list[:class:`metrics.models.MetricsError`]
         """
 
         # Delete all the previous metrics entries
-        MetricsError.objects.filter(occurred=date, error=error).delete()
+        MetricsError.objects.filter(occurred__gte=started, occurred__lte=ended).delete()
 
         # Save all the new metrics models
         MetricsError.objects.bulk_create(entries)
@@ -184,6 +270,7 @@ class MetricsError(models.Model):
     class Meta(object):
         """meta information for the db"""
         db_table = 'metrics_error'
+        unique_together = ('error', 'occurred')
 
 
 class MetricsIngestManager(models.Manager):
@@ -221,9 +308,38 @@ class MetricsIngestManager(models.Manager):
             self._update_metrics(entry_datetime, ingest, entry)
 
         # Save the new metrics to the database
-        for entry in entry_map:
-            for entry_time in entry_map[entry]:
-                self._replace_entries(entry_time, entry, [entry_map[entry][entry_time]])
+        entries = [time_entry for time_map in entry_map.values() for time_entry in time_map.values()]
+        self._replace_entries(started, ended, entries)
+
+    def add_ingested(self, ingest):
+        """Adds the given INGESTED ingest to the hourly metrics, which are reconciled when the daily metrics are
+        calculated. Until then, the average statistics assume every ingested file has a size and transfer times.
+
+        :param ingest: The ingest that was INGESTED
+        :type ingest: :class:`ingest.models.Ingest`
+        """
+
+        if not ingest.strike_id or ingest.status != 'INGESTED' or not ingest.ingest_ended:
+            return
+
+        values = {'ingested_count': 1, 'total_count': 1}
+        if ingest.file_size:
+            values['file_size_sum'] = ingest.file_size
+            values['file_size_min'] = ingest.file_size
+            values['file_size_max'] = ingest.file_size
+        if ingest.transfer_started and ingest.transfer_ended:
+            transfer_secs = int(max((ingest.transfer_ended - ingest.transfer_started).total_seconds(), 0))
+            values['transfer_time_sum'] = transfer_secs
+            values['transfer_time_min'] = transfer_secs
+            values['transfer_time_max'] = transfer_secs
+        if ingest.ingest_started:
+            ingest_secs = int(max((ingest.ingest_ended - ingest.ingest_started).total_seconds(), 0))
+            values['ingest_time_sum'] = ingest_secs
+            values['ingest_time_min'] = ingest_secs
+            values['ingest_time_max'] = ingest_secs
+
+        _increment_entries(MetricsIngest, 'strike_id', ingest.ingest_ended, {ingest.strike_id: values},
+                           count_field='ingested_count')
 
     def get_metrics_type(self, include_choices=False):
         """See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`."""
@@ -253,8 +369,6 @@ class MetricsIngestManager(models.Manager):
             entries = entries.filter(strike_id__in=choice_ids)
         if not columns:
             columns = self.get_metrics_type().columns
-        column_names = [c.name for c in columns]
-        entries = entries.values('strike_id', 'occurred', *column_names)
 
         # Convert the database models to plot models
         return MetricsPlotData.create(entries, 'occurred', 'strike_id', choice_ids, columns)
@@ -311,17 +425,19 @@ class MetricsIngestManager(models.Manager):
         return entry
 
     @transaction.atomic
-    def _replace_entries(self, date, strike, entries):
-        """Replaces all the existing metric entries for the given date with new ones.
+    def _replace_entries(self, started, ended, entries):
+        """Replaces all the existing metric entries within the given range with new ones.
 
-        :param date: The date when ingests associated with the metrics ended.
-        :type date: datetime.date
+        :param started: The start of the range
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the range
+        :type ended: :class:`datetime.datetime`
         :param entries: The new metrics model to save.
         :type entries: list[:class:`metrics.models.MetricsIngest`]
         """
 
         # Delete all the previous metrics entries
-        MetricsIngest.objects.filter(occurred=date, strike=strike).delete()
+        MetricsIngest.objects.filter(occurred__gte=started, occurred__lte=ended).delete()
 
         # Save all the new metrics models
         MetricsIngest.objects.bulk_create(entries)
@@ -446,56 +562,71 @@ class MetricsIngest(models.Model):
     class Meta(object):
         """meta information for the db"""
         db_table = 'metrics_ingest'
+        unique_together = ('strike', 'occurred')
 
 
 class MetricsJobTypeManager(models.Manager):
     """Provides additional methods for computing daily job type metrics."""
 
+    # The prefixes of the execution time metrics fields, each of which has a sum, min, max, and avg field
+    TIME_PREFIXES = ['queue_time', 'pre_time', 'job_time', 'post_time', 'run_time', 'stage_time']
+
     def calculate(self, date):
         """See :meth:`metrics.registry.MetricsTypeProvider.calculate`."""
         started = datetime.datetime.combine(date, datetime.time.min).replace(tzinfo=timezone.utc)
         ended = datetime.datetime.combine(date, datetime.time.max).replace(tzinfo=timezone.utc)
 
-        # Fetch all the jobs relevant for metrics
-        jobs = Job.objects.filter(status__in=['CANCELED', 'COMPLETED', 'FAILED'], ended__gte=started, ended__lte=ended)
-        jobs = jobs.select_related('job_type', 'error').defer('input', 'output')
-
-        # Calculate the overall counts based on job status
+        # Calculate the overall counts based on job status, grouped by job type and the hour when the jobs ended
         entry_map = {}
-        for job in jobs.iterator():
-            occurred_datetime = job.ended if job.ended else date
-            entry_date_time = datetime.datetime(occurred_datetime.year, occurred_datetime.month, occurred_datetime.day,
-                                                occurred_datetime.hour, tzinfo=timezone.utc)
-            if job.job_type not in entry_map:
-                entry_map[job.job_type] = {}
-
-            if entry_date_time not in entry_map[job.job_type]:
-                entry = MetricsJobType(job_type=job.job_type, occurred=entry_date_time, created=timezone.now())
-                entry.completed_count = 0
-                entry.failed_count = 0
-                entry.canceled_count = 0
-                entry.total_count = 0
-                entry.error_system_count = 0
-                entry.error_data_count = 0
-                entry.error_algorithm_count = 0
-                entry_map[job.job_type][entry_date_time] = entry
-            entry = entry_map[job.job_type][entry_date_time]
-            self._update_counts(occurred_datetime, job, entry)
-
-        # Fetch all the completed job executions for the requested day
-        job_exe_ends = JobExecutionEnd.objects.filter(status__in=['COMPLETED'], ended__gte=started, ended__lte=ended)
-        job_exe_ends = job_exe_ends.select_related('job_type')
-
-        # Calculate the metrics per job execution grouped by job type
-        for job_exe_end in job_exe_ends.iterator():
-            entry = entry_map[job_exe_end.job.job_type]
-            for entry_time in entry:
-                self._update_times(entry_time, job_exe_end, entry[entry_time])
+        for row in self._query_counts(started, ended):
+            entry = self._get_entry(entry_map, row['job_type_id'], row['occurred'])
+            entry.completed_count = int(row['completed_count'])
+            entry.failed_count = int(row['failed_count'])
+            entry.canceled_count = int(row['canceled_count'])
+            entry.total_count = int(row['total_count'])
+            entry.error_system_count = int(row['error_system_count'])
+            entry.error_data_count = int(row['error_data_count'])
+            entry.error_algorithm_count = int(row['error_algorithm_count'])
+
+        # Calculate the times of the completed job executions, grouped the same way as the counts
+        for row in self._query_times(started, ended):
+            entry = self._get_entry(entry_map, row['job_type_id'], row['occurred'])
+            for prefix in self.TIME_PREFIXES:
+                if row[prefix + '_sum'] is not None:
+                    for aggregate in ['sum', 'min', 'max', 'avg']:
+                        field_name = '%s_%s' % (prefix, aggregate)
+                        setattr(entry, field_name, int(row[field_name]))
 
         # Save the new metrics to the database
-        for entry in entry_map:
-            for entry_time in entry_map[entry]:
-                self._replace_entries(entry_time, entry, [entry_map[entry][entry_time]])
+        self._replace_entries(started, ended, entry_map.values())
+
+    def add_ended_jobs(self, jobs, status, when, errors=None):
+        """Adds the given jobs that ended with the given status to the hourly metrics, which are reconciled when the
+        daily metrics are calculated. The execution time statistics are only calculated by the reconciliation.
+
+        :param jobs: The jobs that ended
+        :type jobs: [:class:`job.models.Job`]
+        :param status: The final status of the jobs, either COMPLETED, FAILED, or CANCELED
+        :type status: string
+        :param when: When the jobs ended
+        :type when: :class:`datetime.datetime`
+        :param errors: The errors that caused the jobs to fail stored by job ID, possibly None
+        :type errors: dict
+        """
+
+        entry_values = {}
+        for job in jobs:
+            count_fields = ['%s_count' % status.lower(), 'total_count']
+            error = errors.get(job.id) if errors else None
+            if error and error.category in ['SYSTEM', 'DATA', 'ALGORITHM']:
+                count_fields.append('error_%s_count' % error.category.lower())
+
+            values = entry_values.setdefault(job.job_type_id, {})
+            for field_name in count_fields:
+                values[field_name] = values.get(field_name, 0) + 1
+
+        if entry_values:
+            _increment_entries(MetricsJobType, 'job_type_id', when, entry_values)
 
     def get_metrics_type(self, include_choices=False):
         """See :meth:`metrics.registry.MetricsTypeProvider.get_metrics_type`."""
@@ -525,135 +656,140 @@ class MetricsJobTypeManager(models.Manager):
             entries = entries.filter(job_type_id__in=choice_ids)
         if not columns:
             columns = self.get_metrics_type().columns
-        column_names = [c.name for c in columns]
-        entries = entries.values('job_type_id', 'occurred', *column_names)
         # Convert the database models to plot models
         return MetricsPlotData.create(entries, 'occurred', 'job_type_id', choice_ids, columns)
 
-    def _update_counts(self, date, job, entry):
-        """Updates the metrics model attributes for a single job.
-
-        :param date: The date when jobs associated with the metrics ended.
-        :type date: datetime.date
-        :param job: The job from which to derive statistics.
-        :type job: :class:`job.models.Job`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsJobType`
+    def _get_entry(self, entry_map, job_type_id, occurred):
+        """Returns the metrics model for the given job type and hour, creating it with zero counts if needed.
+
+        :param entry_map: The metrics models stored by (job type ID, hour)
+        :type entry_map: dict
+        :param job_type_id: The ID of the job type
+        :type job_type_id: int
+        :param occurred: The hour when the jobs associated with the metrics ended, without a time zone
+        :type occurred: :class:`datetime.datetime`
+        :returns: The metrics model
+        :rtype: :class:`metrics.models.MetricsJobType`
         """
-        if job.status == 'COMPLETED':
-            entry.completed_count += 1
-            entry.total_count += 1
-        elif job.status == 'FAILED':
-            entry.failed_count += 1
-            entry.total_count += 1
-        elif job.status == 'CANCELED':
-            entry.canceled_count += 1
-            entry.total_count += 1
 
-        if job.error:
-            if job.error.category == 'SYSTEM':
-                entry.error_system_count += 1
-            elif job.error.category == 'DATA':
-                entry.error_data_count += 1
-            elif job.error.category == 'ALGORITHM':
-                entry.error_algorithm_count += 1
+        occurred = occurred.replace(tzinfo=timezone.utc)
+        key = (job_type_id, occurred)
+        if key not in entry_map:
+            entry = MetricsJobType(job_type_id=job_type_id, occurred=occurred, created=timezone.now())
+            entry.completed_count = 0
+            entry.failed_count = 0
+            entry.canceled_count = 0
+            entry.total_count = 0
+            entry.error_system_count = 0
+            entry.error_data_count = 0
+            entry.error_algorithm_count = 0
+            entry_map[key] = entry
+        return entry_map[key]
+
+    def _query_counts(self, started, ended):
+        """Queries the job status and error counts for the jobs that ended within the given range, grouped by job type
+        and the hour when the jobs ended.
+
+        :param started: The start of the range
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the range
+        :type ended: :class:`datetime.datetime`
+        :returns: The list of rows as dicts
+        :rtype: [dict]
+        """
 
-    def _update_times(self, date, job_exe_end, entry):
-        """Updates the metrics model attributes for a single job execution.
+        qry = "SELECT j.job_type_id, date_trunc('hour', j.ended AT TIME ZONE 'UTC') AS occurred, "
+        qry += "SUM(CASE WHEN j.status = 'COMPLETED' THEN 1 ELSE 0 END) AS completed_count, "
+        qry += "SUM(CASE WHEN j.status = 'FAILED' THEN 1 ELSE 0 END) AS failed_count, "
+        qry += "SUM(CASE WHEN j.status = 'CANCELED' THEN 1 ELSE 0 END) AS canceled_count, "
+        qry += "COUNT(*) AS total_count, "
+        qry += "SUM(CASE WHEN e.category = 'SYSTEM' THEN 1 ELSE 0 END) AS error_system_count, "
+        qry += "SUM(CASE WHEN e.category = 'DATA' THEN 1 ELSE 0 END) AS error_data_count, "
+        qry += "SUM(CASE WHEN e.category = 'ALGORITHM' THEN 1 ELSE 0 END) AS error_algorithm_count "
+        qry += "FROM job j LEFT OUTER JOIN error e ON e.id = j.error_id "
+        qry += "WHERE j.status IN ('CANCELED', 'COMPLETED', 'FAILED') AND j.ended BETWEEN %s AND %s "
+        qry += "GROUP BY 1, 2"
+
+        return self._execute_query(qry, [started, ended])
+
+    def _query_times(self, started, ended):
+        """Queries the time statistics of the completed job executions for the jobs that ended within the given range,
+        grouped by job type and the hour when the jobs ended. Negative times caused by out of sync machine clocks are
+        treated as zero.
+
+        :param started: The start of the range
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the range
+        :type ended: :class:`datetime.datetime`
+        :returns: The list of rows as dicts
+        :rtype: [dict]
+        """
 
-        :param date: The date when job executions associated with the metrics ended.
-        :type date: datetime.date
-        :param job_exe_end: The job execution from which to derive statistics.
-        :type job_exe_end: :class:`job.models.JobExecutionEnd`
-        :param entry: The metrics model to update.
-        :type entry: :class:`metrics.models.MetricsJobType`
+        task_secs = "(SELECT GREATEST(EXTRACT(EPOCH FROM "
+        task_secs += "(t->>'ended')::timestamptz - (t->>'started')::timestamptz), 0) "
+        task_secs += "FROM jsonb_array_elements(jee.task_results->'tasks') t "
+        task_secs += "WHERE t->>'type' = '%s' AND t->>'started' IS NOT NULL AND t->>'ended' IS NOT NULL LIMIT 1) "
+
+        # Seconds of each execution stage, stage time is the run time not spent within any task
+        qry = "WITH exe_secs AS (SELECT j.job_type_id, date_trunc('hour', j.ended AT TIME ZONE 'UTC') AS occurred, "
+        qry += "CASE WHEN jee.started IS NOT NULL "
+        qry += "THEN GREATEST(EXTRACT(EPOCH FROM jee.started - jee.queued), 0) END AS queue_time, "
+        qry += "CASE WHEN jee.started IS NOT NULL "
+        qry += "THEN GREATEST(EXTRACT(EPOCH FROM jee.ended - jee.started), 0) END AS run_time, "
+        qry += task_secs % 'pull' + "AS pull_time, "
+        qry += task_secs % 'pre' + "AS pre_time, "
+        qry += task_secs % 'main' + "AS job_time, "
+        qry += task_secs % 'post' + "AS post_time "
+        qry += "FROM job_exe_end jee JOIN job j ON j.id = jee.job_id "
+        qry += "WHERE jee.status = 'COMPLETED' AND j.status IN ('CANCELED', 'COMPLETED', 'FAILED') "
+        qry += "AND j.ended BETWEEN %s AND %s) "
+        qry += "SELECT job_type_id, occurred"
+        for prefix in self.TIME_PREFIXES:
+            column = prefix
+            if prefix == 'stage_time':
+                column = "GREATEST(run_time - (COALESCE(pull_time, 0) + COALESCE(pre_time, 0) + "
+                column += "COALESCE(job_time, 0) + COALESCE(post_time, 0)), 0)"
+            for aggregate in ['sum', 'min', 'max', 'avg']:
+                qry += ", %s(%s) AS %s_%s" % (aggregate.upper(), column, prefix, aggregate)
+        qry += " FROM exe_secs GROUP BY 1, 2"
+
+        return self._execute_query(qry, [started, ended])
+
+    def _execute_query(self, qry, args):
+        """Executes the given query and returns its rows as dicts.
+
+        :param qry: The query
+        :type qry: string
+        :param args: The query arguments
+        :type args: list
+        :returns: The list of rows as dicts
+        :rtype: [dict]
         """
 
-        entry_count = entry.completed_count if entry.completed_count > 0 else entry.total_count
-
-        # Update elapsed queue time metrics
-        queue_secs = None
-        if job_exe_end.queued and job_exe_end.started:
-            queue_secs = max((job_exe_end.started - job_exe_end.queued).total_seconds(), 0)
-            entry.queue_time_sum = (entry.queue_time_sum or 0) + queue_secs
-            entry.queue_time_min = min(entry.queue_time_min or sys.maxint, queue_secs)
-            entry.queue_time_max = max(entry.queue_time_max or 0, queue_secs)
-            if entry_count:
-                entry.queue_time_avg = entry.queue_time_sum / entry_count
-
-        task_results = job_exe_end.get_task_results()
-
-        pull_secs = None
-        pull_task_length = task_results.get_task_run_length('pull')
-        if pull_task_length:
-            pull_secs = max(pull_task_length.total_seconds(), 0)
-
-        # Update elapsed pre-task time metrics
-        pre_secs = None
-        pre_task_length = task_results.get_task_run_length('pre')
-        if pre_task_length:
-            pre_secs = max(pre_task_length.total_seconds(), 0)
-            entry.pre_time_sum = (entry.pre_time_sum or 0) + pre_secs
-            entry.pre_time_min = min(entry.pre_time_min or sys.maxint, pre_secs)
-            entry.pre_time_max = max(entry.pre_time_max or 0, pre_secs)
-            if entry_count:
-                entry.pre_time_avg = entry.pre_time_sum / entry_count
-
-        # Update elapsed actual job time metrics
-        job_secs = None
-        job_task_length = task_results.get_task_run_length('main')
-        if job_task_length:
-            job_secs = max(job_task_length.total_seconds(), 0)
-            entry.job_time_sum = (entry.job_time_sum or 0) + job_secs
-            entry.job_time_min = min(entry.job_time_min or sys.maxint, job_secs)
-            entry.job_time_max = max(entry.job_time_max or 0, job_secs)
-            if entry_count:
-                entry.job_time_avg = entry.job_time_sum / entry_count
-
-        # Update elapsed post-task time metrics
-        post_secs = None
-        post_task_length = task_results.get_task_run_length('post')
-        if post_task_length:
-            post_secs = max(post_task_length.total_seconds(), 0)
-            entry.post_time_sum = (entry.post_time_sum or 0) + post_secs
-            entry.post_time_min = min(entry.post_time_min or sys.maxint, post_secs)
-            entry.post_time_max = max(entry.post_time_max or 0, post_secs)
-            if entry_count:
-                entry.post_time_avg = entry.post_time_sum / entry_count
-
-        # Update elapsed overall run and stage time metrics
-        if job_exe_end.started and job_exe_end.ended:
-            run_secs = max((job_exe_end.ended - job_exe_end.started).total_seconds(), 0)
-            entry.run_time_sum = (entry.run_time_sum or 0) + run_secs
-            entry.run_time_min = min(entry.run_time_min or sys.maxint, run_secs)
-            entry.run_time_max = max(entry.run_time_max or 0, run_secs)
-            if entry_count:
-                entry.run_time_avg = entry.run_time_sum / entry_count
-
-            stage_secs = max(run_secs - ((pull_secs or 0) + (pre_secs or 0) + (job_secs or 0) + (post_secs or 0)), 0)
-            entry.stage_time_sum = (entry.stage_time_sum or 0) + stage_secs
-            entry.stage_time_min = min(entry.stage_time_min or sys.maxint, stage_secs)
-            entry.stage_time_max = max(entry.stage_time_max or 0, stage_secs)
-            if entry_count:
-                entry.stage_time_avg = entry.stage_time_sum / entry_count
-        return entry
+        with connection.cursor() as cursor:
+            cursor.execute(qry, args)
+            columns = [col[0] for col in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
 
     @transaction.atomic
-    def _replace_entries(self, date, job_type, entries):
-        """Replaces all the existing metric entries for the given date with new ones.
+    def _replace_entries(self, started, ended, entries):
+        """Replaces all the existing metric entries within the given range with new ones.
 
-        :param date: The date when job executions associated with the metrics ended.
-        :type date: datetime.date
+        :param started: The start of the range
+        :type started: :class:`datetime.datetime`
+        :param ended: The end of the range
+        :type ended: :class:`datetime.datetime`
         :param entries: The new metrics model to save.
         :type entries: list[:class:`metrics.models.MetricsJobType`]
         """
 
         # Delete all the previous metrics entries
-        MetricsJobType.objects.filter(occurred=date, job_type=job_type).delete()
+        MetricsJobType.objects.filter(occurred__gte=started, occurred__lte=ended).delete()
 
         # Save all the new metrics models
         MetricsJobType.objects.bulk_create(entries)
 
+
 class MetricsJobType(models.Model):
     """Tracks all the job execution metrics grouped by job type.
 
@@ -857,3 +993,4 @@ class MetricsJobType(models.Model):
     class Meta(object):
         """meta information for the db"""
         db_table = 'metrics_job_type'
+        unique_together = ('job_type', 'occurred')
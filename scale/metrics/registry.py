@@ -2,11 +2,14 @@
 from __future__ import unicode_literals
 
 import abc
-import datetime
+import hashlib
 import logging
-import sys
 
 import django.utils.timezone as timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import Trunc
 
 logger = logging.getLogger(__name__)
 
@@ -232,7 +235,9 @@ class MetricsPlotData(object):
 
     @classmethod
     def create(cls, query_set, date_field, choice_field, choice_ids, columns):
-        """Creates new metrics plot data records from a query set of database models.
+        """Creates new metrics plot data records from a query set of database models. All of the requested columns are
+        fetched with a single query. When no choice filters are used, the values are aggregated by hour within the
+        database instead of row by row.
 
         :param query_set: A set of database models that are being counted towards metrics.
         :type query_set: :class:`django.models.QuerySet`
@@ -248,72 +253,106 @@ class MetricsPlotData(object):
         :rtype: list[:class:`metrics.registry.MetricsPlotData`]
         """
         results = {column.name: MetricsPlotData(column=column, values=[]) for column in columns}
-        for entry in query_set.iterator():
-            for column in columns:
-                if column.name not in results:
-                    results[column.name] = MetricsPlotData(column=column, values=[])
-                MetricsPlotData._add_plot_value(results[column.name], entry, date_field, choice_field, choice_ids)
+        if choice_ids:
+            MetricsPlotData._add_choice_values(results, query_set, date_field, choice_field, columns)
+        else:
+            MetricsPlotData._add_hourly_values(results, query_set, date_field, columns)
         return results.values()
 
     @classmethod
-    def _add_plot_value(cls, plot_data, entry, date_field, choice_field, choice_ids=None):
-        """Adds metrics to an existing plot data model.
-
-        :param plot_data: The plot model to update with a new value.
-        :type plot_data: :class:`metrics.registry.MetricsPlotData`
-        :param entry: A dictionary representation of the metrics model to use as a source for adding a plot value.
-        :type entry: dict[string, object]
-        :param date_field: The name of the field within the entry dict that contains the recorded date.
+    def _add_choice_values(cls, results, query_set, date_field, choice_field, columns):
+        """Adds a plot value for every non-null column value of every entry, keeping each entry's choice.
+
+        :param results: The plot data models stored by column name
+        :type results: dict[string, :class:`metrics.registry.MetricsPlotData`]
+        :param query_set: A set of database models that are being counted towards metrics, ordered by date.
+        :type query_set: :class:`django.models.QuerySet`
+        :param date_field: The name of the field within each model that contains the recorded date.
         :type date_field: string
-        :param choice_field: The name of the field within the entry dict that contains the choice model relation.
+        :param choice_field: The name of the field within each model that contains the choice model relation.
         :type choice_field: string
-        :param choice_ids: A list of related model identifiers to query.
-        :type choice_ids: [string]
-        :returns: The plot model that was added.
-        :rtype: :class:`metrics.registry.MetricsPlotValue`
+        :param columns: A list of metrics type column definitions that should be included.
+        :type columns: list[:class:`metrics.registry.MetricsTypeColumn`]
         """
-        entry_val = entry[plot_data.column.name]
-        if entry_val is None:
-            return
-
-        # Update the bounds for the y-axis
-        plot_data.min_y = min(plot_data.min_y or sys.maxint, entry_val)
-        plot_data.max_y = max(plot_data.max_y or 0, entry_val)
-
-        # Update the bounds for the x-axis
-        entry_date = entry[date_field].replace(tzinfo=timezone.utc)
-        plot_data.min_x = min(plot_data.min_x or datetime.datetime.max.replace(tzinfo=timezone.utc), entry_date)
-        plot_data.max_x = max(plot_data.max_x or datetime.datetime.min.replace(tzinfo=timezone.utc), entry_date)
+        column_names = [column.name for column in columns]
+        rows = query_set.values_list(date_field, choice_field, *column_names)
+        for row in rows.iterator():
+            entry_date = row[0].replace(tzinfo=timezone.utc)
+            for index, column_name in enumerate(column_names, 2):
+                entry_val = row[index]
+                if entry_val is not None:
+                    plot_value = MetricsPlotValue(choice_id=row[1], datetime=entry_date, value=entry_val)
+                    results[column_name].values.append(plot_value)
+
+        for plot_data in results.values():
+            if plot_data.values:
+                plot_data.min_y = min(plot_value.value for plot_value in plot_data.values)
+                plot_data.max_y = max(plot_value.value for plot_value in plot_data.values)
+                plot_data._set_x_bounds()
 
-        # Append a new value for the given entry
-        if choice_ids:
-            plot_value = MetricsPlotValue(choice_id=entry[choice_field], datetime=entry_date, value=entry_val)
-            plot_data.values.append(plot_value)
-            return plot_value
-
-        # Aggregate values across entries when no choice filters are used
-        # Check if values are within an hour of each other
-        if not plot_data.values or \
-            plot_data.values[-1].datetime.date() != entry_date.date() or \
-            plot_data.values[-1].datetime.hour != entry_date.hour:
-            plot_data.values.append(MetricsPlotValue(choice_id=None, datetime=entry_date))
-        plot_value = plot_data.values[-1]
-        plot_value.count += 1
-        plot_value.total += entry_val
-
-        # Update the running result based on the aggregate type
-        if plot_data.column.aggregate == 'sum':
-            plot_value.value = plot_value.total
-        elif plot_data.column.aggregate == 'min':
-            plot_value.value = min(plot_value.value or sys.maxint, entry_val)
-        elif plot_data.column.aggregate == 'max':
-            plot_value.value = max(plot_value.value or 0, entry_val)
-        elif plot_data.column.aggregate == 'avg':
-            plot_value.value = plot_value.total / plot_value.count
-        else:
-            logger.warning('Unknown metrics aggregate type: %s', plot_data.column.aggregate)
+    @classmethod
+    def _add_hourly_values(cls, results, query_set, date_field, columns):
+        """Adds a plot value for every hour that has a non-null column value, aggregating the values of all entries
+        within the hour based on the column's aggregate type.
 
-        return plot_value
+        :param results: The plot data models stored by column name
+        :type results: dict[string, :class:`metrics.registry.MetricsPlotData`]
+        :param query_set: A set of database models that are being counted towards metrics.
+        :type query_set: :class:`django.models.QuerySet`
+        :param date_field: The name of the field within each model that contains the recorded date.
+        :type date_field: string
+        :param columns: A list of metrics type column definitions that should be included.
+        :type columns: list[:class:`metrics.registry.MetricsTypeColumn`]
+        """
+        aggregates = {}
+        for index, column in enumerate(columns):
+            aggregates['count_%d' % index] = Count(column.name)
+            aggregates['total_%d' % index] = Sum(column.name)
+            aggregates['min_%d' % index] = Min(column.name)
+            aggregates['max_%d' % index] = Max(column.name)
+        rows = query_set.order_by().annotate(hour=Trunc(date_field, 'hour', tzinfo=timezone.utc)).values('hour')
+        rows = rows.annotate(**aggregates).order_by('hour')
+
+        for row in rows.iterator():
+            entry_date = row['hour'].replace(tzinfo=timezone.utc)
+            for index, column in enumerate(columns):
+                count = row['count_%d' % index]
+                if not count:
+                    continue
+                plot_value = MetricsPlotValue(choice_id=None, datetime=entry_date, count=count,
+                                              total=row['total_%d' % index])
+
+                # Set the result based on the aggregate type
+                if column.aggregate == 'sum':
+                    plot_value.value = plot_value.total
+                elif column.aggregate == 'min':
+                    plot_value.value = row['min_%d' % index]
+                elif column.aggregate == 'max':
+                    plot_value.value = row['max_%d' % index]
+                elif column.aggregate == 'avg':
+                    plot_value.value = plot_value.total // plot_value.count
+                else:
+                    logger.warning('Unknown metrics aggregate type: %s', column.aggregate)
+
+                # The y-axis bounds cover the individual entry values
+                plot_data = results[column.name]
+                min_y = row['min_%d' % index]
+                max_y = row['max_%d' % index]
+                if plot_data.values:
+                    min_y = min(plot_data.min_y, min_y)
+                    max_y = max(plot_data.max_y, max_y)
+                plot_data.min_y = min_y
+                plot_data.max_y = max_y
+                plot_data.values.append(plot_value)
+
+        for plot_data in results.values():
+            if plot_data.values:
+                plot_data._set_x_bounds()
+
+    def _set_x_bounds(self):
+        """Sets the bounds for the x-axis from the plot values, which are ordered by date"""
+        self.min_x = self.values[0].datetime
+        self.max_x = self.values[-1].datetime
 
 
 class MetricsTypeError(Exception):
@@ -429,6 +468,40 @@ def get_metrics_type(name, include_choices=False):
     return provider.get_metrics_type(include_choices=include_choices)
 
 
+def get_plot_data(name, started=None, ended=None, choice_ids=None, columns=None):
+    """Gets a list of plot values from the metrics provider registered with the given name. Results are cached for a
+    short time so that dashboards refreshing the same chart do not query and aggregate the metrics again.
+
+    :param name: The name of the metrics provider to query.
+    :type name: string
+    :param started: The start of the time range to query.
+    :type started: datetime.date
+    :param ended: The end of the time range to query.
+    :type ended: datetime.date
+    :param choice_ids: A list of related model identifiers to query.
+    :type choice_ids: [string]
+    :param columns: A list of metric columns to include from the metric type.
+    :type columns: {:class:`metrics.registry.MetricsTypeColumn`}
+    :returns: A series of plot values that match the query.
+    :rtype: list[:class:`metrics.registry.MetricsPlotData`]
+
+    :raises :class:`metrics.registry.MetricsTypeError`: If the registration is missing.
+    """
+    provider = get_provider(name)
+    if not settings.METRICS_PLOT_CACHE_TTL:
+        return provider.get_plot_data(started, ended, choice_ids, columns)
+
+    key = '|'.join([name, started.isoformat() if started else '', ended.isoformat() if ended else '',
+                    ','.join(sorted('%s' % choice_id for choice_id in choice_ids or [])),
+                    ','.join(sorted(column.name for column in columns or []))])
+    key = 'metrics_plot_data_%s' % hashlib.md5(key.encode('utf-8')).hexdigest()
+    plot_data = cache.get(key)
+    if plot_data is None:
+        plot_data = list(provider.get_plot_data(started, ended, choice_ids, columns))
+        cache.set(key, plot_data, settings.METRICS_PLOT_CACHE_TTL)
+    return plot_data
+
+
 def get_serializer(name):
     """Gets the model serializer class for the given metrics type name.
 
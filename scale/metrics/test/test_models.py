@@ -108,6 +108,21 @@ class TestMetricsError(TestCase):
             else:
                 self.assertEqual(entry.total_count, 1)
 
+    def test_add_failed_job_exes(self):
+        """Tests incrementally adding failed job executions to the hourly metrics."""
+        error = error_test_utils.create_error(is_builtin=True)
+        other_error = error_test_utils.create_error()
+
+        MetricsError.objects.add_failed_job_exes({error: 2, other_error: 1},
+                                                 datetime.datetime(2015, 1, 1, 10, 5, tzinfo=utc))
+        MetricsError.objects.add_failed_job_exes({error: 1}, datetime.datetime(2015, 1, 1, 10, 55, tzinfo=utc))
+
+        entries = MetricsError.objects.all()
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].error_id, error.id)
+        self.assertEqual(entries[0].occurred, datetime.datetime(2015, 1, 1, 10, tzinfo=utc))
+        self.assertEqual(entries[0].total_count, 3)
+
     def test_get_metrics_type(self):
         """Tests getting the metrics type."""
         metrics_type = MetricsError.objects.get_metrics_type()
@@ -356,6 +371,47 @@ class TestMetricsIngest(TestCase):
         self.assertIsNone(entry.ingest_time_max)
         self.assertIsNone(entry.ingest_time_avg)
 
+    def test_add_ingested(self):
+        """Tests incrementally adding ingested files to the hourly metrics."""
+        strike = ingest_test_utils.create_strike()
+        source_file = source_test_utils.create_source(file_size=200)
+        ingest1 = ingest_test_utils.create_ingest(strike=strike, source_file=source_file, status='INGESTED',
+                                                  transfer_started=datetime.datetime(2015, 1, 1, tzinfo=utc),
+                                                  transfer_ended=datetime.datetime(2015, 1, 1, 0, 10, tzinfo=utc),
+                                                  ingest_started=datetime.datetime(2015, 1, 1, tzinfo=utc),
+                                                  ingest_ended=datetime.datetime(2015, 1, 1, 1, tzinfo=utc))
+        source_file = source_test_utils.create_source(file_size=100)
+        ingest2 = ingest_test_utils.create_ingest(strike=strike, source_file=source_file, status='INGESTED',
+                                                  transfer_started=datetime.datetime(2015, 1, 1, tzinfo=utc),
+                                                  transfer_ended=datetime.datetime(2015, 1, 1, 0, 20, tzinfo=utc),
+                                                  ingest_started=datetime.datetime(2015, 1, 1, tzinfo=utc),
+                                                  ingest_ended=datetime.datetime(2015, 1, 1, 1, 30, tzinfo=utc))
+        ingest3 = ingest_test_utils.create_ingest(strike=strike, status='ERRORED',
+                                                  ingest_ended=datetime.datetime(2015, 1, 1, 1, tzinfo=utc))
+
+        MetricsIngest.objects.add_ingested(ingest1)
+        MetricsIngest.objects.add_ingested(ingest2)
+        MetricsIngest.objects.add_ingested(ingest3)
+
+        entries = MetricsIngest.objects.all()
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry.occurred, datetime.datetime(2015, 1, 1, 1, tzinfo=utc))
+        self.assertEqual(entry.ingested_count, 2)
+        self.assertEqual(entry.total_count, 2)
+        self.assertEqual(entry.file_size_sum, 300)
+        self.assertEqual(entry.file_size_min, 100)
+        self.assertEqual(entry.file_size_max, 200)
+        self.assertEqual(entry.file_size_avg, 150)
+        self.assertEqual(entry.transfer_time_sum, 1800)
+        self.assertEqual(entry.transfer_time_min, 600)
+        self.assertEqual(entry.transfer_time_max, 1200)
+        self.assertEqual(entry.transfer_time_avg, 900)
+        self.assertEqual(entry.ingest_time_sum, 9000)
+        self.assertEqual(entry.ingest_time_min, 3600)
+        self.assertEqual(entry.ingest_time_max, 5400)
+        self.assertEqual(entry.ingest_time_avg, 4500)
+
     def test_get_metrics_type(self):
         """Tests getting the metrics type."""
         metrics_type = MetricsIngest.objects.get_metrics_type()
@@ -658,6 +714,49 @@ class TestMetricsJobType(TestCase):
         self.assertEqual(entry.queue_time_min, 0)
         self.assertEqual(entry.queue_time_max, 0)
 
+    def test_add_ended_jobs(self):
+        """Tests incrementally adding ended jobs to the hourly metrics."""
+        job_type1 = job_test_utils.create_seed_job_type()
+        job_type2 = job_test_utils.create_seed_job_type()
+        job1 = job_test_utils.create_job(job_type=job_type1)
+        job2 = job_test_utils.create_job(job_type=job_type1)
+        job3 = job_test_utils.create_job(job_type=job_type2)
+        error = error_test_utils.create_error(category='DATA')
+
+        MetricsJobType.objects.add_ended_jobs([job1, job3], 'COMPLETED', datetime.datetime(2015, 1, 1, 10, 5,
+                                                                                           tzinfo=utc))
+        MetricsJobType.objects.add_ended_jobs([job2], 'FAILED', datetime.datetime(2015, 1, 1, 10, 30, tzinfo=utc),
+                                              {job2.id: error})
+
+        entry1 = MetricsJobType.objects.get(job_type=job_type1)
+        self.assertEqual(entry1.occurred, datetime.datetime(2015, 1, 1, 10, tzinfo=utc))
+        self.assertEqual(entry1.completed_count, 1)
+        self.assertEqual(entry1.failed_count, 1)
+        self.assertEqual(entry1.total_count, 2)
+        self.assertEqual(entry1.error_data_count, 1)
+        self.assertEqual(entry1.error_system_count, 0)
+        entry2 = MetricsJobType.objects.get(job_type=job_type2)
+        self.assertEqual(entry2.completed_count, 1)
+        self.assertEqual(entry2.total_count, 1)
+        self.assertEqual(entry2.failed_count, 0)
+
+    def test_calculate_reconciles_added_jobs(self):
+        """Tests that calculating the metrics for a day replaces the incrementally added metrics for that day."""
+        job_type = job_test_utils.create_seed_job_type()
+        job1 = job_test_utils.create_job(job_type=job_type, status='COMPLETED',
+                                         ended=datetime.datetime(2015, 1, 1, 10, tzinfo=utc))
+        job2 = job_test_utils.create_job(job_type=job_type)
+        MetricsJobType.objects.add_ended_jobs([job1], 'COMPLETED', job1.ended)
+        MetricsJobType.objects.add_ended_jobs([job2], 'COMPLETED', datetime.datetime(2015, 1, 1, 11, tzinfo=utc))
+
+        MetricsJobType.objects.calculate(datetime.date(2015, 1, 1))
+
+        entries = MetricsJobType.objects.filter(job_type=job_type)
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0].occurred, datetime.datetime(2015, 1, 1, 10, tzinfo=utc))
+        self.assertEqual(entries[0].completed_count, 1)
+        self.assertEqual(entries[0].total_count, 1)
+
     def test_get_metrics_type(self):
         """Tests getting the metrics type."""
         metrics_type = MetricsJobType.objects.get_metrics_type()
@@ -0,0 +1,103 @@
+from __future__ import unicode_literals
+from __future__ import absolute_import
+
+import datetime
+
+import django
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.timezone import utc
+from mock import patch
+
+import metrics.registry as registry
+import metrics.test.utils as metrics_test_utils
+from metrics.models import MetricsJobType
+from metrics.registry import MetricsTypeColumn
+
+
+class TestMetricsPlotData(TestCase):
+    """Tests the MetricsPlotData class."""
+
+    def setUp(self):
+        django.setup()
+
+        occurred = datetime.datetime(2015, 1, 1, 10, 5, tzinfo=utc)
+        self.entry1 = metrics_test_utils.create_job_type(occurred=occurred, job_time_sum=220, job_time_min=20,
+                                                         job_time_max=200, job_time_avg=110)
+        occurred = datetime.datetime(2015, 1, 1, 10, 10, tzinfo=utc)
+        self.entry2 = metrics_test_utils.create_job_type(occurred=occurred, job_time_sum=1100, job_time_min=100,
+                                                         job_time_max=1000, job_time_avg=550)
+        occurred = datetime.datetime(2015, 1, 1, 11, tzinfo=utc)
+        self.entry3 = metrics_test_utils.create_job_type(occurred=occurred, job_time_sum=50, job_time_min=50,
+                                                         job_time_max=50, job_time_avg=50)
+        self.columns = [MetricsTypeColumn('job_time_sum', aggregate='sum'),
+                        MetricsTypeColumn('job_time_min', aggregate='min'),
+                        MetricsTypeColumn('job_time_max', aggregate='max'),
+                        MetricsTypeColumn('job_time_avg', aggregate='avg'),
+                        MetricsTypeColumn('completed_count', aggregate='sum')]
+
+    def test_create_hourly(self):
+        """Tests creating plot data that is aggregated by hour."""
+
+        plot_data = MetricsJobType.objects.get_plot_data(columns=self.columns)
+        results = {data.column.name: data for data in plot_data}
+
+        self.assertListEqual([value.value for value in results['job_time_sum'].values], [1320, 50])
+        self.assertListEqual([value.value for value in results['job_time_min'].values], [20, 50])
+        self.assertListEqual([value.value for value in results['job_time_max'].values], [1000, 50])
+        self.assertListEqual([value.value for value in results['job_time_avg'].values], [330, 50])
+        self.assertListEqual(results['completed_count'].values, [])
+        self.assertEqual(results['job_time_sum'].values[0].datetime, datetime.datetime(2015, 1, 1, 10, tzinfo=utc))
+        self.assertEqual(results['job_time_sum'].min_x, datetime.datetime(2015, 1, 1, 10, tzinfo=utc))
+        self.assertEqual(results['job_time_sum'].max_x, datetime.datetime(2015, 1, 1, 11, tzinfo=utc))
+        self.assertEqual(results['job_time_sum'].min_y, 50)
+        self.assertEqual(results['job_time_sum'].max_y, 1100)
+
+    def test_create_choices(self):
+        """Tests creating plot data for specific choices."""
+
+        choice_ids = [self.entry1.job_type_id, self.entry3.job_type_id]
+        plot_data = MetricsJobType.objects.get_plot_data(choice_ids=choice_ids, columns=self.columns)
+        results = {data.column.name: data for data in plot_data}
+
+        values = results['job_time_sum'].values
+        self.assertListEqual([(value.id, value.value) for value in values], [(choice_ids[0], 220), (choice_ids[1], 50)])
+        self.assertEqual(results['job_time_sum'].min_x, self.entry1.occurred)
+        self.assertEqual(results['job_time_sum'].max_x, self.entry3.occurred)
+        self.assertEqual(results['job_time_sum'].min_y, 50)
+        self.assertEqual(results['job_time_sum'].max_y, 220)
+
+
+class TestGetPlotData(TestCase):
+    """Tests getting plot data from a registered metrics provider."""
+
+    def setUp(self):
+        django.setup()
+
+        cache.clear()
+        self.columns = [MetricsTypeColumn('completed_count', aggregate='sum')]
+
+    @patch('metrics.registry.get_provider')
+    def test_cached(self, mock_get_provider):
+        """Tests that repeated requests for the same plot data are cached."""
+
+        mock_get_provider.return_value.get_plot_data.return_value = ['data']
+        started = datetime.datetime(2015, 1, 1, tzinfo=utc)
+
+        registry.get_plot_data('job-types', started, None, ['1', '2'], self.columns)
+        results = registry.get_plot_data('job-types', started, None, ['2', '1'], self.columns)
+        registry.get_plot_data('job-types', None, None, ['1', '2'], self.columns)
+
+        self.assertListEqual(results, ['data'])
+        self.assertEqual(mock_get_provider.return_value.get_plot_data.call_count, 2)
+
+    @override_settings(METRICS_PLOT_CACHE_TTL=0)
+    @patch('metrics.registry.get_provider')
+    def test_cache_disabled(self, mock_get_provider):
+        """Tests that plot data is not cached when the cache is disabled."""
+
+        registry.get_plot_data('job-types', None, None, None, self.columns)
+        registry.get_plot_data('job-types', None, None, None, self.columns)
+
+        self.assertEqual(mock_get_provider.return_value.get_plot_data.call_count, 2)
@@ -6,6 +6,7 @@ import json
 import django
 import django.utils.timezone as timezone
 import datetime
+from django.core.cache import cache
 from rest_framework import status
 from rest_framework.test import APITestCase, APITransactionTestCase
 
@@ -88,6 +89,9 @@ class TestMetricPlotViewV6(APITransactionTestCase):
     def setUp(self):
         django.setup()
 
+        # Plot data is cached between requests, so clear the results of previous tests
+        cache.clear()
+
         rest.login_client(self.client)
 
         self.job_type1 = job_test_utils.create_seed_job_type()
@@ -172,7 +172,7 @@ class MetricPlotView(ListAPIView):
         columns = metrics_type.get_column_set(column_names, group_names)
 
         # Get the actual plot values
-        metrics_values = provider.get_plot_data(started, ended, choice_ids, columns)
+        metrics_values = registry.get_plot_data(name, started, ended, choice_ids, columns)
 
         page = self.paginate_queryset(metrics_values)
         if len(choice_ids) > 1:
@@ -150,6 +150,16 @@ class NodeResources(object):
             resources_dict[resource.name] = resource.value  # Assumes SCALAR type
         return Resources({'resources': resources_dict}, do_validate=False)
 
+    def get_key(self):
+        """Returns a hashable key for these resources. Resources with equal values will have equal keys, so the key can
+        be used to group and cache results for identical resource requirements.
+
+        :returns: The hashable key
+        :rtype: tuple
+        """
+
+        return tuple(sorted((resource.name, round(resource.value, 5)) for resource in self._resources.values()))
+
     def increase_up_to(self, node_resources):
         """Increases each resource up to the value in the given node resources
 
@@ -21,6 +21,7 @@ class QueuedJobExecution(object):
 
         self.id = queue.id
         self.is_canceled = queue.is_canceled
+        self.job_type_id = queue.job_type_id
         self.configuration = queue.get_execution_configuration()
         self.interface = queue.get_job_interface()
         self.priority = queue.priority
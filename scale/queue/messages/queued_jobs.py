@@ -89,6 +89,26 @@ class QueuedJobs(CommandMessage):
 
         return len(self._queued_jobs) < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if self.priority != message.priority or self.requeue != message.requeue:
+            return False
+        if len(self._queued_jobs) + len(message._queued_jobs) > MAX_NUM:
+            return False
+
+        for queued_job in message._queued_jobs:
+            self.add_job(queued_job.job_id, queued_job.exe_num)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', queued_job.job_id) for queued_job in self._queued_jobs}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -81,6 +81,24 @@ class RequeueJobs(CommandMessage):
 
         return len(self._requeue_jobs) < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if self.priority != message.priority or len(self._requeue_jobs) + len(message._requeue_jobs) > MAX_NUM:
+            return False
+
+        for requeue_job in message._requeue_jobs:
+            self.add_job(requeue_job.job_id, requeue_job.exe_num)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', requeue_job.job_id) for requeue_job in self._requeue_jobs}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
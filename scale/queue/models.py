@@ -299,7 +299,7 @@ class QueueManager(models.Manager):
             for input_file in ScaleFile.objects.get_files_for_queued_jobs(input_file_ids):
                 input_files[input_file.id] = input_file
 
-        # Bulk create queue models
+        # Bulk create queue models, the configurator parses each distinct manifest and configuration only once
         queues = []
         job_ids = []
         configurator = QueuedExecutionConfigurator(input_files)
@@ -307,14 +307,17 @@ class QueueManager(models.Manager):
             job_ids.append(job.id)
             config = configurator.configure_queued_job(job)
 
-            manifest = SeedManifest(job.job_type.manifest)
+            manifest = configurator.get_job_type_manifest(job)
+            batch_config = configurator.get_batch_configuration(job)
 
             if priority:
                 queued_priority = priority
-            elif job.batch and job.batch.get_configuration().priority:
-                queued_priority = job.batch.get_configuration().priority
+            elif batch_config and batch_config.priority:
+                queued_priority = batch_config.priority
             else:
-                queued_priority = job.get_job_configuration().priority
+                queued_priority = configurator.get_job_configuration(job).priority
+
+            resources = job.get_resources(manifest)
 
             queue = Queue()
             # select_related from get_jobs_with_related above will only make a single query
@@ -328,13 +331,15 @@ class QueueManager(models.Manager):
             queue.is_canceled = False
             queue.priority = queued_priority
             queue.timeout = manifest.get_timeout() if manifest else job.timeout
-            queue.interface = job.get_job_interface().get_dict()
+            queue.interface = configurator.get_manifest(job).get_dict()
             queue.configuration = config.get_dict()
-            if job.get_resources():
-                queue.resources = job.get_resources().get_json().get_dict()
+            if resources:
+                queue.resources = resources.get_json().get_dict()
             queue.queued = when_queued
             queues.append(queue)
 
+        logger.debug('Parsed definitions for %d queued job(s): %s', len(queues), configurator.get_parse_counts())
+
         self.cancel_queued_jobs(job_ids)
 
         if queues:
@@ -0,0 +1,93 @@
+"""Defines the process-wide cache of parsed recipe definitions"""
+from __future__ import unicode_literals
+
+import logging
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from recipe.definition.json.definition_v6 import RecipeDefinitionV6
+
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeDefinitionCache(object):
+    """Least recently used cache of the parsed definitions of recipe type revisions, stored by revision ID. Recipe type
+    revisions never change once created, so a cached definition never needs to be invalidated. The cached definitions
+    are shared and must not be modified by callers. This class is thread-safe.
+    """
+
+    def __init__(self, max_size=None):
+        """Constructor
+
+        :param max_size: The maximum number of definitions to cache, defaults to the RECIPE_DEFINITION_CACHE_SIZE
+            setting
+        :type max_size: int
+        """
+
+        self._definitions = OrderedDict()  # {Revision ID: RecipeDefinition}, least recently used first
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self._misses = 0
+
+    def clear(self):
+        """Clears all cached definitions and statistics. This method is intended for testing only.
+        """
+
+        with self._lock:
+            self._definitions.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def get_definition(self, recipe_type_rev):
+        """Returns the parsed definition for the given recipe type revision, parsing and caching it if needed
+
+        :param recipe_type_rev: The recipe type revision
+        :type recipe_type_rev: :class:`recipe.models.RecipeTypeRevision`
+        :returns: The definition for the revision
+        :rtype: :class:`recipe.definition.definition.RecipeDefinition`
+        """
+
+        max_size = self._max_size if self._max_size is not None else settings.RECIPE_DEFINITION_CACHE_SIZE
+        rev_id = recipe_type_rev.id
+        if rev_id is None or max_size <= 0:
+            return RecipeDefinitionV6(definition=recipe_type_rev.definition, do_validate=False).get_definition()
+
+        with self._lock:
+            definition = self._definitions.pop(rev_id, None)
+            if definition is not None:
+                self._definitions[rev_id] = definition  # Move to most recently used
+                self._hits += 1
+                return definition
+            self._misses += 1
+            hits = self._hits
+            misses = self._misses
+
+        logger.debug('Parsing definition of recipe type revision %d (%d cache hits, %d cache misses)', rev_id, hits,
+                     misses)
+
+        # Parse outside of the lock, two threads parsing the same revision at once produce equivalent definitions
+        definition = RecipeDefinitionV6(definition=recipe_type_rev.definition, do_validate=False).get_definition()
+
+        with self._lock:
+            self._definitions[rev_id] = definition
+            while len(self._definitions) > max_size:
+                self._definitions.popitem(last=False)
+
+        return definition
+
+    def get_stats(self):
+        """Returns the statistics of this cache
+
+        :returns: The number of cache hits, the number of cache misses, and the number of cached definitions
+        :rtype: (int, int, int)
+        """
+
+        with self._lock:
+            return self._hits, self._misses, len(self._definitions)
+
+
+recipe_definition_cache = RecipeDefinitionCache()
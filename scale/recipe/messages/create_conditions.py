@@ -90,6 +90,13 @@ class CreateConditions(CommandMessage):
 
         return len(self.conditions) < MAX_NUM
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        recipe_ids = [self.recipe_id, self.root_recipe_id]
+        return {('recipe', recipe_id) for recipe_id in recipe_ids if recipe_id is not None}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
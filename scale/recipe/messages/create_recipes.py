@@ -281,6 +281,13 @@ class CreateRecipes(CommandMessage):
         elif self.create_recipes_type == SUB_RECIPE_TYPE:
             return len(self.sub_recipes) < MAX_NUM
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        recipe_ids = [self.recipe_id, self.root_recipe_id, self.superseded_recipe_id] + self.root_recipe_ids
+        return {('recipe', recipe_id) for recipe_id in recipe_ids if recipe_id is not None}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -49,6 +49,12 @@ class ProcessRecipeInput(CommandMessage):
         self.recipe_id = None
         self.forced_nodes = None
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('recipe', self.recipe_id)}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
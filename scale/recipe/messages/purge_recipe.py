@@ -51,6 +51,12 @@ class PurgeRecipe(CommandMessage):
         self.trigger_id = None
         self.source_file_id = None
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('recipe', self.recipe_id)}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
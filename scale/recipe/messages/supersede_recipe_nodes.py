@@ -181,6 +181,12 @@ class SupersedeRecipeNodes(CommandMessage):
 
         return len(self._recipe_ids) < MAX_NUM
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('recipe', recipe_id) for recipe_id in self._recipe_ids}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -75,6 +75,12 @@ class UpdateRecipe(CommandMessage):
         self.root_recipe_id = None
         self.forced_nodes = None
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('recipe', self.root_recipe_id)}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
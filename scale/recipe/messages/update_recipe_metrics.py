@@ -95,6 +95,28 @@ class UpdateRecipeMetrics(CommandMessage):
 
         return len(self._recipe_ids) < MAX_NUM
 
+    def coalesce(self, message):
+        """See :meth:`messaging.messages.message.CommandMessage.coalesce`
+        """
+
+        if len(self._recipe_ids) + len(message._recipe_ids) > MAX_NUM:
+            return False
+
+        # Metrics only need to be updated once per recipe
+        existing_ids = set(self._recipe_ids)
+        for recipe_id in message._recipe_ids:
+            if recipe_id not in existing_ids:
+                self.add_recipe(recipe_id)
+                existing_ids.add(recipe_id)
+
+        return True
+
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('recipe', recipe_id) for recipe_id in self._recipe_ids}
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
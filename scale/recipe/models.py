@@ -19,6 +19,7 @@ from data.interface.parameter import FileParameter
 from job.models import Job, JobType
 from messaging.manager import CommandMessageManager
 from recipe.configuration.json.recipe_config_v6 import convert_config_to_v6_json, RecipeConfigurationV6
+from recipe.definition.cache import recipe_definition_cache
 from recipe.definition.definition import RecipeDefinition
 from recipe.definition.json.definition_v6 import convert_recipe_definition_to_v6_json, RecipeDefinitionV6
 from recipe.definition.node import JobNodeDefinition, RecipeNodeDefinition
@@ -1817,7 +1818,8 @@ class RecipeTypeRevision(models.Model):
         :rtype: :class:`recipe.definition.definition.RecipeDefinition`
         """
 
-        return RecipeDefinitionV6(definition=self.definition, do_validate=False).get_definition()
+        # Revisions never change, so the parsed definition is shared by all models of this revision
+        return recipe_definition_cache.get_definition(self)
 
     def get_input_interface(self):
         """Returns the input interface for this revision
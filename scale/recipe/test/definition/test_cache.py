@@ -0,0 +1,69 @@
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+from mock import MagicMock
+
+from recipe.definition.cache import RecipeDefinitionCache
+
+
+DEFINITION = {'version': '7', 'input': {'files': [], 'json': []}, 'nodes': {}}
+
+
+class TestRecipeDefinitionCache(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+    def _create_revision(self, rev_id):
+        """Creates a mock recipe type revision with the given ID"""
+
+        return MagicMock(id=rev_id, definition=DEFINITION)
+
+    def test_get_definition(self):
+        """Tests that definitions are parsed once per revision and reused"""
+
+        cache = RecipeDefinitionCache(max_size=10)
+        rev_1 = self._create_revision(1)
+        rev_2 = self._create_revision(2)
+
+        definition_1 = cache.get_definition(rev_1)
+        definition_2 = cache.get_definition(rev_2)
+
+        self.assertIs(cache.get_definition(self._create_revision(1)), definition_1)
+        self.assertIs(cache.get_definition(rev_2), definition_2)
+        self.assertIsNot(definition_1, definition_2)
+        self.assertTupleEqual(cache.get_stats(), (2, 2, 2))
+
+        cache.clear()
+        self.assertTupleEqual(cache.get_stats(), (0, 0, 0))
+        self.assertIsNot(cache.get_definition(rev_1), definition_1)
+
+    def test_get_definition_evicts_least_recently_used(self):
+        """Tests that the least recently used definition is evicted when the cache is full"""
+
+        cache = RecipeDefinitionCache(max_size=2)
+        rev_1 = self._create_revision(1)
+        rev_2 = self._create_revision(2)
+        rev_3 = self._create_revision(3)
+
+        definition_1 = cache.get_definition(rev_1)
+        definition_2 = cache.get_definition(rev_2)
+        cache.get_definition(rev_1)  # Revision 2 is now the least recently used
+        cache.get_definition(rev_3)
+
+        self.assertIs(cache.get_definition(rev_1), definition_1)
+        self.assertIsNot(cache.get_definition(rev_2), definition_2)
+        self.assertTupleEqual(cache.get_stats(), (2, 4, 2))
+
+    def test_get_definition_unsaved_revision(self):
+        """Tests that definitions of unsaved revisions and disabled caches are not cached"""
+
+        cache = RecipeDefinitionCache(max_size=10)
+        rev = self._create_revision(None)
+        self.assertIsNot(cache.get_definition(rev), cache.get_definition(rev))
+
+        cache = RecipeDefinitionCache(max_size=0)
+        rev = self._create_revision(1)
+        self.assertIsNot(cache.get_definition(rev), cache.get_definition(rev))
+        self.assertTupleEqual(cache.get_stats(), (0, 0, 0))
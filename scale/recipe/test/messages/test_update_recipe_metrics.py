@@ -55,6 +55,20 @@ class TestUpdateRecipes(TestCase):
         self.assertEqual(recipe.jobs_completed, 1)
         self.assertEqual(recipe.jobs_canceled, 1)
 
+    def test_coalesce(self):
+        """Tests coalescing UpdateRecipeMetrics messages"""
+
+        message_1 = UpdateRecipeMetrics()
+        message_1.add_recipe(1)
+        message_1.add_recipe(2)
+        message_2 = UpdateRecipeMetrics()
+        message_2.add_recipe(2)
+        message_2.add_recipe(3)
+
+        self.assertTrue(message_1.coalesce(message_2))
+        # Recipe metrics are only updated once per recipe
+        self.assertListEqual(message_1.to_json()['recipe_ids'], [1, 2, 3])
+
     def test_execute(self):
         """Tests calling UpdateRecipeMetrics.execute() successfully"""
 
@@ -0,0 +1,184 @@
+"""Defines the command that benchmarks selecting scheduling nodes for new job executions"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import logging
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from node.resources.node_resources import NodeResources
+from node.resources.resource import Cpus, Disk, Mem
+from scheduler.resources.agent import ResourceSet
+from scheduler.scheduling.node_index import SchedulingNodeIndex
+from scheduler.scheduling.scheduling_node import SchedulingNode
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    """Command that replays a synthetic scheduling pass using both the scheduling node index and a linear scan of all
+    nodes and reports how long each took
+    """
+
+    help = 'Benchmarks selecting scheduling nodes for new job executions against a linear scan of all nodes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-n', '--nodes', action='store', type=int, default=1000,
+                            help='Number of synthetic nodes.')
+        parser.add_argument('-q', '--queue', action='store', type=int, default=10000,
+                            help='Number of synthetic queued job executions.')
+        parser.add_argument('-j', '--job-types', action='store', type=int, default=50, dest='job_types',
+                            help='Number of synthetic job types.')
+        parser.add_argument('-s', '--seed', action='store', type=int, default=1,
+                            help='Random seed for generating the synthetic cluster and queue.')
+
+    def handle(self, *args, **options):
+        """See :meth:`django.core.management.base.BaseCommand.handle`.
+
+        This method starts the command.
+        """
+
+        logger.info('Command starting: scale_benchmark_scheduling')
+
+        rand = random.Random(options.get('seed'))
+        node_resources = [(rand.choice([8.0, 16.0, 32.0, 64.0]), rand.choice([32768.0, 65536.0, 131072.0]))
+                          for _ in range(options.get('nodes'))]
+        job_type_resources = [NodeResources([Cpus(rand.choice([0.5, 1.0, 2.0, 4.0, 8.0])),
+                                             Mem(rand.choice([512.0, 1024.0, 4096.0, 16384.0])), Disk(0.0)])
+                              for _ in range(options.get('job_types'))]
+        queue = [(rand.randint(1, 1000), rand.randint(0, len(job_type_resources) - 1))
+                 for _ in range(options.get('queue'))]
+        queue.sort()  # Queue is ordered by priority
+
+        started = time.time()
+        linear_results = self._replay(node_resources, job_type_resources, queue, False)
+        linear_duration = time.time() - started
+
+        started = time.time()
+        index_results = self._replay(node_resources, job_type_resources, queue, True)
+        index_duration = time.time() - started
+
+        num_scheduled = len([node_id for node_id in index_results if node_id is not None])
+        logger.info('Scheduled %d of %d job executions on %d nodes', num_scheduled, len(queue), len(node_resources))
+        logger.info('Linear scan took %.3f seconds', linear_duration)
+        logger.info('Node index took %.3f seconds', index_duration)
+        if linear_results != index_results:
+            logger.error('Node index selected different nodes than the linear scan')
+
+        logger.info('Command completed: scale_benchmark_scheduling')
+
+    def _replay(self, node_resources, job_type_resources, queue, use_index):
+        """Replays a scheduling pass and returns the ID of the node selected for each job execution (None if not
+        scheduled)
+
+        :param node_resources: The list of (cpus, mem) tuples for each node
+        :type node_resources: :func:`list`
+        :param job_type_resources: The list of all of the job type resource requirements
+        :type job_type_resources: :func:`list`
+        :param queue: The list of (priority, job type index) tuples for each queued job execution
+        :type queue: :func:`list`
+        :param use_index: Whether to use the scheduling node index instead of a linear scan
+        :type use_index: bool
+        :returns: The list of selected node IDs
+        :rtype: :func:`list`
+        """
+
+        nodes = {}
+        for node_id, (cpus, mem) in enumerate(node_resources, start=1):
+            resources = NodeResources([Cpus(cpus), Mem(mem), Disk(0.0)])
+            resource_set = ResourceSet(resources, NodeResources(), resources)
+            nodes[node_id] = SchedulingNode('agent_%d' % node_id, _BenchmarkNode(node_id), [], [], resource_set)
+        node_index = SchedulingNodeIndex(nodes, job_type_resources)
+
+        results = []
+        for priority, job_type_index in queue:
+            job_exe = _BenchmarkJobExecution(priority, job_type_resources[job_type_index])
+            if use_index:
+                node = node_index.get_best_node_for_scheduling(job_exe)
+                if node is None:
+                    reservation_node = node_index.get_best_node_for_reservation(job_exe)
+                    if reservation_node:
+                        node_index.remove_node(reservation_node.node_id)
+            else:
+                node = self._linear_scan(job_exe, nodes, job_type_resources)
+            if node and node.accept_new_job_exe(job_exe):
+                if use_index:
+                    node_index.update_node(node.node_id)
+                results.append(node.node_id)
+            else:
+                results.append(None)
+
+        return results
+
+    def _linear_scan(self, job_exe, nodes, job_type_resources):
+        """Returns the best node for scheduling the given job execution by scoring every node, reserving a node if the
+        job execution cannot be scheduled
+
+        :param job_exe: The job execution to schedule
+        :type job_exe: :class:`scheduler.management.commands.scale_benchmark_scheduling._BenchmarkJobExecution`
+        :param nodes: The dict of available scheduling nodes stored by node ID
+        :type nodes: dict
+        :param job_type_resources: The list of all of the job type resource requirements
+        :type job_type_resources: :func:`list`
+        :returns: The best node for scheduling, possibly None
+        :rtype: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        best_scheduling_node = None
+        best_scheduling_score = None
+        best_reservation_node = None
+        best_reservation_score = None
+
+        for node_id in sorted(nodes.keys()):
+            node = nodes[node_id]
+            score = node.score_job_exe_for_scheduling(job_exe, job_type_resources)
+            if score is not None:
+                if best_scheduling_node is None or score < best_scheduling_score:
+                    best_scheduling_node = node
+                    best_scheduling_score = score
+                    best_reservation_node = None
+                    best_reservation_score = None
+
+            if best_scheduling_node is None:
+                score = node.score_job_exe_for_reservation(job_exe, job_type_resources)
+                if score is not None:
+                    if best_reservation_node is None or score < best_reservation_score:
+                        best_reservation_node = node
+                        best_reservation_score = score
+
+        if best_reservation_node:
+            del nodes[best_reservation_node.node_id]
+
+        return best_scheduling_node
+
+
+class _BenchmarkNode(object):
+    """A synthetic node that is always ready for new job executions"""
+
+    def __init__(self, node_id):
+        self.id = node_id
+        self.hostname = 'host_%d' % node_id
+
+    def is_ready_for_new_job(self):
+        return True
+
+    def is_ready_for_next_job_task(self):
+        return True
+
+    def is_ready_for_system_task(self):
+        return True
+
+
+class _BenchmarkJobExecution(object):
+    """A synthetic queued job execution"""
+
+    def __init__(self, priority, required_resources):
+        self.priority = priority
+        self.required_resources = required_resources
+
+    def scheduled(self, agent_id, node_id, resources):
+        pass
@@ -14,11 +14,10 @@ from job.execution.configuration.configurators import ScheduledExecutionConfigur
 from job.execution.job_exe import RunningJobExecution
 from job.execution.manager import job_exe_mgr
 from job.messages.running_jobs import create_running_job_messages
-from job.models import Job, JobExecution, JobExecutionEnd
+from job.models import Job, JobExecution, JobExecutionEnd, JobType
 from job.tasks.manager import task_mgr
 from mesos_api.tasks import create_mesos_task
 from node.resources.node_resources import NodeResources
-from queue.job_exe import QueuedJobExecution
 from queue.models import Queue
 from scale import settings as scale_settings
 from scheduler.cleanup.manager import cleanup_mgr
@@ -26,6 +25,8 @@ from scheduler.manager import scheduler_mgr, SchedulerWarning
 from scheduler.node.manager import node_mgr
 from scheduler.resources.agent import ResourceSet
 from scheduler.resources.manager import resource_mgr
+from scheduler.scheduling.node_index import SchedulingNodeIndex
+from scheduler.scheduling.queue_index import QueueIndex
 from scheduler.scheduling.scheduling_node import SchedulingNode
 from scheduler.sync.job_type_manager import job_type_mgr
 from scheduler.sync.workspace_manager import workspace_mgr
@@ -66,6 +67,7 @@ class SchedulingManager(object):
         """Constructor
         """
 
+        self._queue_index = QueueIndex()
         self._waiting_tasks = {}  # {Task ID: int}
 
     def perform_scheduling(self, client, when):
@@ -182,6 +184,63 @@ class SchedulingManager(object):
 
         return ignore_job_type_ids
 
+    def _check_job_type_resources(self, job_type, job_exe, max_cluster_resources, warning, type_warnings):
+        """Checks the resources required by the given queued job execution against the maximum resources available in
+        the cluster, updating the scheduler warnings as needed
+
+        :param job_type: The job type model
+        :type job_type: :class:`job.models.JobType`
+        :param job_exe: The queued job execution
+        :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
+        :param max_cluster_resources: The maximum resources available from any node in the cluster
+        :type max_cluster_resources: :class:`node.resources.node_resources.NodeResources`
+        :param warning: The invalid resources warning for the job type
+        :type warning: :class:`scheduler.manager.SchedulerWarning`
+        :param type_warnings: The dict of warning messages and counts to log, stored by job type name
+        :type type_warnings: dict
+        :returns: The comma-separated names of the unmet resources, None if all resources are met
+        :rtype: string
+        """
+
+        invalid_resources = []
+        insufficient_resources = []
+        # get resource names offered and compare to job type resources
+        for resource in job_exe.required_resources.resources:
+            # skip sharedmem
+            if resource.name.lower() == 'sharedmem':
+                continue
+            if resource.name not in max_cluster_resources._resources:
+                if job_type.name in type_warnings:
+                    type_warnings[job_type.name]['count'] += 1
+                    if resource.name not in type_warnings[job_type.name]['warning']:
+                        type_warnings[job_type.name]['warning'] += (', %s' % resource.name)
+                else:
+                    type_warnings[job_type.name] = {
+                        'warning': '%s job types could not be scheduled as the following resources do not exist in the available cluster resources: %s' % (job_type.name, resource.name),
+                        'count': 1
+                    }
+                # resource does not exist in cluster
+                invalid_resources.append(resource.name)
+            elif resource.value > max_cluster_resources._resources[resource.name].value:
+                # resource exceeds the max available from any node
+                insufficient_resources.append(resource.name)
+
+        if invalid_resources:
+            description = INVALID_RESOURCES.description % invalid_resources
+            scheduler_mgr.warning_active(warning, description)
+
+        if insufficient_resources:
+            description = INSUFFICIENT_RESOURCES.description % insufficient_resources
+            scheduler_mgr.warning_active(warning, description)
+
+        if invalid_resources or insufficient_resources:
+            invalid_resources.extend(insufficient_resources)
+            return ','.join(invalid_resources)
+
+        # reset unmet_resources flag
+        scheduler_mgr.warning_inactive(warning)
+        return None
+
     def _decline_offers(self, offers):
         """Declines offers that have not been allocated
 
@@ -344,17 +403,27 @@ class SchedulingManager(object):
             logger.warning('There are no nodes available. Waiting to schedule until there are free resources...')
             return scheduled_job_executions
           
+        node_index = SchedulingNodeIndex(nodes, job_type_resources)
+        resource_verdicts = {}  # {(Job type ID, resources key): Unmet resources string, possibly None}
+        original_unmet_resources = {}  # {Job type ID: Unmet resources string at start of pass, possibly None}
+        unmet_resources = {}  # {Job type ID: Unmet resources string at end of pass, possibly None}
         ignore_job_type_ids = self._calculate_job_types_to_ignore(job_types, job_type_limits)
         max_cluster_resources = resource_mgr.get_max_available_resources()
-        for queue in Queue.objects.get_queue(scheduler_mgr.config.queue_mode, ignore_job_type_ids)[:QUEUE_LIMIT]:
-            job_exe = QueuedJobExecution(queue)
-
+        self._queue_index.sync_with_database(started)
+        queue = self._queue_index.get_queue(scheduler_mgr.config.queue_mode, ignore_job_type_ids, QUEUE_LIMIT)
+        for job_exe in queue:
             # Canceled job executions get processed as scheduled executions
             if job_exe.is_canceled:
                 scheduled_job_executions.append(job_exe)
                 continue
 
-            jt = job_type_mgr.get_job_type(queue.job_type.id)
+            # Make sure execution's job type and workspaces have been synced to the scheduler
+            job_type_id = job_exe.job_type_id
+            jt = job_type_mgr.get_job_type(job_type_id)
+            if job_type_id not in job_types or not jt:
+                scheduler_mgr.warning_active(UNKNOWN_JOB_TYPE, description=UNKNOWN_JOB_TYPE.description % job_type_id)
+                continue
+
             name = INVALID_RESOURCES.name + jt.name
             title = INVALID_RESOURCES.title % jt.name
             warning = SchedulerWarning(name=name, title=title, description=None)
@@ -362,52 +431,16 @@ class SchedulingManager(object):
                 # previously checked this job type and found we lacked resources; wait until warning is inactive to check again
                 continue
 
-            invalid_resources = []
-            insufficient_resources = []
-            # get resource names offered and compare to job type resources
-            for resource in job_exe.required_resources.resources:
-                # skip sharedmem
-                if resource.name.lower() == 'sharedmem':
-                    continue
-                if resource.name not in max_cluster_resources._resources:
-                    if jt.name in type_warnings:
-                        type_warnings[jt.name]['count'] += 1
-                        if resource.name not in type_warnings[jt.name]['warning']:
-                            type_warnings[jt.name]['warning'] += (', %s' % resource.name)
-                    else:
-                        type_warnings[jt.name] = {
-                            'warning': '%s job types could not be scheduled as the following resources do not exist in the available cluster resources: %s' % (jt.name, resource.name),
-                            'count': 1
-                        }
-                    # resource does not exist in cluster
-                    invalid_resources.append(resource.name)
-                elif resource.value > max_cluster_resources._resources[resource.name].value:
-                    # resource exceeds the max available from any node
-                    insufficient_resources.append(resource.name)
-
-            if invalid_resources:
-                description = INVALID_RESOURCES.description % invalid_resources
-                scheduler_mgr.warning_active(warning, description)
-
-            if insufficient_resources:
-                description = INSUFFICIENT_RESOURCES.description % insufficient_resources
-                scheduler_mgr.warning_active(warning, description)
-
-            if invalid_resources or insufficient_resources:
-                invalid_resources.extend(insufficient_resources)
-                jt.unmet_resources = ','.join(invalid_resources)
-                jt.save(update_fields=["unmet_resources"])
-                continue
-            else:
-                # reset unmet_resources flag
-                jt.unmet_resources = None
-                scheduler_mgr.warning_inactive(warning)
-                jt.save(update_fields=["unmet_resources"])
-
-            # Make sure execution's job type and workspaces have been synced to the scheduler
-            job_type_id = queue.job_type_id
-            if job_type_id not in job_types:
-                scheduler_mgr.warning_active(UNKNOWN_JOB_TYPE, description=UNKNOWN_JOB_TYPE.description % job_type_id)
+            # Only check resources once per pass for identical queue rows of the same job type
+            verdict_key = (job_type_id, job_exe.required_resources.get_key())
+            if verdict_key not in resource_verdicts:
+                resource_verdicts[verdict_key] = self._check_job_type_resources(jt, job_exe, max_cluster_resources,
+                                                                               warning, type_warnings)
+                if jt.id not in original_unmet_resources:
+                    original_unmet_resources[jt.id] = jt.unmet_resources
+                jt.unmet_resources = resource_verdicts[verdict_key]
+                unmet_resources[jt.id] = jt.unmet_resources
+            if resource_verdicts[verdict_key]:
                 continue
 
             workspace_names = job_exe.configuration.get_input_workspace_names()
@@ -438,11 +471,19 @@ class SchedulingManager(object):
                 continue
 
             # Try to schedule job execution and adjust job type limit if needed
-            if self._schedule_new_job_exe(job_exe, nodes, job_type_resources):
+            if self._schedule_new_job_exe(job_exe, node_index):
                 scheduled_job_executions.append(job_exe)
                 if job_type_id in job_type_limits:
                     job_type_limits[job_type_id] -= 1
 
+        # Only save job types whose unmet resources changed during this pass
+        changed_unmet_resources = {}
+        for job_type_id in unmet_resources:
+            if unmet_resources[job_type_id] != original_unmet_resources[job_type_id]:
+                changed_unmet_resources[job_type_id] = unmet_resources[job_type_id]
+        if changed_unmet_resources:
+            JobType.objects.update_unmet_resources(changed_unmet_resources)
+
         duration = now() - started
         if type_warnings:
             for warn in type_warnings:
@@ -521,6 +562,7 @@ class SchedulingManager(object):
 
             # Delete queue models
             Queue.objects.filter(id__in=queue_ids).delete()
+        self._queue_index.remove_job_exes(queue_ids)
 
         duration = now() - started
         msg = 'Queries to process scheduled jobs took %.3f seconds'
@@ -531,54 +573,30 @@ class SchedulingManager(object):
 
         return running_job_exes
 
-    def _schedule_new_job_exe(self, job_exe, nodes, job_type_resources):
+    def _schedule_new_job_exe(self, job_exe, node_index):
         """Schedules the given job execution on the queue on one of the available nodes, if possible
 
         :param job_exe: The job execution to schedule
         :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
-        :param nodes: The dict of available scheduling nodes stored by node ID
-        :type nodes: dict
-        :param job_type_resources: The list of all of the job type resource requirements
-        :type job_type_resources: list
+        :param node_index: The index of available scheduling nodes
+        :type node_index: :class:`scheduler.scheduling.node_index.SchedulingNodeIndex`
         :returns: True if scheduled, False otherwise
         :rtype: bool
         """
 
-        best_scheduling_node = None
-        best_scheduling_score = None
-        best_reservation_node = None
-        best_reservation_score = None
-
-        for node in nodes.values():
-            # Check node for scheduling this job execution
-            score = node.score_job_exe_for_scheduling(job_exe, job_type_resources)
-            if score is not None:
-                # Job execution could be scheduled on this node, check its score
-                if best_scheduling_node is None or score < best_scheduling_score:
-                    # This is the best node for scheduling so far
-                    best_scheduling_node = node
-                    best_scheduling_score = score
-                    best_reservation_node = None  # No need to reserve a node if we can schedule the job execution
-                    best_reservation_score = None  # No need to reserve a node if we can schedule the job execution
-
-            if best_scheduling_node is None:
-                # No nodes yet to schedule this job execution on, check whether we should reserve this node
-                score = node.score_job_exe_for_reservation(job_exe, job_type_resources)
-                if score is not None:
-                    # Job execution could reserve this node, check its score
-                    if best_reservation_node is None or score < best_reservation_score:
-                        # This is the best node to reserve so far
-                        best_reservation_node = node
-                        best_reservation_score = score
-
         # Schedule the job execution on the best node
+        best_scheduling_node = node_index.get_best_node_for_scheduling(job_exe)
         if best_scheduling_node:
             if best_scheduling_node.accept_new_job_exe(job_exe):
+                node_index.update_node(best_scheduling_node.node_id)
                 return True
+            # No need to reserve a node if the job execution could be scheduled
+            return False
 
         # Could not schedule job execution, reserve a node to run this execution if possible
+        best_reservation_node = node_index.get_best_node_for_reservation(job_exe)
         if best_reservation_node:
-            del nodes[best_reservation_node.node_id]
+            node_index.remove_node(best_reservation_node.node_id)
 
         return False
 
@@ -635,6 +653,8 @@ class SchedulingManager(object):
                             len(node_ids))
         except DatabaseError:
             logger.exception('Error occurred while scheduling new jobs from the queue')
+            # Reload the entire queue on the next pass since the index may no longer match the database
+            self._queue_index.clear()
             job_exe_count = 0
             for node in available_nodes.values():
                 node.reset_new_job_exes()
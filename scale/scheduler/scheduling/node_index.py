@@ -0,0 +1,170 @@
+"""Defines the class that indexes scheduling nodes so that the best node for a job execution can be found quickly"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import heapq
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulingNodeIndex(object):
+    """This class indexes a set of scheduling nodes for scheduling new job executions. Job executions are grouped into
+    buckets by their required resources and each bucket keeps a heap of the nodes that can fit those resources, ordered
+    by their scheduling score. A node's entries are re-scored only when the node accepts a new job execution, so finding
+    the best node for a job execution takes logarithmic time instead of scoring every node. This class is NOT
+    thread-safe and should only be used within the scheduling thread for a single scheduling pass.
+    """
+
+    def __init__(self, nodes, job_type_resources):
+        """Constructor
+
+        :param nodes: The dict of scheduling nodes stored by node ID
+        :type nodes: dict
+        :param job_type_resources: The list of all of the job type resource requirements
+        :type job_type_resources: :func:`list`
+        """
+
+        self._job_type_resources = job_type_resources
+        self._nodes = {}  # {Node ID: SchedulingNode}
+        self._node_order = {}  # {Node ID: int}, original node order, used to break ties between equal scores
+        self._node_versions = {}  # {Node ID: int}, incremented each time a node's remaining resources change
+
+        self._buckets = {}  # {Resource key: NodeResources}
+        self._heaps = {}  # {Resource key: [(score, node order, node ID, node version)]}
+        self._reservation_candidates = {}  # {Resource key: [Node ID]}, nodes whose watermark can fit the resources
+        self._reservation_failures = {}  # {Resource key: int}, highest priority for which no node could be reserved
+
+        for order, node in enumerate(nodes.values()):
+            self._nodes[node.node_id] = node
+            self._node_order[node.node_id] = order
+            self._node_versions[node.node_id] = 0
+
+    def __len__(self):
+        """Returns the number of nodes in the index
+
+        :returns: The number of nodes in the index
+        :rtype: int
+        """
+
+        return len(self._nodes)
+
+    def get_best_node_for_reservation(self, job_exe):
+        """Returns the best node to reserve for the given job execution, possibly None
+
+        :param job_exe: The job execution
+        :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
+        :returns: The best node to reserve for the job execution, possibly None
+        :rtype: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        key = job_exe.required_resources.get_key()
+        if key in self._reservation_failures and job_exe.priority >= self._reservation_failures[key]:
+            # Nodes only gain allocations during a scheduling pass, so if no node could be reserved for these resources
+            # at an equal or higher priority (lower value), then no node can be reserved now either
+            return None
+
+        if key not in self._reservation_candidates:
+            # A node whose watermark cannot fit the resources can never be reserved for them
+            candidates = [node_id for node_id in self._nodes
+                          if self._nodes[node_id].is_watermark_sufficient_to_meet(job_exe.required_resources)]
+            candidates.sort(key=lambda node_id: self._node_order[node_id])
+            self._reservation_candidates[key] = candidates
+
+        best_node = None
+        best_score = None
+        for node_id in self._reservation_candidates[key]:
+            if node_id not in self._nodes:
+                continue  # Node has already been reserved
+            node = self._nodes[node_id]
+            score = node.score_job_exe_for_reservation(job_exe, self._job_type_resources)
+            if score is not None and (best_node is None or score < best_score):
+                best_node = node
+                best_score = score
+
+        if best_node is None:
+            if key not in self._reservation_failures or job_exe.priority < self._reservation_failures[key]:
+                self._reservation_failures[key] = job_exe.priority
+
+        return best_node
+
+    def get_best_node_for_scheduling(self, job_exe):
+        """Returns the best node for scheduling the given job execution, possibly None
+
+        :param job_exe: The job execution
+        :type job_exe: :class:`queue.job_exe.QueuedJobExecution`
+        :returns: The best node for scheduling the job execution, possibly None
+        :rtype: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        key = job_exe.required_resources.get_key()
+        if key not in self._heaps:
+            self._add_bucket(key, job_exe.required_resources)
+
+        heap = self._heaps[key]
+        while heap:
+            _score, _order, node_id, version = heap[0]
+            if node_id in self._nodes and self._node_versions[node_id] == version:
+                return self._nodes[node_id]
+            # Entry is for a removed node or is out of date, a current entry for the node has already been pushed
+            heapq.heappop(heap)
+
+        return None
+
+    def remove_node(self, node_id):
+        """Removes the node with the given ID from the index so that it will no longer be used for new job executions
+
+        :param node_id: The node ID
+        :type node_id: int
+        """
+
+        if node_id in self._nodes:
+            del self._nodes[node_id]
+
+    def update_node(self, node_id):
+        """Re-scores the node with the given ID after its remaining resources have changed, such as after accepting a
+        new job execution
+
+        :param node_id: The node ID
+        :type node_id: int
+        """
+
+        if node_id not in self._nodes:
+            return
+
+        node = self._nodes[node_id]
+        self._node_versions[node_id] += 1
+        for key, resources in self._buckets.items():
+            self._push_node(key, resources, node)
+
+    def _add_bucket(self, key, resources):
+        """Adds a new bucket for the given resources and scores every node for it
+
+        :param key: The bucket key
+        :type key: tuple
+        :param resources: The resources required by job executions in the bucket
+        :type resources: :class:`node.resources.node_resources.NodeResources`
+        """
+
+        self._buckets[key] = resources
+        self._heaps[key] = []
+        for node in self._nodes.values():
+            self._push_node(key, resources, node)
+
+    def _push_node(self, key, resources, node):
+        """Scores the given node for the given bucket and pushes it onto the bucket's heap if the resources fit
+
+        :param key: The bucket key
+        :type key: tuple
+        :param resources: The resources required by job executions in the bucket
+        :type resources: :class:`node.resources.node_resources.NodeResources`
+        :param node: The scheduling node
+        :type node: :class:`scheduler.scheduling.scheduling_node.SchedulingNode`
+        """
+
+        score = node.score_resources_for_scheduling(resources, self._job_type_resources)
+        if score is not None:
+            node_id = node.node_id
+            entry = (score, self._node_order[node_id], node_id, self._node_versions[node_id])
+            heapq.heappush(self._heaps[key], entry)
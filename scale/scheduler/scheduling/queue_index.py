@@ -0,0 +1,211 @@
+"""Defines the class that mirrors the queue so that the scheduler does not re-query every queue row each generation"""
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import bisect
+import datetime
+import logging
+
+from django.utils.timezone import utc
+
+from queue.job_exe import QueuedJobExecution
+from queue.models import Queue, QUEUE_ORDER_FIFO, QUEUE_ORDER_LIFO
+
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=utc)
+
+# How often the index reconciles the IDs of all queue rows with the database, even if the row count has not changed
+RECONCILE_PERIOD = datetime.timedelta(minutes=1)
+
+
+class QueueIndex(object):
+    """This class mirrors the queue table for the scheduler. It keeps a small sort key for every queue row in queue
+    order and only loads and parses the full queue row (configuration, interface, and resources) for rows that reach the
+    head of the queue, reusing the parsed queued job executions across scheduling generations. New rows are loaded by ID
+    watermark, canceled rows are picked up each generation, and scheduled rows are removed by the scheduler. The row
+    IDs are reconciled with the database whenever the row count differs from the index and periodically otherwise. This
+    class is NOT thread-safe and should only be used within the scheduling thread.
+    """
+
+    def __init__(self):
+        """Constructor
+        """
+
+        self._job_exes = {}  # {Queue ID: QueuedJobExecution}, parsed rows at the head of the queue
+        self._keys = []  # [(Priority, queued order, Queue ID)] sorted in queue order
+        self._last_id = 0  # Highest queue ID that has been loaded
+        self._last_reconcile = None
+        self._order_mode = QUEUE_ORDER_FIFO
+        self._rows = {}  # {Queue ID: (Sort key, Job type ID, Is canceled, Queued)}
+
+    def __len__(self):
+        """Returns the number of queue rows in the index
+
+        :returns: The number of queue rows in the index
+        :rtype: int
+        """
+
+        return len(self._rows)
+
+    def clear(self):
+        """Clears the index so that the entire queue is reloaded on the next sync
+        """
+
+        self._job_exes = {}
+        self._keys = []
+        self._last_id = 0
+        self._last_reconcile = None
+        self._rows = {}
+
+    def get_queue(self, order_mode, ignore_job_type_ids=None, limit=None):
+        """Returns the queued job executions sorted according to their priority first, and then according to the
+        provided mode. Queue rows that have not reached the head of the queue before are loaded and parsed in a single
+        query.
+
+        :param order_mode: The mode determining how to order the queue (FIFO or LIFO)
+        :type order_mode: string
+        :param ignore_job_type_ids: The list of job type IDs to ignore
+        :type ignore_job_type_ids: :func:`list`
+        :param limit: The maximum number of queued job executions to return, None for no limit
+        :type limit: int
+        :returns: The list of queued job executions
+        :rtype: [:class:`queue.job_exe.QueuedJobExecution`]
+        """
+
+        if order_mode != self._order_mode:
+            self._order_mode = order_mode
+            for queue_id, row in self._rows.items():
+                self._rows[queue_id] = (self._get_key(queue_id, row[0][0], row[3]),) + row[1:]
+            self._keys = sorted(row[0] for row in self._rows.values())
+
+        ignore_job_type_ids = set(ignore_job_type_ids) if ignore_job_type_ids else set()
+        head_ids = []
+        for key in self._keys:
+            if limit is not None and len(head_ids) >= limit:
+                break
+            queue_id = key[2]
+            if self._rows[queue_id][1] not in ignore_job_type_ids:
+                head_ids.append(queue_id)
+
+        # Load the rows that are new to the head of the queue, dropping parsed rows that have left it
+        job_exes = {head_id: self._job_exes[head_id] for head_id in head_ids if head_id in self._job_exes}
+        new_ids = [head_id for head_id in head_ids if head_id not in job_exes]
+        if new_ids:
+            for queue in Queue.objects.filter(id__in=new_ids).iterator():
+                job_exes[queue.id] = QueuedJobExecution(queue)
+            deleted_ids = [new_id for new_id in new_ids if new_id not in job_exes]
+            if deleted_ids:
+                self.remove_job_exes(deleted_ids)
+        self._job_exes = job_exes
+
+        queue = []
+        for queue_id in head_ids:
+            if queue_id in job_exes:
+                job_exe = job_exes[queue_id]
+                job_exe.is_canceled = self._rows[queue_id][2]
+                queue.append(job_exe)
+        return queue
+
+    def remove_job_exes(self, queue_ids):
+        """Removes the queue rows with the given IDs from the index, such as after they have been scheduled
+
+        :param queue_ids: The queue IDs
+        :type queue_ids: :func:`list`
+        """
+
+        for queue_id in queue_ids:
+            row = self._rows.pop(queue_id, None)
+            self._job_exes.pop(queue_id, None)
+            if row:
+                index = bisect.bisect_left(self._keys, row[0])
+                if index < len(self._keys) and self._keys[index] == row[0]:
+                    del self._keys[index]
+
+    def sync_with_database(self, when):
+        """Syncs the index with the queue table in the database. Only the narrow sort fields of new queue rows and the
+        IDs of canceled rows are queried, unless the IDs of all rows need to be reconciled.
+
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        """
+
+        new_rows = Queue.objects.filter(id__gt=self._last_id)
+        for row in new_rows.values_list('id', 'job_type_id', 'priority', 'queued', 'is_canceled').iterator():
+            self._add_row(*row)
+
+        canceled_ids = Queue.objects.filter(is_canceled=True).values_list('id', flat=True)
+        for queue_id in canceled_ids:
+            if queue_id in self._rows:
+                self._rows[queue_id] = self._rows[queue_id][:2] + (True,) + self._rows[queue_id][3:]
+
+        # Rows committed out of ID order or deleted outside of the scheduler change the count
+        count = Queue.objects.count()
+        reconcile = not self._last_reconcile or when - self._last_reconcile >= RECONCILE_PERIOD
+        if count != len(self._rows) or reconcile:
+            self._reconcile(when)
+
+    def _add_row(self, queue_id, job_type_id, priority, queued, is_canceled):
+        """Adds the given queue row to the index
+
+        :param queue_id: The queue ID
+        :type queue_id: int
+        :param job_type_id: The job type ID
+        :type job_type_id: int
+        :param priority: The priority of the queue row
+        :type priority: int
+        :param queued: When the queue row was queued
+        :type queued: :class:`datetime.datetime`
+        :param is_canceled: Whether the queue row is canceled
+        :type is_canceled: bool
+        """
+
+        self._last_id = max(self._last_id, queue_id)
+        if queue_id in self._rows:
+            return
+
+        key = self._get_key(queue_id, priority, queued)
+        self._rows[queue_id] = (key, job_type_id, is_canceled, queued)
+        bisect.insort(self._keys, key)
+
+    def _get_key(self, queue_id, priority, queued):
+        """Returns the sort key for the given queue row in the current order mode
+
+        :param queue_id: The queue ID
+        :type queue_id: int
+        :param priority: The priority of the queue row
+        :type priority: int
+        :param queued: When the queue row was queued
+        :type queued: :class:`datetime.datetime`
+        :returns: The sort key
+        :rtype: tuple
+        """
+
+        delta = queued - EPOCH
+        queued_order = (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+        if self._order_mode == QUEUE_ORDER_LIFO:
+            queued_order = -queued_order
+        return priority, queued_order, queue_id
+
+    def _reconcile(self, when):
+        """Reconciles the IDs of the queue rows in the index with the database
+
+        :param when: The current time
+        :type when: :class:`datetime.datetime`
+        """
+
+        queue_ids = set(Queue.objects.values_list('id', flat=True).iterator())
+        removed_ids = [queue_id for queue_id in self._rows if queue_id not in queue_ids]
+        self.remove_job_exes(removed_ids)
+
+        missing_ids = [queue_id for queue_id in queue_ids if queue_id not in self._rows]
+        if missing_ids:
+            missing_rows = Queue.objects.filter(id__in=missing_ids)
+            for row in missing_rows.values_list('id', 'job_type_id', 'priority', 'queued', 'is_canceled').iterator():
+                self._add_row(*row)
+
+        if removed_ids or missing_ids:
+            logger.debug('Reconciled queue index: removed %d row(s), added %d row(s)', len(removed_ids),
+                         len(missing_ids))
+        self._last_reconcile = when
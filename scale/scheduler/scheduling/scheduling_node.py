@@ -204,6 +204,18 @@ class SchedulingNode(object):
         self._allocated_queued_job_exes = []
         self._allocated_running_job_exes.extend(job_exes)
 
+    def is_watermark_sufficient_to_meet(self, resources):
+        """Indicates whether this node's watermark resources are sufficient to meet the given resources. If not, then
+        this node can never run a task requiring these resources, even if it were reserved.
+
+        :param resources: The resources to check
+        :type resources: :class:`node.resources.node_resources.NodeResources`
+        :returns: True if the watermark resources are sufficient, False otherwise
+        :rtype: bool
+        """
+
+        return self._watermark_resources.is_sufficient_to_meet(resources)
+
     def reset_new_job_exes(self):
         """Resets the allocated new job executions and deallocates any resources associated with them
         """
@@ -277,7 +289,7 @@ class SchedulingNode(object):
         :rtype: int
         """
 
-        return self._score_resources_for_scheduling(job_exe.required_resources, job_type_resources)
+        return self.score_resources_for_scheduling(job_exe.required_resources, job_type_resources)
 
     def score_system_task_for_scheduling(self, system_task, job_type_resources):
         """Returns an integer score (lower is better) indicating how well the given system task fits on this node for
@@ -291,7 +303,7 @@ class SchedulingNode(object):
         :rtype: int
         """
 
-        return self._score_resources_for_scheduling(system_task.get_resources(), job_type_resources)
+        return self.score_resources_for_scheduling(system_task.get_resources(), job_type_resources)
 
     def start_job_exe_tasks(self):
         """Tells the node to start the next task on all scheduled job executions
@@ -303,7 +315,7 @@ class SchedulingNode(object):
                 self.allocated_tasks.append(task)
         self._allocated_running_job_exes = []
 
-    def _score_resources_for_scheduling(self, resources, job_type_resources):
+    def score_resources_for_scheduling(self, resources, job_type_resources):
         """Returns an integer score (lower is better) indicating how well the given resources fit on this node for
         scheduling. If the resources cannot be scheduled on this node, None is returned.
 
@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 
 import logging
 import threading
+import time
 
 from job.models import JobType
 from job.seed.exceptions import InvalidSeedMetadataDefinition
@@ -18,9 +19,12 @@ class JobTypeManager(object):
         """Constructor
         """
 
-        self._job_type_resources = []
+        self._invalid_job_types = {}  # {Job Type ID: Last modified}, job types with an invalid Seed manifest
+        self._job_type_resources = {}  # {Job Type ID: Resources}
         self._job_types = {}  # {Job Type ID: Job Type}
         self._lock = threading.Lock()
+        self._sync_duration = 0.0  # Seconds taken by the last sync
+        self._sync_rows = 0  # Number of job types fetched or removed by the last sync
 
     def generate_status_json(self, status_dict):
         """Generates the portion of the status JSON that describes the job types
@@ -37,6 +41,12 @@ class JobTypeManager(object):
                                  'title': job_type.title, 'description': job_type.description,
                                  'is_system': job_type.is_system, 'icon_code': job_type.icon_code}
                 job_types_list.append(job_type_dict)
+            sync_duration = self._sync_duration
+            sync_rows = self._sync_rows
+
+        if 'scheduler' in status_dict and 'metrics' in status_dict['scheduler']:
+            status_dict['scheduler']['metrics']['job_type_sync_secs'] = round(sync_duration, 3)
+            status_dict['scheduler']['metrics']['job_type_sync_rows'] = sync_rows
 
     def get_job_type(self, job_type_id):
         """Returns the job type with the given ID, possibly None
@@ -60,7 +70,7 @@ class JobTypeManager(object):
         """
 
         with self._lock:
-            return list(self._job_type_resources)
+            return list(self._job_type_resources.values())
 
     def get_job_types(self):
         """Returns a dict of all job types, stored by ID
@@ -72,25 +82,72 @@ class JobTypeManager(object):
         with self._lock:
             return dict(self._job_types)
 
+    def get_sync_stats(self):
+        """Returns the statistics of the last sync with the database
+
+        :returns: The number of seconds the last sync took and the number of job types it fetched or removed
+        :rtype: (float, int)
+        """
+
+        with self._lock:
+            return self._sync_duration, self._sync_rows
+
     def sync_with_database(self):
-        """Syncs with the database to retrieve updated job type models
+        """Syncs with the database to retrieve updated job type models. Only the ID and last modified time of each job
+        type is queried, the full models are only fetched for job types that are new or have been modified since the
+        last sync. Previously synced job types and their resources are reused.
         """
 
-        update_job_type_resources = []
-        updated_job_types = {}
-        for job_type in JobType.objects.all().iterator():
-            try:
-                job_type.title = job_type.get_title()
-                job_type.description = job_type.get_description()
-                updated_job_types[job_type.id] = job_type
-                update_job_type_resources.append(job_type.get_resources())
-            except InvalidSeedMetadataDefinition as ex:
-                logger.exception('Invalid Seed manifest for job type %s-%s, id=%d' % (job_type.name, job_type.version, job_type.id))
-                pass
+        started = time.time()
+
+        with self._lock:
+            updated_job_types = dict(self._job_types)
+            updated_job_type_resources = dict(self._job_type_resources)
+        invalid_job_types = self._invalid_job_types
+
+        # Find the job types that have been added, modified, or removed
+        last_modified = dict(JobType.objects.values_list('id', 'last_modified'))
+        changed_ids = []
+        for job_type_id, modified in last_modified.items():
+            if job_type_id in updated_job_types:
+                if updated_job_types[job_type_id].last_modified != modified:
+                    changed_ids.append(job_type_id)
+            elif invalid_job_types.get(job_type_id) != modified:
+                changed_ids.append(job_type_id)
+        removed_ids = [job_type_id for job_type_id in updated_job_types if job_type_id not in last_modified]
+        for job_type_id in removed_ids:
+            del updated_job_types[job_type_id]
+            del updated_job_type_resources[job_type_id]
+        invalid_job_types = {job_type_id: modified for job_type_id, modified in invalid_job_types.items()
+                             if job_type_id in last_modified}
+
+        if changed_ids:
+            for job_type in JobType.objects.filter(id__in=changed_ids).iterator():
+                updated_job_types.pop(job_type.id, None)
+                updated_job_type_resources.pop(job_type.id, None)
+                try:
+                    job_type.title = job_type.get_title()
+                    job_type.description = job_type.get_description()
+                    updated_job_type_resources[job_type.id] = job_type.get_resources()
+                    updated_job_types[job_type.id] = job_type
+                    invalid_job_types.pop(job_type.id, None)
+                except InvalidSeedMetadataDefinition:
+                    logger.exception('Invalid Seed manifest for job type %s-%s, id=%d' % (job_type.name,
+                                                                                          job_type.version,
+                                                                                          job_type.id))
+                    invalid_job_types[job_type.id] = job_type.last_modified
+
+        duration = time.time() - started
+        rows = len(changed_ids) + len(removed_ids)
+        if rows:
+            logger.debug('Synced %d job type(s) in %.3f seconds', rows, duration)
 
         with self._lock:
-            self._job_type_resources = update_job_type_resources
+            self._invalid_job_types = invalid_job_types
+            self._job_type_resources = updated_job_type_resources
             self._job_types = updated_job_types
+            self._sync_duration = duration
+            self._sync_rows = rows
 
 
 job_type_mgr = JobTypeManager()
@@ -0,0 +1,108 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import django
+from django.test import TestCase
+from mock import MagicMock
+
+import queue.test.utils as queue_test_utils
+from node.resources.node_resources import NodeResources
+from node.resources.gpu_manager import GPUManager
+from node.resources.resource import Cpus, Mem
+from queue.job_exe import QueuedJobExecution
+from scheduler.resources.agent import ResourceSet
+from scheduler.scheduling.node_index import SchedulingNodeIndex
+from scheduler.scheduling.scheduling_node import SchedulingNode
+
+
+class TestSchedulingNodeIndex(TestCase):
+
+    def setUp(self):
+        django.setup()
+        GPUManager.reset_gpu_dict()
+
+    def _create_scheduling_node(self, node_id, offered_resources, watermark_resources):
+        """Creates a scheduling node for testing"""
+
+        node = MagicMock()
+        node.hostname = 'host_%d' % node_id
+        node.id = node_id
+        node.is_ready_for_new_job = MagicMock()
+        node.is_ready_for_new_job.return_value = True
+        node.is_ready_for_next_job_task = MagicMock()
+        node.is_ready_for_next_job_task.return_value = True
+        resource_set = ResourceSet(offered_resources, NodeResources(), watermark_resources)
+        return SchedulingNode('agent_%d' % node_id, node, [], [], resource_set)
+
+    def _create_job_exe(self, cpus, mem, priority=1):
+        """Creates a queued job execution for testing"""
+
+        queue_model = queue_test_utils.create_queue(priority=priority, cpus_required=cpus, mem_required=mem,
+                                                    disk_in_required=0.0, disk_out_required=0.0,
+                                                    disk_total_required=0.0)
+        return QueuedJobExecution(queue_model)
+
+    def test_get_best_node_for_scheduling(self):
+        """Tests calling get_best_node_for_scheduling() successfully"""
+
+        node_1 = self._create_scheduling_node(1, NodeResources([Cpus(10.0), Mem(100.0)]),
+                                              NodeResources([Cpus(10.0), Mem(100.0)]))
+        node_2 = self._create_scheduling_node(2, NodeResources([Cpus(4.0), Mem(100.0)]),
+                                              NodeResources([Cpus(4.0), Mem(100.0)]))
+        node_3 = self._create_scheduling_node(3, NodeResources([Cpus(1.0), Mem(100.0)]),
+                                              NodeResources([Cpus(1.0), Mem(100.0)]))
+        job_type_resources = [NodeResources([Cpus(1.0), Mem(10.0)]), NodeResources([Cpus(4.0), Mem(10.0)])]
+        index = SchedulingNodeIndex({1: node_1, 2: node_2, 3: node_3}, job_type_resources)
+        job_exe = self._create_job_exe(2.0, 10.0)
+
+        # Node 2 is the tightest fit (score of 1) and node 3 does not have enough CPUs
+        self.assertEqual(index.get_best_node_for_scheduling(job_exe).node_id, 2)
+
+    def test_get_best_node_for_scheduling_after_update(self):
+        """Tests calling get_best_node_for_scheduling() after nodes have accepted job executions"""
+
+        node_1 = self._create_scheduling_node(1, NodeResources([Cpus(10.0), Mem(100.0)]),
+                                              NodeResources([Cpus(10.0), Mem(100.0)]))
+        node_2 = self._create_scheduling_node(2, NodeResources([Cpus(4.0), Mem(100.0)]),
+                                              NodeResources([Cpus(4.0), Mem(100.0)]))
+        job_type_resources = [NodeResources([Cpus(1.0), Mem(10.0)]), NodeResources([Cpus(4.0), Mem(10.0)])]
+        index = SchedulingNodeIndex({1: node_1, 2: node_2}, job_type_resources)
+
+        job_exe_1 = self._create_job_exe(2.0, 10.0)
+        best_node = index.get_best_node_for_scheduling(job_exe_1)
+        self.assertEqual(best_node.node_id, 2)
+        self.assertTrue(best_node.accept_new_job_exe(job_exe_1))
+        index.update_node(best_node.node_id)
+
+        job_exe_2 = self._create_job_exe(2.0, 10.0)
+        best_node = index.get_best_node_for_scheduling(job_exe_2)
+        self.assertEqual(best_node.node_id, 2)
+        self.assertTrue(best_node.accept_new_job_exe(job_exe_2))
+        index.update_node(best_node.node_id)
+
+        # Node 2 is now full, so node 1 is the only fit
+        job_exe_3 = self._create_job_exe(2.0, 10.0)
+        self.assertEqual(index.get_best_node_for_scheduling(job_exe_3).node_id, 1)
+
+        # No node can fit this job execution
+        job_exe_4 = self._create_job_exe(20.0, 10.0)
+        self.assertIsNone(index.get_best_node_for_scheduling(job_exe_4))
+
+    def test_get_best_node_for_reservation(self):
+        """Tests calling get_best_node_for_reservation() successfully"""
+
+        node_1 = self._create_scheduling_node(1, NodeResources([Cpus(1.0), Mem(100.0)]),
+                                              NodeResources([Cpus(10.0), Mem(100.0)]))
+        node_2 = self._create_scheduling_node(2, NodeResources([Cpus(1.0), Mem(100.0)]),
+                                              NodeResources([Cpus(50.0), Mem(100.0)]))
+        index = SchedulingNodeIndex({1: node_1, 2: node_2}, [])
+        job_exe = self._create_job_exe(20.0, 10.0)
+
+        self.assertIsNone(index.get_best_node_for_scheduling(job_exe))
+        # Only node 2 has a high enough watermark to be reserved
+        self.assertEqual(index.get_best_node_for_reservation(job_exe).node_id, 2)
+
+        # Once node 2 is removed, no node can be reserved
+        index.remove_node(2)
+        self.assertEqual(len(index), 1)
+        self.assertIsNone(index.get_best_node_for_reservation(job_exe))
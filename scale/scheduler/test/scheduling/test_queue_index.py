@@ -0,0 +1,112 @@
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import datetime
+
+import django
+from django.test import TestCase
+from django.utils.timezone import now
+
+import job.test.utils as job_test_utils
+import queue.test.utils as queue_test_utils
+from queue.models import Queue, QUEUE_ORDER_FIFO, QUEUE_ORDER_LIFO
+from scheduler.scheduling.queue_index import QueueIndex, RECONCILE_PERIOD
+
+
+class TestQueueIndex(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        self.job_type_1 = job_test_utils.create_seed_job_type()
+        self.job_type_2 = job_test_utils.create_seed_job_type()
+        self.when = now()
+        self.queue_1 = queue_test_utils.create_queue(job_type=self.job_type_1, priority=2,
+                                                     queued=self.when - datetime.timedelta(minutes=3))
+        self.queue_2 = queue_test_utils.create_queue(job_type=self.job_type_2, priority=2,
+                                                     queued=self.when - datetime.timedelta(minutes=2))
+        self.queue_3 = queue_test_utils.create_queue(job_type=self.job_type_1, priority=1,
+                                                     queued=self.when - datetime.timedelta(minutes=1))
+
+    def test_get_queue(self):
+        """Tests getting the queue in FIFO and LIFO order"""
+
+        queue_index = QueueIndex()
+        queue_index.sync_with_database(self.when)
+        self.assertEqual(len(queue_index), 3)
+
+        fifo_ids = [job_exe.id for job_exe in queue_index.get_queue(QUEUE_ORDER_FIFO)]
+        self.assertListEqual(fifo_ids, [self.queue_3.id, self.queue_1.id, self.queue_2.id])
+        lifo_ids = [job_exe.id for job_exe in queue_index.get_queue(QUEUE_ORDER_LIFO)]
+        self.assertListEqual(lifo_ids, [self.queue_3.id, self.queue_2.id, self.queue_1.id])
+        fifo_ids = [job_exe.id for job_exe in queue_index.get_queue(QUEUE_ORDER_FIFO)]
+        self.assertListEqual(fifo_ids, [self.queue_3.id, self.queue_1.id, self.queue_2.id])
+
+    def test_get_queue_ignore_and_limit(self):
+        """Tests getting the queue while ignoring job types and limiting the number of queued job executions"""
+
+        queue_index = QueueIndex()
+        queue_index.sync_with_database(self.when)
+
+        queue = queue_index.get_queue(QUEUE_ORDER_FIFO, ignore_job_type_ids=[self.job_type_1.id])
+        self.assertListEqual([job_exe.id for job_exe in queue], [self.queue_2.id])
+        self.assertEqual(queue[0].job_type_id, self.job_type_2.id)
+        queue = queue_index.get_queue(QUEUE_ORDER_FIFO, limit=2)
+        self.assertListEqual([job_exe.id for job_exe in queue], [self.queue_3.id, self.queue_1.id])
+
+    def test_get_queue_reuses_job_exes(self):
+        """Tests that queued job executions at the head of the queue are only loaded once"""
+
+        queue_index = QueueIndex()
+        queue_index.sync_with_database(self.when)
+        queue = queue_index.get_queue(QUEUE_ORDER_FIFO)
+
+        with self.assertNumQueries(0):
+            next_queue = queue_index.get_queue(QUEUE_ORDER_FIFO)
+        self.assertIs(next_queue[0], queue[0])
+
+    def test_sync_new_and_canceled(self):
+        """Tests syncing new and canceled queue rows"""
+
+        queue_index = QueueIndex()
+        queue_index.sync_with_database(self.when)
+        queue_index.get_queue(QUEUE_ORDER_FIFO)
+
+        queue_4 = queue_test_utils.create_queue(job_type=self.job_type_2, priority=1, queued=self.when)
+        Queue.objects.filter(id=self.queue_1.id).update(is_canceled=True)
+        queue_index.sync_with_database(self.when)
+
+        queue = queue_index.get_queue(QUEUE_ORDER_FIFO)
+        self.assertListEqual([job_exe.id for job_exe in queue],
+                             [self.queue_3.id, queue_4.id, self.queue_1.id, self.queue_2.id])
+        self.assertTrue(queue[2].is_canceled)
+        self.assertFalse(queue[0].is_canceled)
+
+    def test_remove_job_exes(self):
+        """Tests removing scheduled queue rows from the index"""
+
+        queue_index = QueueIndex()
+        queue_index.sync_with_database(self.when)
+        queue_index.get_queue(QUEUE_ORDER_FIFO)
+
+        queue_index.remove_job_exes([self.queue_3.id])
+        queue = queue_index.get_queue(QUEUE_ORDER_FIFO)
+        self.assertListEqual([job_exe.id for job_exe in queue], [self.queue_1.id, self.queue_2.id])
+
+    def test_sync_reconcile(self):
+        """Tests that queue rows deleted outside of the scheduler are removed from the index"""
+
+        queue_index = QueueIndex()
+        queue_index.sync_with_database(self.when)
+        queue_index.get_queue(QUEUE_ORDER_FIFO)
+
+        Queue.objects.filter(id=self.queue_1.id).delete()
+        queue_index.sync_with_database(self.when)
+        self.assertEqual(len(queue_index), 2)
+
+        # Queue row deleted while another is added, then the periodic reconcile runs
+        Queue.objects.filter(id=self.queue_2.id).delete()
+        queue_4 = queue_test_utils.create_queue(job_type=self.job_type_2, priority=3, queued=self.when)
+        queue_index.sync_with_database(self.when + RECONCILE_PERIOD)
+        queue = queue_index.get_queue(QUEUE_ORDER_FIFO)
+        self.assertListEqual([job_exe.id for job_exe in queue], [self.queue_3.id, queue_4.id])
@@ -3,6 +3,8 @@ from __future__ import unicode_literals
 import django
 from django.test import TestCase
 
+import job.test.utils as job_test_utils
+from job.models import JobType
 from scheduler.sync.job_type_manager import JobTypeManager
 
 
@@ -22,3 +24,43 @@ class TestJobTypeManager(TestCase):
         manager.generate_status_json(status_dict)
 
         self.assertEqual(len(status_dict['job_types']), 1)
+
+    def test_sync_only_modified(self):
+        """Tests that syncing only fetches job types that were added or modified since the previous sync"""
+
+        manager = JobTypeManager()
+        manager.sync_with_database()
+        self.assertEqual(manager.get_sync_stats()[1], 1)
+
+        # Nothing changed, so the previously synced models should be reused
+        job_types = manager.get_job_types()
+        manager.sync_with_database()
+        self.assertEqual(manager.get_sync_stats()[1], 0)
+        self.assertDictEqual(manager.get_job_types(), job_types)
+        for job_type_id, job_type in manager.get_job_types().items():
+            self.assertIs(job_type, job_types[job_type_id])
+        self.assertEqual(len(manager.get_job_type_resources()), 1)
+
+        # Add a new job type and modify the existing one
+        new_job_type = job_test_utils.create_seed_job_type()
+        job_type = JobType.objects.get(id=list(job_types.keys())[0])
+        job_type.is_paused = True
+        job_type.save()
+        manager.sync_with_database()
+
+        self.assertEqual(manager.get_sync_stats()[1], 2)
+        self.assertEqual(len(manager.get_job_types()), 2)
+        self.assertEqual(len(manager.get_job_type_resources()), 2)
+        self.assertTrue(manager.get_job_type(job_type.id).is_paused)
+        self.assertIsNotNone(manager.get_job_type(new_job_type.id))
+
+    def test_generate_status_json_sync_stats(self):
+        """Tests that the sync statistics are added to the scheduler metrics in the status JSON"""
+
+        manager = JobTypeManager()
+        manager.sync_with_database()
+        status_dict = {'scheduler': {'metrics': {}}}
+        manager.generate_status_json(status_dict)
+
+        self.assertEqual(status_dict['scheduler']['metrics']['job_type_sync_rows'], 1)
+        self.assertIn('job_type_sync_secs', status_dict['scheduler']['metrics'])
@@ -65,7 +65,6 @@ class SyncThread(BaseSchedulerThread):
 
         scheduler_mgr.sync_with_database()
         job_type_mgr.sync_with_database()
-        job_exe_mgr.sync_with_database()
         workspace_mgr.sync_with_database()
 
         node_mgr.sync_with_database(scheduler_mgr.config)
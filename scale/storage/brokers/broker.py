@@ -1,6 +1,11 @@
 """Defines the base broker class"""
+import sys
+import threading
 from abc import ABCMeta
 from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+from six import reraise
 
 """
 FileDownload tuple contains an additional partial flag for defining whether the file
@@ -14,6 +19,28 @@ FileUpload = namedtuple('FileUpload', ['file', 'local_path'])
 FileDetails = namedtuple('FileDetails', ['file', 'size'])
 
 
+class TransferStats(namedtuple('TransferStats', ['num_files', 'num_bytes', 'duration'])):
+    """Summarizes a set of file transfers performed by a broker, the duration is in seconds
+    """
+
+    @property
+    def throughput(self):
+        """The number of bytes transferred per second
+
+        :returns: The throughput in bytes per second
+        :rtype: float
+        """
+
+        if self.duration <= 0:
+            return 0.0
+        return self.num_bytes / float(self.duration)
+
+
+# Pools of threads for transferring files concurrently, stored by broker type and created lazily
+_TRANSFER_POOLS = {}
+_TRANSFER_POOLS_LOCK = threading.Lock()
+
+
 class Broker(object):
     """Abstract class for a broker that can download and upload files for a given storage backend
     """
@@ -95,6 +122,8 @@ class Broker(object):
         :type volume_path: string
         :param file_downloads: List of files to download
         :type file_downloads: [:class:`storage.brokers.broker.FileDownload`]
+        :returns: The statistics for the file transfers if supported by the broker, None otherwise
+        :rtype: :class:`storage.brokers.broker.TransferStats`
 
         :raises :class:`storage.exceptions.MissingFile`: If a file to download does not exist at the expected path
         """
@@ -121,24 +150,25 @@ class Broker(object):
 
         return None
 
-    def list_files(self, volume_path, recursive):
+    def list_files(self, volume_path, recursive, start_after=None):
         """List the files under the given file system paths.
 
         If this broker uses a container volume, volume_path will contain the absolute local container location where
         that volume file system is mounted. If this broker does not use a container volume, None will be given for
         volume_path.
 
-        Retrieval of objects is provided by the boto3 paginator over 
-        list_objects. This allows for simple paging support with unbounded
-        object counts. As a result of the time that may be required for the full
-        result set to be returned, the results are returned via a generator. 
-        This generator will contain objects of type `storage.brokers.broker.FileDetails`.
+        As a result of the time that may be required for the full result set to be returned, the results are streamed
+        via a generator without holding the full listing in memory. This generator will contain objects of type
+        `storage.brokers.broker.FileDetails`. Files are listed in a stable order, so the path of the last file that was
+        processed can be given as start_after to resume an interrupted listing after that file.
 
         :param volume_path: Absolute path to the local container location onto which the volume file system was mounted,
             None if this broker does not use a container volume
         :type volume_path: string
         :param recursive: Flag to indicate whether file searching should be done recursively
         :type recursive: boolean
+        :param start_after: The relative path of the file after which to resume the listing, None to list all files
+        :type start_after: string
         :return: Generator of files matching given expression
         :rtype: Generator[:class:`storage.brokers.broker.FileDetails`]
         """
@@ -165,9 +195,10 @@ class Broker(object):
 
         The file_moves list contains named tuples that each contain a ScaleFile model to be moved and the new relative
         file_path field for the new location of the file. The broker is expected to set the file_path field of each
-        ScaleFile model to its new location (which the broker may alter) and is free to alter any additional fields as
-        necessary. The broker is responsible for saving any changes to models when a move is successful The directories
-        in the new file_path may not exist, so it is the responsibility of the broker to create them if necessary.
+        ScaleFile model to its new location (which the broker may alter) only when the move of that file is
+        successful. The broker must not save the models, the caller saves the new paths of all of the moved files at
+        once. The directories in the new file_path may not exist, so it is the responsibility of the broker to create
+        them if necessary.
 
         If a file does not exist in its expected location, raise a MissingFile exception.
 
@@ -176,6 +207,8 @@ class Broker(object):
         :type volume_path: string
         :param file_moves: List of files to move
         :type file_moves: [:class:`storage.brokers.broker.FileMove`]
+        :returns: The statistics for the file transfers if supported by the broker, None otherwise
+        :rtype: :class:`storage.brokers.broker.TransferStats`
 
         :raises :class:`storage.exceptions.MissingFile`: If a file to move does not exist at the expected path
         """
@@ -194,8 +227,8 @@ class Broker(object):
         local container path where the file currently exists. The broker is free to alter the ScaleFile fields of the
         uploaded files, including the final file_path (the given file_path is a recommendation by Scale that guarantees
         path uniqueness). The ScaleFile models may not have been saved to the database yet and so may not have their id
-        field populated. The broker should perform a model save/update to the database for any files that are
-        successfully uploaded. The directories in the remote file_path may not exist, so it is the responsibility of the
+        field populated. The broker must not save the models, the caller saves all of the models at once after the
+        uploads succeed. The directories in the remote file_path may not exist, so it is the responsibility of the
         broker to create them if necessary.
 
         :param volume_path: Absolute path to the local container location onto which the volume file system was mounted,
@@ -203,6 +236,8 @@ class Broker(object):
         :type volume_path: string
         :param file_uploads: List of files to upload
         :type file_uploads: [:class:`storage.brokers.broker.FileUpload`]
+        :returns: The statistics for the file transfers if supported by the broker, None otherwise
+        :rtype: :class:`storage.brokers.broker.TransferStats`
         """
 
         raise NotImplementedError
@@ -220,6 +255,47 @@ class Broker(object):
 
         raise NotImplementedError
 
+    def _raise_first_error(self, errors):
+        """Re-raises the first error (with its original traceback) from a set of file transfers, if any
+
+        :param errors: The exception info for each file transfer, None for each successful transfer
+        :type errors: list
+        """
+
+        for error in errors:
+            if error:
+                reraise(*error)
+
+    def _transfer_files(self, items, transfer_func, num_threads):
+        """Runs the given transfer function on each item concurrently using a pool of threads shared by all brokers of
+        this type. A single item, or a single thread, transfers on the calling thread.
+
+        :param items: The items to transfer
+        :type items: list
+        :param transfer_func: The function that transfers a single item
+        :type transfer_func: function
+        :param num_threads: The number of threads for transferring files concurrently
+        :type num_threads: int
+        :returns: The exception info for each item, None for each successful transfer
+        :rtype: list
+        """
+
+        def transfer(item):
+            try:
+                transfer_func(item)
+            except Exception:
+                return sys.exc_info()
+            return None
+
+        if len(items) <= 1 or num_threads <= 1:
+            return [transfer(item) for item in items]
+
+        with _TRANSFER_POOLS_LOCK:
+            if self._broker_type not in _TRANSFER_POOLS:
+                _TRANSFER_POOLS[self._broker_type] = ThreadPool(num_threads)
+            pool = _TRANSFER_POOLS[self._broker_type]
+        return pool.map(transfer, items, 1)
+
 
 class BrokerVolume(object):
     """Represents the properties of a container volume that must be mounted into the container for a broker to work
@@ -5,6 +5,12 @@ import logging
 import os
 import shutil
 
+try:
+    from os import scandir
+except ImportError:
+    # Backport of os.scandir() for Python 2
+    from scandir import scandir
+
 from storage.brokers.broker import Broker, BrokerVolume, FileDetails
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.exceptions import MissingFile
@@ -63,34 +69,50 @@ class HostBroker(Broker):
             paths.append(os.path.join(volume_path, scale_file.file_path))
         return paths
 
-    def list_files(self, volume_path, recursive):
+    def list_files(self, volume_path, recursive, start_after=None):
         """See :meth:`storage.brokers.broker.Broker.list_files`
         """
 
-        for file_name in self._dir_walker(volume_path, recursive):
-            if os.path.isfile(file_name):
-                # Strip down to a workspace relative path to the file, not an absolute path
-                relative_file_name = os.path.relpath(file_name, volume_path)
-                yield FileDetails(relative_file_name, os.path.getsize(file_name))
+        start_after_names = start_after.split(os.sep) if start_after else None
+        for file_name, file_size in self._dir_walker(volume_path, recursive, start_after_names):
+            # Strip down to a workspace relative path to the file, not an absolute path
+            relative_file_name = os.path.relpath(file_name, volume_path)
+            yield FileDetails(relative_file_name, file_size)
 
     @staticmethod
-    def _dir_walker(path, recursive):
-        """Generator to handle both flat and recursive directory traversal
+    def _dir_walker(path, recursive, start_after_names=None):
+        """Generator to handle both flat and recursive directory traversal. Entries are walked in sorted order and the
+        size of each file comes from its directory entry, so each file is only stat'ed once.
         
         :param path: The path to the directory tree to walk
         :type path: string
         :param recursive: Whether directory walk is only at path or recursive
         :type recursive: bool
+        :param start_after_names: The names (relative to path) of the directories and file after which to resume the
+            walk, None to walk all files
+        :type start_after_names: [string]
+        :return: Generator of the absolute path and size of each file
+        :rtype: Generator[tuple]
         """
-        # Handle a full recursive walk of the directory tree.
-        if recursive:
-            for root, dirs, files in os.walk(path):
-                for name in files:
-                    yield os.path.join(root, name)
-        # Handle identifying files only from a single directory.
-        else:
-            for result in os.listdir(path):
-                yield os.path.join(path, result)
+
+        for entry in sorted(scandir(path), key=lambda dir_entry: dir_entry.name):
+            resume_names = None
+            if start_after_names:
+                if entry.name < start_after_names[0]:
+                    continue
+                if entry.name == start_after_names[0]:
+                    if len(start_after_names) == 1:
+                        # This is the file the walk resumes after
+                        continue
+                    resume_names = start_after_names[1:]
+
+            # Handle a full recursive walk of the directory tree, symbolic links to directories are not followed
+            if entry.is_dir(follow_symlinks=False):
+                if recursive:
+                    for result in HostBroker._dir_walker(entry.path, recursive, resume_names):
+                        yield result
+            elif resume_names is None and entry.is_file():
+                yield entry.path, entry.stat().st_size
 
     def load_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.load_configuration`
@@ -124,7 +146,6 @@ class HostBroker(Broker):
 
             # Update model attributes
             file_move.file.file_path = file_move.new_path
-            file_move.file.save()
 
     def upload_files(self, volume_path, file_uploads):
         """See :meth:`storage.brokers.broker.Broker.upload_files`
@@ -143,9 +164,6 @@ class HostBroker(Broker):
             logger.info('Setting file permissions for %s', path_to_upload)
             os.chmod(path_to_upload, 0644)
 
-            # Create new model
-            file_upload.file.save()
-
     def validate_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.validate_configuration`
         """
@@ -1,10 +1,14 @@
 """Defines an NFS broker that utilizes a network file system as its backend storage"""
 from __future__ import unicode_literals
 
+import fcntl
 import logging
 import os
 import shutil
+import threading
+import time
 
+import storage.settings as settings
 from storage.brokers.broker import Broker, BrokerVolume
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.exceptions import MissingFile
@@ -13,6 +17,60 @@ from util.os_helper import makedirs
 
 logger = logging.getLogger(__name__)
 
+# The ioctl request that clones (reflinks) the contents of one file into another on file systems that share extents
+FICLONE = 0x40049409
+
+# Cached NFS mount table, stored by mount point, and when it was read
+_MOUNT_TABLE = None
+_MOUNT_TABLE_READ = 0.0
+_MOUNT_TABLE_LOCK = threading.Lock()
+
+
+def get_mount_table():
+    """Returns the NFS mounts of this process, stored by mount point. The table is parsed from /proc/<pid>/mountinfo
+    and cached until it is older than the NFS_MOUNT_TABLE_TTL setting. Volumes are mounted by the container runtime
+    rather than by Scale, so expiring is the only way the table is refreshed.
+
+    :returns: The NFS server spec ('server:/path/on/server') stored by mount point
+    :rtype: dict
+    """
+
+    global _MOUNT_TABLE
+    global _MOUNT_TABLE_READ
+
+    with _MOUNT_TABLE_LOCK:
+        if _MOUNT_TABLE is None or time.time() - _MOUNT_TABLE_READ > settings.NFS_MOUNT_TABLE_TTL:
+            _MOUNT_TABLE = _read_mount_table()
+            _MOUNT_TABLE_READ = time.time()
+        return _MOUNT_TABLE
+
+
+def _read_mount_table():
+    """Reads and parses the NFS mounts of this process from /proc/<pid>/mountinfo
+
+    :returns: The NFS server spec ('server:/path/on/server') stored by mount point
+    :rtype: dict
+    """
+
+    mnt_table = {}
+    with open('/proc/%d/mountinfo' % os.getpid(), 'rt') as mountinfo:
+        lines = mountinfo.readlines()
+    for l in lines:
+        try:
+            l = l.strip().split()
+            mntpnt = l[4]
+            while l[0] != '-':
+                l.pop(0)
+            l.pop(0)
+            typ = l.pop(0)
+            if typ in ('nfs', 'nfs4'):
+                # Later entries are mounted over earlier ones at the same mount point
+                mnt_table[mntpnt] = l[0]
+        except IndexError:
+            # The indices will be present for nfs and nfs4 entries so if we don't have all the items, we can ignore
+            pass
+    return mnt_table
+
 
 class NfsBroker(Broker):
     """Broker that utilizes the docker-volume-netshare plugin (https://github.com/gondor/docker-volume-netshare) to
@@ -44,16 +102,9 @@ class NfsBroker(Broker):
         """See :meth:`storage.brokers.broker.Broker.download_files`
         """
 
-        for file_download in file_downloads:
-            path_to_download = os.path.join(volume_path, file_download.file.file_path)
-
-            logger.info('Checking path %s', path_to_download)
-            if not os.path.exists(path_to_download):
-                raise MissingFile(file_download.file.file_name)
-
-            # Create symlink to the file in the host mount
-            logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
-            execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
+        errors = self._transfer_files(file_downloads, lambda file_download: self._download_file(
+            volume_path, file_download), settings.NFS_TRANSFER_THREADS)
+        self._raise_first_error(errors)
 
     def get_file_system_paths(self, volume_path, files):
         """See :meth:`storage.brokers.broker.Broker.get_file_system_paths`
@@ -74,47 +125,22 @@ class NfsBroker(Broker):
         """See :meth:`storage.brokers.broker.Broker.move_files`
         """
 
-        for file_move in file_moves:
-            full_old_path = os.path.join(volume_path, file_move.file.file_path)
-            full_new_path = os.path.join(volume_path, file_move.new_path)
-            full_new_path_dir = os.path.dirname(full_new_path)
-
-            logger.info('Checking path %s', full_old_path)
-            if not os.path.exists(full_old_path):
-                raise MissingFile(file_move.file.file_name)
-
-            if not os.path.exists(full_new_path_dir):
-                logger.info('Creating %s', full_new_path_dir)
-                makedirs(full_new_path_dir, mode=0755)
-
-            logger.info('Moving %s to %s', full_old_path, full_new_path)
-            shutil.move(full_old_path, full_new_path)
-            logger.info('Setting file permissions for %s', full_new_path)
-            os.chmod(full_new_path, 0644)
+        errors = self._transfer_files(file_moves, lambda file_move: self._move_file(volume_path, file_move),
+                                      settings.NFS_TRANSFER_THREADS)
 
-            # Update model attributes
-            file_move.file.file_path = file_move.new_path
-            file_move.file.save()
+        # Update model attributes for each successful move
+        for file_move, error in zip(file_moves, errors):
+            if not error:
+                file_move.file.file_path = file_move.new_path
+        self._raise_first_error(errors)
 
     def upload_files(self, volume_path, file_uploads):
         """See :meth:`storage.brokers.broker.Broker.upload_files`
         """
 
-        for file_upload in file_uploads:
-            path_to_upload = os.path.join(volume_path, file_upload.file.file_path)
-            path_to_upload_dir = os.path.dirname(path_to_upload)
-
-            if not os.path.exists(path_to_upload_dir):
-                logger.info('Creating %s', path_to_upload_dir)
-                makedirs(path_to_upload_dir, mode=0755)
-
-            logger.info('Copying %s to %s', file_upload.local_path, path_to_upload)
-            self._copy_file(file_upload.local_path, path_to_upload)
-            logger.info('Setting file permissions for %s', path_to_upload)
-            os.chmod(path_to_upload, 0644)
-
-            # Create new model
-            file_upload.file.save()
+        errors = self._transfer_files(file_uploads, lambda file_upload: self._upload_file(volume_path, file_upload),
+                                      settings.NFS_TRANSFER_THREADS)
+        self._raise_first_error(errors)
 
     def validate_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.validate_configuration`
@@ -138,7 +164,14 @@ class NfsBroker(Broker):
             logger.info('%s is a link to %s', src_path, real_path)
             src_path = real_path
             logger.info('Copying %s to %s', src_path, dest_path)
-        # Attempt bbcp copy first. If it fails, we'll fallback to cp
+
+        # Within the same file system, try to share the file data with a new destination instead of copying it. The
+        # source is not hard linked since it may still be modified, and a clone keeps its own copy of changed data.
+        if not os.path.exists(dest_path) and self._is_same_file_system(src_path, dest_path):
+            if self._clone_file(src_path, dest_path):
+                return
+
+        # Attempt bbcp copy next. If it fails, we'll fallback to cp
         try:
             # TODO: detect bbcp location instead of assuming /usr/local and don't even try to execute if it isn't
             # installed
@@ -159,6 +192,50 @@ class NfsBroker(Broker):
         logger.info('Fall back to cp for %s', src_path)
         shutil.copy(src_path, dest_path)
 
+    def _clone_file(self, src_path, dest_path):
+        """Attempts to clone (reflink) the source file into the destination so that the two files share their data
+        until either is modified. This is only supported by some file systems (such as XFS, Btrfs and NFS 4.2).
+
+        :param src_path: The absolute path to the source file
+        :type src_path: str
+        :param dest_path: The absolute path to the destination
+        :type dest_path: str
+        :returns: True if the file was cloned, False otherwise
+        :rtype: bool
+        """
+
+        try:
+            with open(src_path, 'rb') as src_file:
+                with open(dest_path, 'wb') as dest_file:
+                    fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+        except (IOError, OSError):
+            # Remove the empty destination so that the file is copied normally
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+            return False
+
+        logger.info('Cloned %s to %s', src_path, dest_path)
+        return True
+
+    def _download_file(self, volume_path, file_download):
+        """Downloads a single file by linking to it in the mounted volume. This is run on a transfer thread.
+
+        :param volume_path: Absolute path to the local container location onto which the volume was mounted
+        :type volume_path: string
+        :param file_download: The file to download
+        :type file_download: :class:`storage.brokers.broker.FileDownload`
+        """
+
+        path_to_download = os.path.join(volume_path, file_download.file.file_path)
+
+        logger.info('Checking path %s', path_to_download)
+        if not os.path.exists(path_to_download):
+            raise MissingFile(file_download.file.file_name)
+
+        # Create symlink to the file in the host mount
+        logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
+        execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
+
     def _get_mount_info(self, *args):
         """Determine what filesystem contains a path and if it's an nfs filesystem return the mount spec and server.
 
@@ -169,39 +246,89 @@ class NfsBroker(Broker):
         :rtype: list of tuple
         """
 
-        # create a list of nfs mounts from proc/mountinfo
-        mnt_table = []
-        for l in open('/proc/%d/mountinfo' % os.getpid(), 'rt').readlines():
-            try:
-                l = l.strip().split()
-                mntpnt = l[4]
-                while l[0] != '-':
-                    l.pop(0)
-                    l.pop(0)
-                    typ = l.pop(0)
-                    if typ.startswith('nfs'):
-                        srv = l[0]
-                        mnt_table.append((mntpnt, srv))
-            except IndexError:
-                # The indices will be present for nfs and nfs4 entries so if we don't have all the items, we can ignore
-                pass
-        # sort by length of mount point. Longest mount points (number of nested directories) are first in case we have
-        # items mounted within an nfs mount tree
-        mnt_table.sort(cmp=lambda a, b: cmp(len(a[0].split(os.sep)), len(b[0].split(os.sep))), reverse=True)
+        mnt_table = get_mount_table()
 
         rval = []
         for pth in args:
             # make sure we have an absolute path when checking mount points
             pth = os.path.abspath(pth)
 
-            # find the first matching mount point and return its info
-            found = False
-            for mntpnt, srv in mnt_table:
-                if os.path.commonprefix([mntpnt, pth]) == mntpnt:
-                    pth = os.path.relpath(pth, mntpnt)
-                    rval.append((srv, pth))
-                    found = True
+            # walk up the path to find the deepest mount point that contains it, in case we have items mounted within
+            # an nfs mount tree
+            mntpnt = pth
+            while mntpnt not in mnt_table:
+                parent = os.path.dirname(mntpnt)
+                if parent == mntpnt:
+                    mntpnt = None
                     break
-            if not found:
+                mntpnt = parent
+
+            if mntpnt is None:
                 rval.append((None, pth))
+            else:
+                rval.append((mnt_table[mntpnt], os.path.relpath(pth, mntpnt)))
         return rval
+
+    def _is_same_file_system(self, src_path, dest_path):
+        """Indicates whether the source file and the directory of the destination are on the same file system
+
+        :param src_path: The absolute path to the source file
+        :type src_path: str
+        :param dest_path: The absolute path to the destination
+        :type dest_path: str
+        :returns: True if both paths are on the same file system, False otherwise
+        :rtype: bool
+        """
+
+        try:
+            return os.stat(src_path).st_dev == os.stat(os.path.dirname(os.path.abspath(dest_path))).st_dev
+        except OSError:
+            return False
+
+    def _move_file(self, volume_path, file_move):
+        """Moves a single file within the mounted volume, which is a rename when the paths are on the same file system.
+        This is run on a transfer thread.
+
+        :param volume_path: Absolute path to the local container location onto which the volume was mounted
+        :type volume_path: string
+        :param file_move: The file to move
+        :type file_move: :class:`storage.brokers.broker.FileMove`
+        """
+
+        full_old_path = os.path.join(volume_path, file_move.file.file_path)
+        full_new_path = os.path.join(volume_path, file_move.new_path)
+        full_new_path_dir = os.path.dirname(full_new_path)
+
+        logger.info('Checking path %s', full_old_path)
+        if not os.path.exists(full_old_path):
+            raise MissingFile(file_move.file.file_name)
+
+        if not os.path.exists(full_new_path_dir):
+            logger.info('Creating %s', full_new_path_dir)
+            makedirs(full_new_path_dir, mode=0755)
+
+        logger.info('Moving %s to %s', full_old_path, full_new_path)
+        shutil.move(full_old_path, full_new_path)
+        logger.info('Setting file permissions for %s', full_new_path)
+        os.chmod(full_new_path, 0644)
+
+    def _upload_file(self, volume_path, file_upload):
+        """Uploads a single file into the mounted volume. This is run on a transfer thread.
+
+        :param volume_path: Absolute path to the local container location onto which the volume was mounted
+        :type volume_path: string
+        :param file_upload: The file to upload
+        :type file_upload: :class:`storage.brokers.broker.FileUpload`
+        """
+
+        path_to_upload = os.path.join(volume_path, file_upload.file.file_path)
+        path_to_upload_dir = os.path.dirname(path_to_upload)
+
+        if not os.path.exists(path_to_upload_dir):
+            logger.info('Creating %s', path_to_upload_dir)
+            makedirs(path_to_upload_dir, mode=0755)
+
+        logger.info('Copying %s to %s', file_upload.local_path, path_to_upload)
+        self._copy_file(file_upload.local_path, path_to_upload)
+        logger.info('Setting file permissions for %s', path_to_upload)
+        os.chmod(path_to_upload, 0644)
@@ -6,20 +6,21 @@ import os
 import ssl
 import time
 
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError, NoCredentialsError
+from django.utils.timezone import now
 
 import storage.settings as settings
-from storage.brokers.broker import Broker, BrokerVolume
+from storage.brokers.broker import Broker, BrokerVolume, TransferStats
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.exceptions import MissingFile
 from util.aws import S3Client, AWSClient
 from util.command import execute_command_line
-from util.exceptions import FileDoesNotExist
+from util.exceptions import FileDeleteFailed, FileDoesNotExist
 from util.validation import ValidationWarning
 
 logger = logging.getLogger(__name__)
 
-
 class S3Broker(Broker):
     """Broker that utilizes the AWS Boto library to read/write files to S3 cloud storage."""
 
@@ -36,48 +37,62 @@ class S3Broker(Broker):
         """See :meth:`storage.brokers.broker.Broker.delete_files`"""
 
         with S3Client(self._credentials, self._region_name) as client:
-            for scale_file in files:
-                s3_object = client.get_object(self._bucket_name, scale_file.file_path)
+            failed_keys = self._delete_files(client, [scale_file.file_path for scale_file in files])
+
+        deleted_files = [scale_file for scale_file in files if scale_file.file_path not in failed_keys]
+        if update_model and deleted_files:
+            from storage.models import ScaleFile
 
-                self._delete_file(s3_object, scale_file)
+            # Update model attributes with a single bulk update
+            when = now()
+            for scale_file in deleted_files:
+                scale_file.set_deleted(when)
+            ScaleFile.objects.set_files_deleted([scale_file.id for scale_file in deleted_files], when)
 
-                if update_model:
-                    # Update model attributes
-                    scale_file.set_deleted()
-                    scale_file.save()
+        if failed_keys:
+            for key_name, error in failed_keys.items():
+                logger.error('Failed to delete %s: %s', key_name, error)
+            raise FileDeleteFailed('Failed to delete %d of %d file(s) from S3' % (len(failed_keys), len(files)))
 
     def download_files(self, volume_path, file_downloads):
         """See :meth:`storage.brokers.broker.Broker.download_files`"""
 
-        with S3Client(self._credentials, self._region_name) as client:
-            for file_download in file_downloads:
-                # If file supports partial mount and volume is configured attempt sym-link
-                if file_download.partial and self._volume:
-                    logger.debug('Partial S3 file accessed by mounted bucket.')
-                    path_to_download = os.path.join(volume_path, file_download.file.file_path)
-
-                    logger.info('Checking path %s', path_to_download)
-                    if not os.path.exists(path_to_download):
-                        raise MissingFile(file_download.file.file_name)
-
-                    # Create symlink to the file in the host mount
-                    logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
-                    execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
-                # Fall-back to default S3 file download
-                else:
-                    try:
-                        s3_object = client.get_object(self._bucket_name, file_download.file.file_path)
-                    except FileDoesNotExist:
-                        raise MissingFile(file_download.file.file_name)
-
-                    self._download_file(s3_object, file_download.file, file_download.local_path)
-
-    def list_files(self, volume_path, recursive):
+        started = time.time()
+        s3_downloads = []
+        for file_download in file_downloads:
+            # If file supports partial mount and volume is configured attempt sym-link
+            if file_download.partial and self._volume:
+                logger.debug('Partial S3 file accessed by mounted bucket.')
+                path_to_download = os.path.join(volume_path, file_download.file.file_path)
+
+                logger.info('Checking path %s', path_to_download)
+                if not os.path.exists(path_to_download):
+                    raise MissingFile(file_download.file.file_name)
+
+                # Create symlink to the file in the host mount
+                logger.info('Creating link %s -> %s', file_download.local_path, path_to_download)
+                execute_command_line(['ln', '-s', path_to_download, file_download.local_path])
+            # Fall-back to default S3 file download
+            else:
+                s3_downloads.append(file_download)
+
+        if s3_downloads:
+            with self._create_client() as client:
+                transfer_config = self._create_transfer_config()
+                errors = self._transfer_files(s3_downloads, lambda file_download: self._download_file(
+                    client, file_download.file, file_download.local_path, transfer_config),
+                    settings.S3_TRANSFER_THREADS)
+            self._raise_first_error(errors)
+
+        return self._report_stats('Downloaded', [file_download.file for file_download in s3_downloads], started)
+
+    def list_files(self, volume_path, recursive, start_after=None):
         """See :meth:`storage.brokers.broker.Broker.list_files`
         """
 
         with S3Client(self._credentials, self._region_name) as client:
-            return client.list_objects(self._bucket_name, recursive, volume_path)
+            for file_details in client.list_objects(self._bucket_name, recursive, volume_path, start_after):
+                yield file_details
 
     def load_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.load_configuration`"""
@@ -97,31 +112,31 @@ class S3Broker(Broker):
     def move_files(self, volume_path, file_moves):
         """See :meth:`storage.brokers.broker.Broker.move_files`"""
 
-        with S3Client(self._credentials, self._region_name) as client:
-            for file_move in file_moves:
-                try:
-                    s3_object_src = client.get_object(self._bucket_name, file_move.file.file_path)
-                except FileDoesNotExist:
-                    raise MissingFile(file_move.file.file_name)
-                s3_object_dest = client.get_object(self._bucket_name, file_move.new_path, False)
-
-                self._move_file(s3_object_src, s3_object_dest, file_move.file, file_move.new_path)
+        started = time.time()
+        with self._create_client() as client:
+            transfer_config = self._create_transfer_config()
+            errors = self._transfer_files(file_moves, lambda file_move: self._move_file(
+                client, file_move.file, file_move.new_path, transfer_config), settings.S3_TRANSFER_THREADS)
 
-                # Update model attributes
+        # Update model attributes for each successful move
+        for file_move, error in zip(file_moves, errors):
+            if not error:
                 file_move.file.file_path = file_move.new_path
-                file_move.file.save()
+        self._raise_first_error(errors)
+
+        return self._report_stats('Moved', [file_move.file for file_move in file_moves], started)
 
     def upload_files(self, volume_path, file_uploads):
         """See :meth:`storage.brokers.broker.Broker.upload_files`"""
 
-        with S3Client(self._credentials, self._region_name) as client:
-            for file_upload in file_uploads:
-                s3_object = client.get_object(self._bucket_name, file_upload.file.file_path, False)
-
-                self._upload_file(s3_object, file_upload.file, file_upload.local_path)
+        started = time.time()
+        with self._create_client() as client:
+            transfer_config = self._create_transfer_config()
+            errors = self._transfer_files(file_uploads, lambda file_upload: self._upload_file(
+                client, file_upload.file, file_upload.local_path, transfer_config), settings.S3_TRANSFER_THREADS)
+        self._raise_first_error(errors)
 
-                # Create new model
-                file_upload.file.save()
+        return self._report_stats('Uploaded', [file_upload.file for file_upload in file_uploads], started)
 
     def validate_configuration(self, config):
         """See :meth:`storage.brokers.broker.Broker.validate_configuration`"""
@@ -143,54 +158,85 @@ class S3Broker(Broker):
 
         return warnings
 
-    def _delete_file(self, s3_object, scale_file, retries=settings.S3_RETRY_COUNT):
-        """Deletes a file from the S3 file system.
+    def _create_client(self):
+        """Creates a client that can be shared by all of the transfer threads
 
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
+        :returns: The S3 client
+        :rtype: :class:`util.aws.S3Client`
+        """
 
-        :param s3_object: The S3 object representing the file to delete.
-        :type s3_object: :class:`boto3.s3.Object`
-        :param scale_file: The model associated with the file to delete.
-        :type scale_file: :class:`storage.models.ScaleFile`
+        # Every transfer thread may use multiple connections for a multipart transfer
+        max_pool_connections = settings.S3_TRANSFER_THREADS * settings.S3_MULTIPART_CONCURRENCY
+        return S3Client(self._credentials, self._region_name, max_pool_connections)
+
+    def _create_transfer_config(self):
+        """Creates the configuration for multipart transfers of large files
+
+        :returns: The transfer configuration
+        :rtype: :class:`boto3.s3.transfer.TransferConfig`
         """
 
-        logger.info('Deleting %s', scale_file.file_path)
+        return TransferConfig(multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+                              multipart_chunksize=settings.S3_MULTIPART_CHUNKSIZE,
+                              max_concurrency=settings.S3_MULTIPART_CONCURRENCY)
+
+    def _delete_files(self, client, key_names, retries=settings.S3_RETRY_COUNT):
+        """Deletes files from the S3 file system using multi-object delete requests.
+
+        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
+        Deleting a file that was already deleted succeeds, so the entire delete is retried.
+
+        :param client: The S3 client
+        :type client: :class:`util.aws.S3Client`
+        :param key_names: The paths of the files to delete.
+        :type key_names: [string]
+        :returns: The error message for each path that could not be deleted, stored by path
+        :rtype: dict
+        """
+
+        logger.info('Deleting %d file(s)', len(key_names))
         for attempt in range(retries):
             try:
-                s3_object.delete()
-                return
+                return client.delete_objects(self._bucket_name, key_names)
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
                 logger.exception('Retrying S3 delete attempt: %i', attempt + 1)
 
-    def _download_file(self, s3_object, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Downloads a file in S3 storage to the local file system.
+    def _download_file(self, client, scale_file, path, transfer_config, retries=settings.S3_RETRY_COUNT):
+        """Downloads a file in S3 storage to the local file system. This is run on a transfer thread.
 
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
+        This method will attempt to retry the download if :class:`ssl.SSLError` is raised up to a number of retries
+        given.
 
-        :param s3_object: The S3 object representing the file to download.
-        :type s3_object: :class:`boto3.s3.Object`
+        :param client: The S3 client
+        :type client: :class:`util.aws.S3Client`
         :param scale_file: The model associated with the file to download.
         :type scale_file: :class:`storage.models.ScaleFile`
         :param path: The destination path for the file download.
         :type path: string
+        :param transfer_config: The configuration for multipart transfers
+        :type transfer_config: :class:`boto3.s3.transfer.TransferConfig`
+
+        :raises :class:`storage.exceptions.MissingFile`: If the file does not exist in S3
         """
 
         logger.info('Downloading %s -> %s', scale_file.file_path, path)
         for attempt in range(retries):
             try:
-                s3_object.download_file(path)
+                client.download_file(self._bucket_name, scale_file.file_path, path, transfer_config)
                 return
+            except FileDoesNotExist:
+                raise MissingFile(scale_file.file_name)
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
                 logger.exception('Retrying S3 download attempt: %i', attempt + 1)
 
-    def _move_file(self, s3_object_src, s3_object_dest, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Moves a file within the S3 file system.
+    def _move_file(self, client, scale_file, path, transfer_config, retries=settings.S3_RETRY_COUNT):
+        """Moves a file within the S3 file system. This is run on a transfer thread.
 
         Note that S3 does not support an atomic move, so this operation is implemented as a copy and delete.
 
@@ -198,22 +244,20 @@ class S3Broker(Broker):
         Note that since S3 does not support an atomic move, this method copies the file to the new destination and then
         attempts to delete the original file content.
 
-        :param s3_object_src: The S3 object representing the source of the file to move.
-        :type s3_object_src: :class:`boto3.s3.Object`
-        :param s3_object_dest: The S3 object representing the destination of the file to move.
-        :type s3_object_dest: :class:`boto3.s3.Object`
+        :param client: The S3 client
+        :type client: :class:`util.aws.S3Client`
         :param scale_file: The model associated with the file to move.
         :type scale_file: :class:`storage.models.ScaleFile`
         :param path: The destination path for the file move.
         :type path: string
+        :param transfer_config: The configuration for multipart transfers
+        :type transfer_config: :class:`boto3.s3.transfer.TransferConfig`
+
+        :raises :class:`storage.exceptions.MissingFile`: If the file does not exist in S3
         """
 
         logger.info('Copying %s -> %s', scale_file.file_path, path)
         options = dict()
-        options['CopySource'] = {
-            'Bucket': s3_object_src.bucket_name,
-            'Key': s3_object_src.key,
-        }
         options['StorageClass'] = settings.S3_STORAGE_CLASS
         if settings.S3_SERVER_SIDE_ENCRYPTION:
             options['ServerSideEncryption'] = settings.S3_SERVER_SIDE_ENCRYPTION
@@ -222,27 +266,60 @@ class S3Broker(Broker):
 
         for attempt in range(retries):
             try:
-                s3_object_dest.copy_from(**options)
+                client.copy_object(self._bucket_name, scale_file.file_path, path, options, transfer_config)
                 break
+            except FileDoesNotExist:
+                raise MissingFile(scale_file.file_name)
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
                 logger.exception('Retrying S3 copy attempt: %i', attempt + 1)
 
-        self._delete_file(s3_object_src, scale_file)
+        logger.info('Deleting %s', scale_file.file_path)
+        for attempt in range(retries):
+            try:
+                client.delete_object(self._bucket_name, scale_file.file_path)
+                return
+            except ssl.SSLError:
+                if attempt + 1 >= retries:
+                    raise
+                time.sleep(settings.S3_RETRY_DELAY * attempt)
+                logger.exception('Retrying S3 delete attempt: %i', attempt + 1)
 
-    def _upload_file(self, s3_object, scale_file, path, retries=settings.S3_RETRY_COUNT):
-        """Uploads a file in local storage to the S3 remote file system.
+    def _report_stats(self, action, files, started):
+        """Logs and returns the statistics for a set of successful file transfers
+
+        :param action: The transfer action for the log message
+        :type action: string
+        :param files: The models associated with the transferred files
+        :type files: [:class:`storage.models.ScaleFile`]
+        :param started: When the transfers started, in seconds since the epoch
+        :type started: float
+        :returns: The transfer statistics
+        :rtype: :class:`storage.brokers.broker.TransferStats`
+        """
 
-        This method will attempt to retry the delete if :class:`ssl.SSLError` is raised up to a number of retries given.
+        num_bytes = sum(scale_file.file_size or 0 for scale_file in files)
+        stats = TransferStats(len(files), num_bytes, time.time() - started)
+        if files:
+            logger.info('%s %d file(s) (%d bytes) in %.3f seconds (%.1f MiB/s)', action, stats.num_files,
+                        stats.num_bytes, stats.duration, stats.throughput / (1024 * 1024))
+        return stats
+
+    def _upload_file(self, client, scale_file, path, transfer_config, retries=settings.S3_RETRY_COUNT):
+        """Uploads a file in local storage to the S3 remote file system. This is run on a transfer thread.
+
+        This method will attempt to retry the upload if :class:`ssl.SSLError` is raised up to a number of retries given.
 
-        :param s3_object: The S3 object representing the file to upload.
-        :type s3_object: :class:`boto3.s3.Object`
+        :param client: The S3 client
+        :type client: :class:`util.aws.S3Client`
         :param scale_file: The model associated with the file to upload.
         :type scale_file: :class:`storage.models.ScaleFile`
         :param path: The source path for the file upload.
         :type path: string
+        :param transfer_config: The configuration for multipart transfers
+        :type transfer_config: :class:`boto3.s3.transfer.TransferConfig`
         """
 
         options = dict()
@@ -255,10 +332,10 @@ class S3Broker(Broker):
         logger.info('Uploading %s -> %s', path, scale_file.file_path)
         for attempt in range(retries):
             try:
-                s3_object.upload_file(path, options)
+                client.upload_file(self._bucket_name, scale_file.file_path, path, options, transfer_config)
                 return
             except ssl.SSLError:
-                if attempt >= retries:
+                if attempt + 1 >= retries:
                     raise
                 time.sleep(settings.S3_RETRY_DELAY * attempt)
                 logger.exception('Retrying S3 upload attempt: %i', attempt + 1)
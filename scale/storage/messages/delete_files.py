@@ -90,6 +90,12 @@ class DeleteFiles(CommandMessage):
 
         return len(self._file_ids) < MAX_NUM
 
+    def get_serialization_keys(self):
+        """See :meth:`messaging.messages.message.CommandMessage.get_serialization_keys`
+        """
+
+        return {('job', self.job_id)} if self.job_id is not None else set()
+
     def to_json(self):
         """See :meth:`messaging.messages.message.CommandMessage.to_json`
         """
@@ -141,6 +147,6 @@ class DeleteFiles(CommandMessage):
                                                                 trigger_id=self.trigger_id,
                                                                 source_file_id=self.source_file_id))
         else:
-            files_to_delete.update(is_deleted=True, deleted=when, is_published=False, unpublished=when)
+            ScaleFile.objects.set_files_deleted(self._file_ids, when)
 
         return True
@@ -11,7 +11,7 @@ import django.contrib.gis.db.models as models
 import django.contrib.gis.geos as geos
 import django.utils.timezone as timezone
 import django.contrib.postgres.fields
-from django.db import transaction
+from django.db import connection, transaction
 
 import storage.geospatial_utils as geospatial_utils
 from storage.brokers.factory import get_broker
@@ -471,6 +471,22 @@ class ScaleFileManager(models.Manager):
 
         return self.filter(id__in=file_ids).only('id', 'file_size', 'source_started', 'source_ended').iterator()
 
+    def get_files_for_input_metadata(self, file_ids):
+        """Returns the file models with the given IDs along with the related models needed to serialize their details
+        into the input metadata manifest of a job execution
+
+        :param file_ids: The file IDs
+        :type file_ids: :func:`list`
+        :returns: The file query
+        :rtype: :class:`django.db.models.QuerySet`
+        """
+
+        files = self.filter(id__in=file_ids)
+        files = files.select_related('workspace', 'job_type', 'job', 'job_exe', 'recipe', 'recipe_type', 'batch')
+        files = files.defer('workspace__json_config', 'job__input', 'job__output', 'job_exe__configuration',
+                            'recipe__input', 'recipe_type__definition', 'batch__definition')
+        return files.prefetch_related('countries')
+
     def get_files_for_queued_jobs(self, file_ids):
         """Returns the file models with the given IDs. Each scale_file model only contains the needed fields for
         configuring queued jobs. The returned list is a queryset iterator, so only access it once.
@@ -487,8 +503,9 @@ class ScaleFileManager(models.Manager):
 
     def move_files(self, file_moves):
         """Moves the given files to the new file system paths. Each ScaleFile model should have its related workspace
-        field populated. This method will update the file_path field in each ScaleFile model to the new path (it may
-        also change other ScaleFile fields) and save the changes in the database.
+        field populated. This method will update the file_path field in each ScaleFile model to the new path and save
+        the new paths in the database with a single bulk update. Other changes to the ScaleFile models are not saved. If
+        a move fails, the paths of the files that were successfully moved are still saved before the error is raised.
 
         :param file_moves: List of files to move
         :type file_moves: [:class:`storage.brokers.broker.FileMove`]
@@ -514,16 +531,61 @@ class ScaleFileManager(models.Manager):
             wp_list.append(file_move)
 
         # Move files for each workspace
-        for wp_id in wp_dict:
-            workspace = wp_dict[wp_id][0]
-            wp_file_moves = wp_dict[wp_id][1]
-            workspace.move_files(wp_file_moves)
+        old_paths = [file_move.file.file_path for file_move in file_moves]
+        try:
+            for wp_id in wp_dict:
+                workspace = wp_dict[wp_id][0]
+                wp_file_moves = wp_dict[wp_id][1]
+                workspace.move_files(wp_file_moves)
+        finally:
+            # Brokers only update the paths of successfully moved files, so save those paths all at once
+            moved_files = [file_move.file for file_move, old_path in zip(file_moves, old_paths)
+                           if file_move.file.file_path != old_path]
+            self.update_file_paths(moved_files)
+
+    def set_files_deleted(self, file_ids, when=None):
+        """Marks the files with the given IDs as deleted (and unpublished) with a single bulk update
+
+        :param file_ids: The IDs of the deleted files
+        :type file_ids: [int]
+        :param when: When the files were deleted, defaults to now
+        :type when: :class:`datetime.datetime`
+        :returns: The number of updated file models
+        :rtype: int
+        """
+
+        if not file_ids:
+            return 0
+
+        if when is None:
+            when = timezone.now()
+        # Queryset updates skip auto_now fields, so last_modified is set explicitly
+        return self.filter(id__in=file_ids).update(is_deleted=True, deleted=when, is_published=False,
+                                                   unpublished=when, last_modified=when)
+
+    def update_file_paths(self, scale_files):
+        """Saves the current file_path field of each of the given (already saved) file models in a single query
+
+        :param scale_files: The file models with updated paths
+        :type scale_files: [:class:`storage.models.ScaleFile`]
+        """
+
+        if scale_files:
+            values = ', '.join(['(%s, %s)'] * len(scale_files))
+            qry = 'UPDATE scale_file sf SET file_path = v.file_path, last_modified = %s FROM (VALUES ' + values + ')'
+            qry += ' AS v(id, file_path) WHERE sf.id = v.id'
+            params = [timezone.now()]
+            for scale_file in scale_files:
+                params.extend([scale_file.id, scale_file.file_path])
+            with connection.cursor() as cursor:
+                cursor.execute(qry, params)
 
     def upload_files(self, workspace, file_uploads):
         """Uploads the given files from the given local file system paths into the given workspace. Each ScaleFile model
         should have its file_path field populated with the relative location where the file should be stored within the
         workspace. This method will update the workspace and other fields (including possibly changing file_path) in
-        each ScaleFile model and will save the models to the database.
+        each ScaleFile model and, once all of the uploads succeed, will save the models to the database in a single
+        transaction. New models are created with a single bulk insert.
 
         :param workspace: The workspace to upload files into
         :type workspace: :class:`storage.models.Workspace`
@@ -550,13 +612,22 @@ class ScaleFileManager(models.Manager):
         # Store files in workspace
         workspace.upload_files(file_uploads)
 
-        # Populate the country list for all files that were saved
-        for file_upload in file_uploads:
-            scale_file = file_upload.file
-            if scale_file.pk:
-                scale_file.set_countries()
+        new_files = [new_file for new_file in file_list if new_file.pk is None]
+        existing_files = [existing_file for existing_file in file_list if existing_file.pk is not None]
+        with transaction.atomic():
+            if new_files:
+                # Primary keys are populated by the bulk insert (PostgreSQL only)
+                self.bulk_create(new_files)
+            for scale_file in existing_files:
                 scale_file.save()
 
+            # Populate the country list for all files that were saved, new files do not have any countries to clear
+            for scale_file in new_files:
+                if scale_file.geometry is not None:
+                    scale_file.set_countries()
+            for scale_file in existing_files:
+                scale_file.set_countries()
+
         return file_list
 
 
@@ -799,11 +870,16 @@ class ScaleFile(models.Model):
             target_date = self.data_ended
         apply(self.countries.add, CountryData.objects.get_intersects(self.geometry, target_date).values())
 
-    def set_deleted(self):
-        """Marks the current file as deleted and updates the corresponding fields."""
+    def set_deleted(self, when=None):
+        """Marks the current file as deleted and updates the corresponding fields.
+
+        :param when: When the file was deleted, defaults to now
+        :type when: :class:`datetime.datetime`
+        """
         self.is_deleted = True
         self.is_published = False
-        when = timezone.now()
+        if when is None:
+            when = timezone.now()
         self.deleted = when
         self.unpublished = when
 
@@ -1120,6 +1196,8 @@ class Workspace(models.Model):
 
         :param file_downloads: List of files to download
         :type file_downloads: [:class:`storage.brokers.broker.FileDownload`]
+        :returns: The statistics for the file transfers if supported by the broker, None otherwise
+        :rtype: :class:`storage.brokers.broker.TransferStats`
 
         :raises :class:`storage.exceptions.MissingVolumeMount`: If the required volume mount is missing
         """
@@ -1133,7 +1211,7 @@ class Workspace(models.Model):
                 logger.info('Creating %s', file_download_dir)
                 makedirs(file_download_dir, mode=0755)
 
-        self.get_broker().download_files(volume_path, file_downloads)
+        return self.get_broker().download_files(volume_path, file_downloads)
 
     def get_broker(self):
         """Returns the configured broker for this workspace
@@ -1188,11 +1266,13 @@ class Workspace(models.Model):
             sanitize = (not self.admin_view)
         return rest_utils.strip_schema_version(convert_config_to_v6_json(self.get_configuration(), sanitize=sanitize).get_dict())
 
-    def list_files(self, recursive):
+    def list_files(self, recursive, start_after=None):
         """Lists files within a workspace, with optional full tree recursion.
 
         :param recursive: Flag to indicate whether file searching should be done recursively
         :type recursive: boolean
+        :param start_after: The relative path of the file after which to resume the listing, None to list all files
+        :type start_after: string
         :return: Generator of files matching given expression
         :rtype: Generator[:class:`storage.brokers.broker.FileDetails`]
         """
@@ -1200,35 +1280,41 @@ class Workspace(models.Model):
 
         logger.info('Beginning%s file list for workspace: %s' % (' recursive' if recursive else '',
                                                                    self.name))
-        return self.get_broker().list_files(volume_path, recursive)
+        if start_after:
+            logger.info('Resuming file list after %s', start_after)
+        return self.get_broker().list_files(volume_path, recursive, start_after)
 
     def move_files(self, file_moves):
-        """Moves the given files to the new file system paths and saves the ScaleFile model changes in the database. If
-        this workspace's broker uses a container volume, the workspace expects this volume file system to already be
-        mounted at workspace_volume_path or an exception will be raised.
+        """Moves the given files to the new file system paths and updates the file_path field of each ScaleFile model,
+        the changes are not saved in the database. If this workspace's broker uses a container volume, the workspace
+        expects this volume file system to already be mounted at workspace_volume_path or an exception will be raised.
 
         :param file_moves: List of files to move
         :type file_moves: [:class:`storage.brokers.broker.FileMove`]
+        :returns: The statistics for the file transfers if supported by the broker, None otherwise
+        :rtype: :class:`storage.brokers.broker.TransferStats`
 
         :raises :class:`storage.exceptions.MissingVolumeMount`: If the required volume mount is missing
         """
 
         volume_path = self._get_volume_path()
-        self.get_broker().move_files(volume_path, file_moves)
+        return self.get_broker().move_files(volume_path, file_moves)
 
     def upload_files(self, file_uploads):
-        """Uploads the given files from the given local file system paths and saves the ScaleFile models in the
+        """Uploads the given files from the given local file system paths, the ScaleFile models are not saved in the
         database. If this workspace's broker uses a container volume, the workspace expects this volume file system to
         already be mounted at workspace_volume_path or an exception will be raised.
 
         :param file_uploads: List of files to upload
         :type file_uploads: [:class:`storage.brokers.broker.FileUpload`]
+        :returns: The statistics for the file transfers if supported by the broker, None otherwise
+        :rtype: :class:`storage.brokers.broker.TransferStats`
 
         :raises :class:`storage.exceptions.MissingVolumeMount`: If the required volume mount is missing
         """
 
         volume_path = self._get_volume_path()
-        self.get_broker().upload_files(volume_path, file_uploads)
+        return self.get_broker().upload_files(volume_path, file_uploads)
 
     def _get_volume_path(self):
         """Returns the local container location for this workspace's container volume if it uses one, otherwise returns
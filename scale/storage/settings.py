@@ -11,3 +11,21 @@ S3_RETRY_COUNT = getattr(settings, 'S3_RETRY_COUNT', 3)
 
 # The delay between retry attempts
 S3_RETRY_DELAY = getattr(settings, 'S3_RETRY_DELAY', 60)  # 1 minute
+
+# The number of threads used to transfer files to and from S3 concurrently
+S3_TRANSFER_THREADS = getattr(settings, 'S3_TRANSFER_THREADS', 8)
+
+# Files at least this large (in bytes) are transferred in multiple parts with concurrent requests
+S3_MULTIPART_THRESHOLD = getattr(settings, 'S3_MULTIPART_THRESHOLD', 64 * 1024 * 1024)  # 64 MiB
+
+# The size (in bytes) of each part of a multipart transfer
+S3_MULTIPART_CHUNKSIZE = getattr(settings, 'S3_MULTIPART_CHUNKSIZE', 16 * 1024 * 1024)  # 16 MiB
+
+# The number of concurrent requests used for each multipart transfer
+S3_MULTIPART_CONCURRENCY = getattr(settings, 'S3_MULTIPART_CONCURRENCY', 4)
+
+# The number of threads used to transfer files to and from NFS concurrently
+NFS_TRANSFER_THREADS = getattr(settings, 'NFS_TRANSFER_THREADS', 4)
+
+# The number of seconds the parsed NFS mount table is cached before it is read again
+NFS_MOUNT_TABLE_TTL = getattr(settings, 'NFS_MOUNT_TABLE_TTL', 60)
@@ -101,47 +101,55 @@ class TestHostBrokerListFiles(TestCase):
         self.root_path = '/my/test/path'
         self.broker = HostBroker()
 
-    @patch('os.listdir')
-    def test_no_files_flat_walk(self, list_dir):
+        # Directory tree for walking a real file system
+        self.temp_dir = tempfile.mkdtemp()
+        for file_path in [os.path.join('a', 'b', 'file_1.txt'), os.path.join('a', 'file_2.txt'), 'a-file_3.txt',
+                          'file_4.txt']:
+            full_path = os.path.join(self.temp_dir, file_path)
+            if not os.path.exists(os.path.dirname(full_path)):
+                os.makedirs(os.path.dirname(full_path))
+            with open(full_path, 'w') as output_file:
+                output_file.write(file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_no_files_flat_walk(self):
         """Tests calling HostBroker._dir_walker() with no files in directory"""
         
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, False)]
+        os.makedirs(os.path.join(self.temp_dir, 'empty'))
+        file_list = [x for x in HostBroker._dir_walker(os.path.join(self.temp_dir, 'empty'), False)]
         
         self.assertEqual(len(file_list), 0)
 
-    @patch('os.listdir')
-    def test_with_files_flat_dir_walker(self, list_dir):
+    def test_with_files_flat_dir_walker(self):
         """Tests calling HostBroker._dir_walker() with files in a directory"""
         
-        files = [str(uuid.uuid4()), str(uuid.uuid4())]
+        file_list = [x for x in HostBroker._dir_walker(self.temp_dir, False)]
 
-        list_dir.return_value = files
-        
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, False)]
-
-        for i in range(2):
-            self.assertEqual(os.path.join(self.root_path, files[i]), file_list[i])
-            
-        self.assertEqual(len(file_list), 2)
+        self.assertListEqual(file_list, [(os.path.join(self.temp_dir, 'a-file_3.txt'), len('a-file_3.txt')),
+                                         (os.path.join(self.temp_dir, 'file_4.txt'), len('file_4.txt'))])
 
-    @patch('os.walk')
-    def test_with_files_recursive_dir_walker(self, walk):
+    def test_with_files_recursive_dir_walker(self):
         """Tests calling HostBroker._dir_walker() with files throughout tree"""
         
-        files = []
-        dirs = {self.root_path: str(uuid.uuid4()),
-                os.path.join(self.root_path, str(uuid.uuid4())): str(uuid.uuid4()),
-                os.path.join(self.root_path, str(uuid.uuid4())): str(uuid.uuid4())}
+        file_list = [x[0] for x in HostBroker._dir_walker(self.temp_dir, True)]
+        
+        expected_paths = [os.path.join('a', 'b', 'file_1.txt'), os.path.join('a', 'file_2.txt'), 'a-file_3.txt',
+                          'file_4.txt']
+        self.assertListEqual(file_list, [os.path.join(self.temp_dir, x) for x in expected_paths])
 
-        files = [os.path.join(x, dirs[x]) for x in dirs]
+    def test_resume_list_files(self):
+        """Tests calling HostBroker.list_files() to resume after a given file"""
 
-        walk.return_value = [(x, (), (dirs[x],)) for x in dirs]
-        
-        file_list = [x for x in HostBroker._dir_walker(self.root_path, True)]
-        
-        for i in range(3):
-            self.assertEqual(os.path.join(self.root_path, files[i]), file_list[i])
-        self.assertEqual(len(file_list), 3)
+        files = self.broker.list_files(self.temp_dir, True, os.path.join('a', 'b', 'file_1.txt'))
+        self.assertListEqual([x.file for x in files], [os.path.join('a', 'file_2.txt'), 'a-file_3.txt', 'file_4.txt'])
+
+        files = self.broker.list_files(self.temp_dir, True, os.path.join('a', 'file_2.txt'))
+        self.assertListEqual([x.file for x in files], ['a-file_3.txt', 'file_4.txt'])
+
+        files = self.broker.list_files(self.temp_dir, True, 'file_4.txt')
+        self.assertListEqual(list(files), [])
 
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_no_files(self, walk):
@@ -151,51 +159,43 @@ class TestHostBrokerListFiles(TestCase):
         files = self.broker.list_files(self.root_path, False)
         self.assertEqual(len(list(files)), 0)
     
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_list_a_thousand(self, walk):
         """Tests calling HostBroker.list_files() with multiple batches (1000+)"""
         
-        walk.return_value = [str(uuid.uuid4()) for _ in range(1500)]
+        walk.return_value = [(str(uuid.uuid4()), 0) for _ in range(1500)]
         
         files = self.broker.list_files(self.root_path, True)
         
         self.assertEqual(len(list(files)), 1500)
     
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_list_ten(self, walk):
         """Tests calling HostBroker.list_files() to search directory"""
         
-        walk.return_value = [str(uuid.uuid4()) for _ in range(10)]
+        walk.return_value = [(str(uuid.uuid4()), 0) for _ in range(10)]
         
         files = self.broker.list_files(self.root_path, True)
         
         self.assertEqual(len(list(files)), 10)
     
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_recursive_successfully(self, walk):
         """Tests calling HostBroker.list_files() with files across multi-level 
         directory tree"""
         
-        walk.return_value = [os.path.join(str(x), str(uuid.uuid4())) for x in range(10)]
+        walk.return_value = [(os.path.join(str(x), str(uuid.uuid4())), 0) for x in range(10)]
 
         files = self.broker.list_files(self.root_path, True)
         
         self.assertEqual(len(list(files)), 10)
         
-    @patch('os.path.getsize', lambda x: 0)
-    @patch('os.path.isfile', lambda x: True)
     @patch('storage.brokers.host_broker.HostBroker._dir_walker')
     def test_recursive_successfully_strip_path(self, walk):
         """Tests calling HostBroker.list_files() with files across multi-level 
         directory tree verifying the host volume path is removed"""
         
-        walk.return_value = [os.path.join(self.root_path, str(x), str(uuid.uuid4())) for x in range(10)]
+        walk.return_value = [(os.path.join(self.root_path, str(x), str(uuid.uuid4())), 0) for x in range(10)]
 
         files = self.broker.list_files(self.root_path, True)
         
@@ -1,15 +1,24 @@
 from __future__ import unicode_literals
 
 import os
+import shutil
+import tempfile
 
 import django
 from django.test import TestCase
 from mock import call, patch, mock_open
 
+import storage.brokers.nfs_broker as nfs_broker
 import storage.test.utils as storage_test_utils
 from storage.brokers.broker import FileDownload, FileMove, FileUpload
 from storage.brokers.exceptions import InvalidBrokerConfiguration
-from storage.brokers.nfs_broker import NfsBroker
+from storage.brokers.nfs_broker import NfsBroker, get_mount_table
+
+MOUNTINFO_DATA = """36 0 253:0 / / rw,relatime shared:1 - xfs /dev/mapper/vg_root-lv_root rw,attr2,inode64,noquota
+44 16 0:37 / /proc/fs/nfsd rw,relatime shared:30 - nfsd nfsd rw
+46 14 0:40 / /users rw,relatime shared:32 - nfs4 users:/users rw,vers=4.0,rsize=1048576,wsize=1048576,hard,proto=tcp
+47 46 0:41 / /users/data rw,relatime - nfs fserver:/exports/data rw,vers=3,rsize=1048576,wsize=1048576,hard,proto=tcp
+"""
 
 
 class TestNfsBrokerDeleteFiles(TestCase):
@@ -59,6 +68,7 @@ class TestNfsBrokerDownloadFiles(TestCase):
         self.broker = NfsBroker()
         self.broker.load_configuration({'type': NfsBroker().broker_type, 'nfs_path': 'host:/path'})
 
+    @patch('storage.brokers.nfs_broker.settings.NFS_TRANSFER_THREADS', 1)
     @patch('storage.brokers.nfs_broker.os.path.exists')
     @patch('storage.brokers.nfs_broker.execute_command_line')
     def test_successfully(self, mock_execute, mock_exists):
@@ -118,6 +128,7 @@ class TestNfsBrokerMoveFiles(TestCase):
         self.broker = NfsBroker()
         self.broker.load_configuration({'type': NfsBroker().broker_type, 'nfs_path': 'host:/path'})
 
+    @patch('storage.brokers.nfs_broker.settings.NFS_TRANSFER_THREADS', 1)
     @patch('storage.brokers.nfs_broker.makedirs')
     @patch('storage.brokers.nfs_broker.os.path.exists')
     @patch('storage.brokers.nfs_broker.os.chmod')
@@ -163,14 +174,103 @@ class TestNfsBrokerMoveFiles(TestCase):
         self.assertEqual(file_2.file_path, new_workspace_path_2)
 
 
+class TestNfsBrokerMountTable(TestCase):
+
+    def setUp(self):
+        django.setup()
+
+        nfs_broker._MOUNT_TABLE = None
+        self.broker = NfsBroker()
+
+    def tearDown(self):
+        nfs_broker._MOUNT_TABLE = None
+
+    @patch('storage.brokers.nfs_broker.settings.NFS_MOUNT_TABLE_TTL', 60)
+    @patch('storage.brokers.nfs_broker.time.time')
+    def test_mount_table_cached(self, mock_time):
+        """Tests that the NFS mount table is parsed once and cached until it expires"""
+
+        mock_time.return_value = 1000.0
+        mo = mock_open(read_data=MOUNTINFO_DATA)
+        with patch('__builtin__.open', mo, create=True):
+            mount_table = get_mount_table()
+            self.assertDictEqual(mount_table, {'/users': 'users:/users', '/users/data': 'fserver:/exports/data'})
+            mock_time.return_value = 1060.0
+            get_mount_table()
+            self.assertEqual(mo.call_count, 1)
+
+            mock_time.return_value = 1061.0
+            get_mount_table()
+            self.assertEqual(mo.call_count, 2)
+
+    def test_get_mount_info(self):
+        """Tests finding the NFS mount that contains each path"""
+
+        mo = mock_open(read_data=MOUNTINFO_DATA)
+        with patch('__builtin__.open', mo, create=True):
+            results = self.broker._get_mount_info('/users/data/my_dir/my_file.txt', '/users/me/my_file.txt',
+                                                  '/usersdata/my_file.txt')
+
+        self.assertListEqual(results, [('fserver:/exports/data', 'my_dir/my_file.txt'),
+                                       ('users:/users', 'me/my_file.txt'), (None, '/usersdata/my_file.txt')])
+
+
 class TestNfsBrokerUploadFiles(TestCase):
 
     def setUp(self):
         django.setup()
 
+        nfs_broker._MOUNT_TABLE = None
         self.broker = NfsBroker()
         self.broker.load_configuration({'type': NfsBroker().broker_type, 'nfs_path': 'host:/path'})
 
+    def tearDown(self):
+        nfs_broker._MOUNT_TABLE = None
+
+    def test_copy_file_not_linked(self):
+        """Tests that copying a file within the same file system does not link the destination to the source"""
+
+        temp_dir = tempfile.mkdtemp()
+        try:
+            src_path = os.path.join(temp_dir, 'my_file.txt')
+            dest_path = os.path.join(temp_dir, 'my_copy.txt')
+            with open(src_path, 'w') as src_file:
+                src_file.write('my data')
+
+            self.broker._copy_file(src_path, dest_path)
+            with open(src_path, 'w') as src_file:
+                src_file.write('changed data')
+
+            self.assertFalse(os.path.samefile(src_path, dest_path))
+            with open(dest_path, 'r') as dest_file:
+                self.assertEqual(dest_file.read(), 'my data')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    @patch('storage.brokers.nfs_broker.settings.NFS_TRANSFER_THREADS', 4)
+    @patch('storage.brokers.nfs_broker.os.chmod')
+    @patch('storage.brokers.nfs_broker.makedirs')
+    @patch('storage.brokers.nfs_broker.os.path.exists')
+    def test_concurrently(self, mock_exists, mock_makedirs, mock_chmod):
+        """Tests calling NfsBroker.upload_files() with concurrent transfers"""
+
+        mock_exists.return_value = True
+        volume_path = os.path.join('the', 'volume', 'path')
+        file_uploads = []
+        for i in range(10):
+            scale_file = storage_test_utils.create_file(file_path=os.path.join('my_wrk_dir', 'my_file_%d.txt' % i))
+            file_uploads.append(FileUpload(scale_file, os.path.join('my_dir', 'my_file_%d.txt' % i)))
+
+        # MagicMock call tracking is not thread-safe, so record the copies in a list
+        copies = []
+        with patch.object(self.broker, '_copy_file', side_effect=lambda src, dest: copies.append((src, dest))):
+            self.broker.upload_files(volume_path, file_uploads)
+
+        expected_copies = [(file_upload.local_path, os.path.join(volume_path, file_upload.file.file_path))
+                           for file_upload in file_uploads]
+        self.assertItemsEqual(copies, expected_copies)
+
+    @patch('storage.brokers.nfs_broker.settings.NFS_TRANSFER_THREADS', 1)
     @patch('storage.brokers.nfs_broker.makedirs')
     @patch('storage.brokers.nfs_broker.os.path.exists')
     @patch('storage.brokers.nfs_broker.os.chmod')
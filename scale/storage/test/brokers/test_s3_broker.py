@@ -4,13 +4,16 @@ import os
 
 import django
 from django.test import TestCase
-from mock import MagicMock, Mock, call, mock_open, patch
+from mock import ANY, MagicMock, Mock, call, patch
 
 import storage.test.utils as storage_test_utils
 from storage.brokers.broker import FileDownload, FileMove, FileUpload
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.brokers.s3_broker import S3Broker
+from storage.exceptions import MissingFile
+from storage.models import ScaleFile
 from util.aws import S3Client
+from util.exceptions import FileDeleteFailed, FileDoesNotExist
 
 
 class TestS3Broker(TestCase):
@@ -33,10 +36,8 @@ class TestS3Broker(TestCase):
     def test_delete_files(self, mock_client_class):
         """Tests deleting files successfully"""
 
-        s3_object_1 = MagicMock()
-        s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
+        mock_client.delete_objects.return_value = {}
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_path_1 = os.path.join('my_dir', 'my_file.txt')
@@ -49,23 +50,44 @@ class TestS3Broker(TestCase):
         self.broker.delete_files(None, [file_1, file_2])
 
         # Check results
-        self.assertTrue(s3_object_1.delete.called)
-        self.assertTrue(s3_object_2.delete.called)
+        mock_client.delete_objects.assert_called_once_with('my_bucket.domain.com', [file_path_1, file_path_2])
         self.assertTrue(file_1.is_deleted)
         self.assertIsNotNone(file_1.deleted)
         self.assertTrue(file_2.is_deleted)
         self.assertIsNotNone(file_2.deleted)
+        self.assertTrue(ScaleFile.objects.get(id=file_1.id).is_deleted)
+        self.assertTrue(ScaleFile.objects.get(id=file_2.id).is_deleted)
 
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_delete_files_partial_failure(self, mock_client_class):
+        """Tests deleting files when S3 fails to delete some of them"""
+
+        file_path_1 = os.path.join('my_dir', 'my_file.txt')
+        file_path_2 = os.path.join('my_dir', 'my_file.json')
+
+        mock_client = MagicMock(S3Client)
+        mock_client.delete_objects.return_value = {file_path_2: 'AccessDenied: Access Denied'}
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path=file_path_1)
+        file_2 = storage_test_utils.create_file(file_path=file_path_2)
+
+        # Call method to test
+        with self.assertRaises(FileDeleteFailed):
+            self.broker.delete_files(None, [file_1, file_2])
+
+        # Check results
+        self.assertTrue(ScaleFile.objects.get(id=file_1.id).is_deleted)
+        self.assertFalse(ScaleFile.objects.get(id=file_2.id).is_deleted)
+
+    @patch('storage.brokers.s3_broker.settings.S3_TRANSFER_THREADS', 1)
     @patch('os.path.exists')
     @patch('storage.brokers.s3_broker.S3Client')
     def test_download_files(self, mock_client_class, mock_exists):
         """Tests downloading files successfully"""
 
         mock_exists.return_value = True
-        s3_object_1 = MagicMock()
-        s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -75,19 +97,64 @@ class TestS3Broker(TestCase):
         workspace_path_file_1 = os.path.join('my_wrk_dir_1', file_name_1)
         workspace_path_file_2 = os.path.join('my_wrk_dir_2', file_name_2)
 
-        file_1 = storage_test_utils.create_file(file_path=workspace_path_file_1)
-        file_2 = storage_test_utils.create_file(file_path=workspace_path_file_2)
+        file_1 = storage_test_utils.create_file(file_path=workspace_path_file_1, file_size=100)
+        file_2 = storage_test_utils.create_file(file_path=workspace_path_file_2, file_size=200)
         file_1_dl = FileDownload(file_1, local_path_file_1, False)
         file_2_dl = FileDownload(file_2, local_path_file_2, False)
 
         # Call method to test
-        mo = mock_open()
-        with patch('__builtin__.open', mo, create=True):
-            self.broker.download_files(None, [file_1_dl, file_2_dl])
+        stats = self.broker.download_files(None, [file_1_dl, file_2_dl])
+
+        # Check results
+        self.assertEqual(mock_client.download_file.call_count, 2)
+        mock_client.download_file.assert_any_call('my_bucket.domain.com', workspace_path_file_1, local_path_file_1,
+                                                  ANY)
+        mock_client.download_file.assert_any_call('my_bucket.domain.com', workspace_path_file_2, local_path_file_2,
+                                                  ANY)
+        self.assertEqual(stats.num_files, 2)
+        self.assertEqual(stats.num_bytes, 300)
+
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_download_files_missing(self, mock_client_class):
+        """Tests downloading a file that does not exist in S3"""
+
+        mock_client = MagicMock(S3Client)
+        mock_client.download_file.side_effect = FileDoesNotExist('not found')
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path=os.path.join('my_wrk_dir_1', 'my_file.txt'))
+        file_1_dl = FileDownload(file_1, os.path.join('my_dir_1', 'my_file.txt'), False)
+
+        # Call method to test
+        with self.assertRaises(MissingFile):
+            self.broker.download_files(None, [file_1_dl])
+
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_download_files_concurrently(self, mock_client_class):
+        """Tests downloading files concurrently on the transfer threads"""
+
+        downloaded_paths = []
+
+        def download_file(bucket_name, key_name, path, transfer_config):
+            downloaded_paths.append(path)
+
+        # Mocks do not record calls from multiple threads reliably, so track the calls directly
+        mock_client = MagicMock(S3Client)
+        mock_client.download_file.side_effect = download_file
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_downloads = []
+        for i in range(10):
+            scale_file = storage_test_utils.create_file(file_path='my_wrk_dir/my_file_%d.txt' % i, file_size=10)
+            file_downloads.append(FileDownload(scale_file, 'my_dir/my_file_%d.txt' % i, False))
+
+        # Call method to test
+        stats = self.broker.download_files(None, file_downloads)
 
         # Check results
-        self.assertTrue(s3_object_1.download_file.called)
-        self.assertTrue(s3_object_2.download_file.called)
+        self.assertListEqual(sorted(downloaded_paths), sorted(fd.local_path for fd in file_downloads))
+        self.assertEqual(stats.num_files, 10)
+        self.assertEqual(stats.num_bytes, 100)
 
     # Patching in storage.brokers.s3_broker as opposed to util.aws / util.command because patch must be applied where
     # import is made, not on source
@@ -161,18 +228,14 @@ class TestS3Broker(TestCase):
         self.assertEqual(broker._credentials.access_key_id, 'ABC')
         self.assertEqual(broker._credentials.secret_access_key, '123')
 
+    @patch('storage.brokers.s3_broker.settings.S3_TRANSFER_THREADS', 1)
     @patch('os.path.exists')
     @patch('storage.brokers.s3_broker.S3Client')
     def test_move_files(self, mock_client_class, mock_exists):
         """Tests moving files successfully"""
 
         mock_exists.return_value = True
-        s3_object_1a = MagicMock()
-        s3_object_1b = MagicMock()
-        s3_object_2a = MagicMock()
-        s3_object_2b = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1a, s3_object_1b, s3_object_2a, s3_object_2b]
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -191,21 +254,22 @@ class TestS3Broker(TestCase):
         self.broker.move_files(None, [file_1_mv, file_2_mv])
 
         # Check results
-        self.assertTrue(s3_object_1b.copy_from.called)
-        self.assertTrue(s3_object_1a.delete.called)
-        self.assertTrue(s3_object_2b.copy_from.called)
-        self.assertTrue(s3_object_2a.delete.called)
+        self.assertEqual(mock_client.copy_object.call_count, 2)
+        mock_client.copy_object.assert_any_call('my_bucket.domain.com', old_workspace_path_1, new_workspace_path_1,
+                                                ANY, ANY)
+        mock_client.copy_object.assert_any_call('my_bucket.domain.com', old_workspace_path_2, new_workspace_path_2,
+                                                ANY, ANY)
+        mock_client.delete_object.assert_any_call('my_bucket.domain.com', old_workspace_path_1)
+        mock_client.delete_object.assert_any_call('my_bucket.domain.com', old_workspace_path_2)
         self.assertEqual(file_1.file_path, new_workspace_path_1)
         self.assertEqual(file_2.file_path, new_workspace_path_2)
 
+    @patch('storage.brokers.s3_broker.settings.S3_TRANSFER_THREADS', 1)
     @patch('storage.brokers.s3_broker.S3Client')
     def test_upload_files(self, mock_client_class):
         """Tests uploading files successfully"""
 
-        s3_object_1 = MagicMock()
-        s3_object_2 = MagicMock()
         mock_client = MagicMock(S3Client)
-        mock_client.get_object.side_effect = [s3_object_1, s3_object_2]
         mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
 
         file_name_1 = 'my_file.txt'
@@ -221,15 +285,41 @@ class TestS3Broker(TestCase):
         file_2_up = FileUpload(file_2, local_path_file_2)
 
         # Call method to test
-        mo = mock_open()
-        with patch('__builtin__.open', mo, create=True):
-            self.broker.upload_files(None, [file_1_up, file_2_up])
+        stats = self.broker.upload_files(None, [file_1_up, file_2_up])
+
+        # Check results
+        self.assertEqual(mock_client.upload_file.call_count, 2)
+        options = {call_args[0][1]: call_args[0][3] for call_args in mock_client.upload_file.call_args_list}
+        self.assertEqual(options[workspace_path_file_1]['ContentType'], 'text/plain')
+        self.assertEqual(options[workspace_path_file_2]['ContentType'], 'application/json')
+        self.assertEqual(stats.num_files, 2)
+
+    @patch('storage.brokers.s3_broker.settings.S3_TRANSFER_THREADS', 1)
+    @patch('storage.brokers.s3_broker.S3Client')
+    def test_upload_files_failure(self, mock_client_class):
+        """Tests that an upload failure is raised and that the broker does not save any models"""
+
+        def upload_file(bucket_name, key_name, path, extra_args, transfer_config):
+            if path == 'bad':
+                raise ValueError('upload failed')
+
+        mock_client = MagicMock(S3Client)
+        mock_client.upload_file.side_effect = upload_file
+        mock_client_class.return_value.__enter__ = Mock(return_value=mock_client)
+
+        file_1 = storage_test_utils.create_file(file_path='my_file.txt')
+        file_2 = storage_test_utils.create_file(file_path='my_file.json')
+        file_1.save = MagicMock()
+        file_2.save = MagicMock()
+
+        # Call method to test
+        with self.assertRaises(ValueError):
+            self.broker.upload_files(None, [FileUpload(file_1, 'good'), FileUpload(file_2, 'bad')])
 
         # Check results
-        self.assertTrue(s3_object_1.upload_file.called)
-        self.assertTrue(s3_object_2.upload_file.called)
-        self.assertEqual(s3_object_1.upload_file.call_args[0][1]['ContentType'], 'text/plain')
-        self.assertEqual(s3_object_2.upload_file.call_args[0][1]['ContentType'], 'application/json')
+        self.assertEqual(mock_client.upload_file.call_count, 2)
+        self.assertFalse(file_1.save.called)
+        self.assertFalse(file_2.save.called)
 
     def test_validate_configuration_roles(self):
         """Tests validating a configuration based on IAM roles successfully"""
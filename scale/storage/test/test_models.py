@@ -8,12 +8,12 @@ import django.contrib.gis.geos as geos
 from django.db import transaction
 from django.test import TestCase, TransactionTestCase
 from django.utils.text import get_valid_filename
-from django.utils.timezone import utc
+from django.utils.timezone import now, utc
 from mock import MagicMock, patch
 
 import storage.test.utils as storage_test_utils
 from storage.brokers.broker import FileDownload, FileMove, FileUpload
-from storage.exceptions import ArchivedWorkspace, DeletedFile, InvalidDataTypeTag
+from storage.exceptions import ArchivedWorkspace, DeletedFile, InvalidDataTypeTag, MissingFile
 from storage.models import CountryData, PurgeResults, ScaleFile, Workspace
 from storage.brokers.exceptions import InvalidBrokerConfiguration
 from storage.configuration.json.workspace_config_v6 import WorkspaceConfigurationV6
@@ -304,6 +304,28 @@ class TestScaleFileManagerMoveFiles(TestCase):
         workspace_2.move_files.assert_called_once_with([FileMove(file_3, new_workspace_path_3),
                                                         FileMove(file_4, new_workspace_path_4)])
 
+    def test_saves_moved_paths(self):
+        """Tests that ScaleFileManager.move_files() saves the paths of the moved files, even when a move fails"""
+
+        def move_files(file_moves):
+            # Only the first file is moved successfully
+            file_moves[0].file.file_path = file_moves[0].new_path
+            raise MissingFile(file_moves[1].file.file_name)
+
+        workspace = storage_test_utils.create_workspace()
+        file_1 = storage_test_utils.create_file(file_name='my_file_1.txt', workspace=workspace)
+        new_workspace_path_1 = os.path.join('my', 'new', 'path', '1', os.path.basename(file_1.file_path))
+        file_2 = storage_test_utils.create_file(file_name='my_file_2.txt', workspace=workspace)
+        old_workspace_path_2 = file_2.file_path
+        new_workspace_path_2 = os.path.join('my', 'new', 'path', '2', os.path.basename(file_2.file_path))
+        workspace.move_files = MagicMock(side_effect=move_files)
+
+        files = [FileMove(file_1, new_workspace_path_1), FileMove(file_2, new_workspace_path_2)]
+        self.assertRaises(MissingFile, ScaleFile.objects.move_files, files)
+
+        self.assertEqual(ScaleFile.objects.get(id=file_1.id).file_path, new_workspace_path_1)
+        self.assertEqual(ScaleFile.objects.get(id=file_2.id).file_path, old_workspace_path_2)
+
     def test_inactive_workspace(self):
         """Tests calling ScaleFileManager.move_files() with an inactive workspace"""
 
@@ -393,6 +415,11 @@ class TestScaleFileManagerUploadFiles(TestCase):
         self.assertEqual('application/json', models[1].media_type)
         self.assertEqual(workspace.id, models[1].workspace_id)
 
+        # All of the new models are saved
+        self.assertIsNotNone(models[0].id)
+        self.assertIsNotNone(models[1].id)
+        self.assertEqual(ScaleFile.objects.filter(workspace=workspace).count(), 2)
+
     @patch('storage.models.os.path.getsize')
     @patch('storage.models.makedirs')
     def test_fails(self, mock_makedirs, mock_getsize):
@@ -487,6 +514,25 @@ class TestScaleFile(TestCase):
         self.assertTrue(scale_file.is_deleted)
         self.assertIsNotNone(scale_file.deleted)
 
+    def test_set_files_deleted(self):
+        """Tests marking files as deleted with a bulk update."""
+        file_1 = storage_test_utils.create_file()
+        file_2 = storage_test_utils.create_file()
+        file_3 = storage_test_utils.create_file()
+
+        when = now()
+
+        num_updated = ScaleFile.objects.set_files_deleted([file_1.id, file_2.id], when)
+
+        self.assertEqual(num_updated, 2)
+        file_1 = ScaleFile.objects.get(id=file_1.id)
+        self.assertTrue(file_1.is_deleted)
+        self.assertFalse(file_1.is_published)
+        self.assertEqual(file_1.deleted, when)
+        self.assertEqual(file_1.last_modified, when)
+        self.assertTrue(ScaleFile.objects.get(id=file_2.id).is_deleted)
+        self.assertFalse(ScaleFile.objects.get(id=file_3.id).is_deleted)
+
 
 class TestCountryData(TestCase):
 
@@ -1,5 +1,6 @@
 """Utility functions for testing AWS credentials and access to required resources"""
 import logging
+import threading
 from collections import namedtuple
 
 from boto3 import Session
@@ -14,10 +15,20 @@ logger = logging.getLogger(__name__)
 
 AWSCredentials = namedtuple('AWSCredentials', ['access_key_id', 'secret_access_key'])
 
+# The maximum number of keys that S3 accepts in a single multi-object delete request
+S3_MAX_DELETE_KEYS = 1000
+
+# The maximum number of messages that SQS accepts in a single batch request
+SQS_MAX_BATCH_MESSAGES = 10
+
 
 class AWSClient(object):
     """Manages automatically creating and destroying clients to AWS services."""
 
+    # Sessions are expensive to create, so they are pooled and shared by all clients with the same credentials and region
+    _sessions = {}
+    _sessions_lock = threading.Lock()
+
     def __init__(self, resource, config, credentials=None, region_name=None):
         """Constructor
 
@@ -43,16 +54,22 @@ class AWSClient(object):
 
         logger.debug('Setting up AWS client...')
 
-        session_args = {}
-        if self.credentials:
-            session_args['aws_access_key_id'] = self.credentials.access_key_id
-            session_args['aws_secret_access_key'] = self.credentials.secret_access_key
-        if self.region_name:
-            session_args['region_name'] = self.region_name
-        self._session = Session(**session_args)
-
-        self._client = self._session.client(self._resource_name, config=self._config)
-        self._resource = self._session.resource(self._resource_name, config=self._config)
+        with AWSClient._sessions_lock:
+            session_key = (self.credentials, self.region_name)
+            if session_key not in AWSClient._sessions:
+                session_args = {}
+                if self.credentials:
+                    session_args['aws_access_key_id'] = self.credentials.access_key_id
+                    session_args['aws_secret_access_key'] = self.credentials.secret_access_key
+                if self.region_name:
+                    session_args['region_name'] = self.region_name
+                AWSClient._sessions[session_key] = Session(**session_args)
+            self._session = AWSClient._sessions[session_key]
+
+            # Sessions are not thread-safe, so clients are created while holding the lock. The clients themselves are
+            # thread-safe, but resources are not and should only be used by the thread that entered this context.
+            self._client = self._session.client(self._resource_name, config=self._config)
+            self._resource = self._session.resource(self._resource_name, config=self._config)
         return self
 
     def __exit__(self, type, value, traceback):
@@ -102,6 +119,31 @@ class SQSClient(AWSClient):
         :type region_name: string
         """
         AWSClient.__init__(self, 'sqs', None, credentials, region_name)
+        self._queues = {}  # Queue resources stored by queue name, reused across requests {string: Queue}
+
+    def delete_messages(self, queue_name, messages):
+        """Deletes a batch of messages from an SQS queue, using as few requests as possible. Failures to delete
+        individual messages are logged, the messages will reappear on the queue after their visibility timeout.
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :param messages: The received messages to delete
+        :type messages: [`boto3.sqs.Message`]
+        :return: The number of messages that failed to be deleted
+        :rtype: int
+        """
+
+        queue = self._get_queue(queue_name)
+
+        failed_count = 0
+        for i in xrange(0, len(messages), SQS_MAX_BATCH_MESSAGES):
+            entries = [{'Id': str(index), 'ReceiptHandle': message.receipt_handle}
+                       for index, message in enumerate(messages[i:i + SQS_MAX_BATCH_MESSAGES])]
+            response = queue.delete_messages(Entries=entries)
+            for failure in response.get('Failed', []):
+                failed_count += 1
+                logger.error('Unable to delete message from SQS queue %s: %s', queue_name, failure.get('Message'))
+        return failed_count
 
     def get_queue_by_name(self, queue_name):
         """Gets a SQS queue by the given name
@@ -135,7 +177,7 @@ class SQSClient(AWSClient):
         :type message: string
         """
 
-        queue = self.get_queue_by_name(queue_name)
+        queue = self._get_queue(queue_name)
 
         queue.send_message(MessageBody=message)
 
@@ -148,7 +190,7 @@ class SQSClient(AWSClient):
         :type messages: [`SendMessageBatchRequestEntry`]
         """
 
-        queue = self.get_queue_by_name(queue_name)
+        queue = self._get_queue(queue_name)
 
         batches = [messages[i:i + 10] for i in xrange(0, len(messages), 10)]
 
@@ -172,7 +214,7 @@ class SQSClient(AWSClient):
         :return: Generator of messages
         :rtype: Generator[`boto3.sqs.Message`]
         """
-        queue = self.get_queue_by_name(queue_name)
+        queue = self._get_queue(queue_name)
 
         # Set max_messages to lesser of 10 or batch_size
         max_messages = batch_size if batch_size < 10 else 10
@@ -190,9 +232,23 @@ class SQSClient(AWSClient):
             if count % 10 != 0 or not count:
                 break
 
+    def _get_queue(self, queue_name):
+        """Gets a SQS queue by the given name, reusing the queue resource across requests made by this client so that
+        the queue URL is only looked up once
+
+        :param queue_name: The unique name of the SQS queue
+        :type queue_name: string
+        :return: Queue resource to perform queue operations
+        :rtype: :class:`boto3.sqs.Queue`
+        """
+
+        if queue_name not in self._queues:
+            self._queues[queue_name] = self.get_queue_by_name(queue_name)
+        return self._queues[queue_name]
+
 
 class S3Client(AWSClient):
-    def __init__(self, credentials=None, region_name=None):
+    def __init__(self, credentials=None, region_name=None, max_pool_connections=None):
         """Constructor
 
         :param credentials: Authentication values needed to access AWS. If no credentials are passed, then IAM
@@ -200,9 +256,99 @@ class S3Client(AWSClient):
         :type credentials: :class:`util.aws.AWSCredentials`
         :param region_name: The AWS region the resource resides in.
         :type region_name: string
+        :param max_pool_connections: The maximum number of connections the client keeps in its pool, None for the
+            botocore default. This should be at least the number of threads that will share the client.
+        :type max_pool_connections: int
+        """
+        config_args = {'s3': {'addressing_style': getattr(settings, 'S3_ADDRESSING_STYLE', 'auto')}}
+        if max_pool_connections:
+            config_args['max_pool_connections'] = max_pool_connections
+        AWSClient.__init__(self, 's3', Config(**config_args), credentials, region_name)
+
+    def copy_object(self, bucket_name, src_key_name, dest_key_name, extra_args=None, transfer_config=None):
+        """Copies an S3 object to a new key within the same bucket. Large objects are copied using a multipart copy.
+        This method is thread-safe.
+
+        :param bucket_name: The unique name of the bucket.
+        :type bucket_name: string
+        :param src_key_name: The key of the object to copy.
+        :type src_key_name: string
+        :param dest_key_name: The key to copy the object to.
+        :type dest_key_name: string
+        :param extra_args: Extra arguments for the copy, such as StorageClass and ContentType
+        :type extra_args: dict
+        :param transfer_config: The configuration for multipart transfers, None for the default
+        :type transfer_config: :class:`boto3.s3.transfer.TransferConfig`
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        :raises :class:`storage.exceptions.FileDoesNotExist`: If the source file is not found in the bucket.
+        """
+
+        copy_source = {'Bucket': bucket_name, 'Key': src_key_name}
+        try:
+            self._client.copy(copy_source, bucket_name, dest_key_name, ExtraArgs=extra_args, Config=transfer_config)
+        except ClientError as err:
+            self._raise_if_not_found(err, bucket_name, src_key_name)
+            raise
+
+    def delete_object(self, bucket_name, key_name):
+        """Deletes an S3 object. This method is thread-safe.
+
+        :param bucket_name: The unique name of the bucket.
+        :type bucket_name: string
+        :param key_name: The key of the object to delete.
+        :type key_name: string
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        """
+
+        self._client.delete_object(Bucket=bucket_name, Key=key_name)
+
+    def delete_objects(self, bucket_name, key_names):
+        """Deletes the S3 objects with the given keys using multi-object delete requests of up to 1000 keys each. Keys
+        that do not exist are considered successfully deleted. This method is thread-safe.
+
+        :param bucket_name: The unique name of the bucket.
+        :type bucket_name: string
+        :param key_names: The keys of the objects to delete.
+        :type key_names: [string]
+        :returns: The error message for each key that could not be deleted, stored by key
+        :rtype: dict
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        """
+
+        failed_keys = {}
+        for i in xrange(0, len(key_names), S3_MAX_DELETE_KEYS):
+            objects = [{'Key': key_name} for key_name in key_names[i:i + S3_MAX_DELETE_KEYS]]
+            # Quiet mode only returns the keys that failed to delete
+            response = self._client.delete_objects(Bucket=bucket_name, Delete={'Objects': objects, 'Quiet': True})
+            for error in response.get('Errors', []):
+                failed_keys[error['Key']] = '%s: %s' % (error.get('Code'), error.get('Message'))
+        return failed_keys
+
+    def download_file(self, bucket_name, key_name, path, transfer_config=None):
+        """Downloads an S3 object to the local file system. Large objects are downloaded using concurrent ranged GET
+        requests. This method is thread-safe.
+
+        :param bucket_name: The unique name of the bucket.
+        :type bucket_name: string
+        :param key_name: The key of the object to download.
+        :type key_name: string
+        :param path: The local path to download the object to.
+        :type path: string
+        :param transfer_config: The configuration for multipart transfers, None for the default
+        :type transfer_config: :class:`boto3.s3.transfer.TransferConfig`
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        :raises :class:`storage.exceptions.FileDoesNotExist`: If the file is not found in the bucket.
         """
-        config = Config(s3={'addressing_style': getattr(settings, 'S3_ADDRESSING_STYLE', 'auto')})
-        AWSClient.__init__(self, 's3', config, credentials, region_name)
+
+        try:
+            self._client.download_file(bucket_name, key_name, path, Config=transfer_config)
+        except ClientError as err:
+            self._raise_if_not_found(err, bucket_name, key_name)
+            raise
 
     def get_bucket(self, bucket_name, validate=True):
         """Gets a reference to an S3 bucket with the given identifier.
@@ -243,19 +389,18 @@ class S3Client(AWSClient):
             if validate:
                 s3_object.get()
         except ClientError as err:
-            error_code = err.response['ResponseMetadata']['HTTPStatusCode']
-            if error_code == 404:
-                raise FileDoesNotExist('Unable to access remote file: %s %s' % (bucket_name, key_name))
+            self._raise_if_not_found(err, bucket_name, key_name)
             raise
         return s3_object
 
-    def list_objects(self, bucket_name, recursive=False, prefix=None):
+    def list_objects(self, bucket_name, recursive=False, prefix=None, start_after=None):
         """Generator function to retrieve list of objects within an S3 bucket
 
         Retrieval of objects is provided by the boto3 paginator over 
         list_objects. This allows for simple paging support with unbounded
         object counts. As a result of the time that may be required for the full
-        result set to be returned, the results are returned via a generator. 
+        result set to be returned, the results are returned via a generator
+        that only requests the next page once the previous page is consumed.
         This generator will contain objects of type `storage.brokers.broker.FileDetails`.
         
         :param bucket_name: The unique name of the bucket to retrieve.
@@ -264,6 +409,8 @@ class S3Client(AWSClient):
         :type recursive: bool
         :param prefix: The parent key from which to search bucket. Trailing slash is optional
         :type prefix: string
+        :param start_after: The key after which to start listing, used to resume a previous listing
+        :type start_after: string
         :return: Generator of S3 objects that were found.
         :rtype: Generator[:class:`storage.brokers.broker.FileDetails`]
         """
@@ -273,16 +420,57 @@ class S3Client(AWSClient):
             params['Prefix'] = prefix
         if not recursive:
             params['Delimiter'] = '/'
+        if start_after:
+            # Keys are listed in lexicographic order, so the listing resumes after this key
+            params['Marker'] = start_after
 
         paginator = self._client.get_paginator('list_objects')
         iterator = paginator.paginate(**params)
 
         for page in iterator:
-            # In the event of 0 results, exit loop
+            # Pages may contain no objects, such as when they only contain common prefixes
             if 'Contents' not in page:
-                break
+                continue
 
             for result in page['Contents']:
                 # Filter out 0 size keys, these are directory keys as S3 objects must be at least 1 Byte
                 if result['Size'] > 0:
                     yield FileDetails(result['Key'], result['Size'])
+
+    def upload_file(self, bucket_name, key_name, path, extra_args=None, transfer_config=None):
+        """Uploads a local file to an S3 object. Large files are uploaded using a concurrent multipart upload. This
+        method is thread-safe.
+
+        :param bucket_name: The unique name of the bucket.
+        :type bucket_name: string
+        :param key_name: The key of the object to upload to.
+        :type key_name: string
+        :param path: The local path of the file to upload.
+        :type path: string
+        :param extra_args: Extra arguments for the upload, such as StorageClass and ContentType
+        :type extra_args: dict
+        :param transfer_config: The configuration for multipart transfers, None for the default
+        :type transfer_config: :class:`boto3.s3.transfer.TransferConfig`
+
+        :raises :class:`botocore.exceptions.ClientError`: If the request is invalid.
+        """
+
+        self._client.upload_file(path, bucket_name, key_name, ExtraArgs=extra_args, Config=transfer_config)
+
+    @staticmethod
+    def _raise_if_not_found(err, bucket_name, key_name):
+        """Raises FileDoesNotExist if the given client error indicates the object was not found
+
+        :param err: The client error
+        :type err: :class:`botocore.exceptions.ClientError`
+        :param bucket_name: The unique name of the bucket.
+        :type bucket_name: string
+        :param key_name: The key of the object.
+        :type key_name: string
+
+        :raises :class:`storage.exceptions.FileDoesNotExist`: If the object was not found
+        """
+
+        error_code = err.response['ResponseMetadata']['HTTPStatusCode']
+        if error_code == 404:
+            raise FileDoesNotExist('Unable to access remote file: %s %s' % (bucket_name, key_name))
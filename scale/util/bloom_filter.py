@@ -0,0 +1,139 @@
+"""Defines a bloom filter that is stored in a memory-mapped file"""
+from __future__ import division
+from __future__ import unicode_literals
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+
+# The header stores the number of keys that have been added to the filter and its watermark
+HEADER_FORMAT = b'<QQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+class BloomFilter(object):
+    """A space-efficient set of keys that is stored in a memory-mapped file, so its memory use is bounded by its
+    capacity and it persists across processes. A key that has been added is always reported as contained, while a key
+    that has not been added is falsely reported as contained at roughly the given error rate (as long as no more keys
+    than the capacity are added).
+    """
+
+    def __init__(self, path, capacity, error_rate=0.001):
+        """Constructor, opens the filter stored at the given path, creating a new empty filter if the file does not
+        exist or was sized for a different capacity
+
+        :param path: The path of the file that stores the filter
+        :type path: string
+        :param capacity: The number of keys the filter is sized for
+        :type capacity: int
+        :param error_rate: The false positive rate at capacity
+        :type error_rate: float
+        """
+
+        num_bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_bytes = (num_bits + 7) // 8
+        self._num_bits = num_bytes * 8
+        self._num_hashes = max(1, int(round(self._num_bits / capacity * math.log(2))))
+        self._path = path
+
+        file_size = HEADER_SIZE + num_bytes
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0644)
+        try:
+            if os.fstat(fd).st_size != file_size:
+                # Start a new (sparse) filter
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, file_size)
+            self._map = mmap.mmap(fd, file_size)
+        finally:
+            os.close(fd)
+
+    @property
+    def count(self):
+        """The number of keys that have been added to the filter
+
+        :returns: The number of added keys
+        :rtype: int
+        """
+
+        return struct.unpack_from(HEADER_FORMAT, self._map, 0)[0]
+
+    @property
+    def watermark(self):
+        """A caller-defined high-water mark stored with the filter, such as the highest ID of the records whose keys
+        have been added, which is zero for a new filter
+
+        :returns: The watermark
+        :rtype: int
+        """
+
+        return struct.unpack_from(HEADER_FORMAT, self._map, 0)[1]
+
+    @watermark.setter
+    def watermark(self, value):
+        """Sets the watermark of the filter
+
+        :param value: The watermark
+        :type value: int
+        """
+
+        struct.pack_into(HEADER_FORMAT, self._map, 0, self.count, value)
+
+    def __contains__(self, key):
+        """Indicates whether the given key may have been added to the filter
+
+        :param key: The key
+        :type key: string
+        :returns: False if the key has definitely not been added, True if it may have been added
+        :rtype: bool
+        """
+
+        for position in self._get_positions(key):
+            if not ord(self._map[HEADER_SIZE + position // 8]) & (1 << (position % 8)):
+                return False
+        return True
+
+    def add(self, key):
+        """Adds the given key to the filter
+
+        :param key: The key
+        :type key: string
+        """
+
+        for position in self._get_positions(key):
+            index = HEADER_SIZE + position // 8
+            self._map[index] = chr(ord(self._map[index]) | (1 << (position % 8)))
+        struct.pack_into(HEADER_FORMAT, self._map, 0, self.count + 1, self.watermark)
+
+    def clear(self):
+        """Removes all keys from the filter and resets its watermark
+        """
+
+        self._map.seek(0)
+        chunk = b'\x00' * mmap.PAGESIZE
+        remaining = len(self._map)
+        while remaining > 0:
+            self._map.write(chunk[:remaining])
+            remaining -= len(chunk)
+
+    def close(self):
+        """Flushes the filter to its file and closes it
+        """
+
+        self._map.flush()
+        self._map.close()
+
+    def _get_positions(self, key):
+        """Returns the bit positions for the given key using double hashing
+
+        :param key: The key
+        :type key: string
+        :returns: The bit positions
+        :rtype: list
+        """
+
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        hash_1, hash_2 = struct.unpack(b'<QQ', hashlib.md5(key).digest())
+        return [(hash_1 + i * hash_2) % self._num_bits for i in range(self._num_hashes)]
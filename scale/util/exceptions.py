@@ -2,6 +2,13 @@
 from util.validation import ValidationError
 
 
+class FileDeleteFailed(Exception):
+    """Exception indicating that one or more files could not be deleted from a remote storage system
+    """
+
+    pass
+
+
 class FileDoesNotExist(Exception):
     """Exception indicating an attempt was made to access a file that no longer exists
     """
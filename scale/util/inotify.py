@@ -0,0 +1,165 @@
+"""Defines a minimal wrapper around the Linux inotify API for watching directories for file events"""
+from __future__ import unicode_literals
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+
+# Event masks from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+
+# Flags for inotify_init1()
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+EVENT_FORMAT = b'iIII'
+EVENT_SIZE = struct.calcsize(EVENT_FORMAT)
+READ_SIZE = 64 * 1024
+
+
+class InotifyEvent(object):
+    """Represents an event read from an inotify instance"""
+
+    def __init__(self, wd, mask, name):
+        """Constructor
+
+        :param wd: The watch descriptor of the watched directory
+        :type wd: int
+        :param mask: The event mask
+        :type mask: int
+        :param name: The name of the file within the watched directory, possibly None
+        :type name: string
+        """
+
+        self.wd = wd
+        self.mask = mask
+        self.name = name
+
+    @property
+    def is_dir(self):
+        """Whether the event is for a directory
+
+        :returns: True if the event is for a directory, False otherwise
+        :rtype: bool
+        """
+
+        return bool(self.mask & IN_ISDIR)
+
+    @property
+    def is_overflow(self):
+        """Whether the kernel event queue overflowed, meaning events were lost
+
+        :returns: True if events were lost, False otherwise
+        :rtype: bool
+        """
+
+        return bool(self.mask & IN_Q_OVERFLOW)
+
+
+class Inotify(object):
+    """An inotify instance that watches directories for file events. This class is NOT thread-safe.
+    """
+
+    def __init__(self):
+        """Constructor, creates the inotify instance
+
+        :raises OSError: If inotify is not available on this system
+        """
+
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError(errno.ENOSYS, 'Could not find the C library')
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+
+        self._fd = self._check(self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+
+    def add_watch(self, path, mask):
+        """Watches the given directory for the given events
+
+        :param path: The path of the directory
+        :type path: string
+        :param mask: The events to watch for
+        :type mask: int
+        :returns: The watch descriptor
+        :rtype: int
+        """
+
+        if not isinstance(path, bytes):
+            path = path.encode(sys.getfilesystemencoding())
+        return self._check(self._libc.inotify_add_watch(self._fd, path, mask))
+
+    def close(self):
+        """Closes the inotify instance, removing all of its watches
+        """
+
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def read_events(self, timeout):
+        """Waits up to the given timeout for events and returns all events that are available
+
+        :param timeout: The maximum number of seconds to wait
+        :type timeout: float
+        :returns: The list of events, possibly empty
+        :rtype: [:class:`util.inotify.InotifyEvent`]
+        """
+
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except OSError as ex:
+                if ex.errno == errno.EAGAIN:
+                    break
+                raise
+            events.extend(self._parse_events(data))
+        return events
+
+    @staticmethod
+    def _parse_events(data):
+        """Parses the given raw event data
+
+        :param data: The raw data read from the inotify instance
+        :type data: bytes
+        :returns: The list of events
+        :rtype: [:class:`util.inotify.InotifyEvent`]
+        """
+
+        events = []
+        offset = 0
+        while offset + EVENT_SIZE <= len(data):
+            wd, mask, _cookie, name_length = struct.unpack_from(EVENT_FORMAT, data, offset)
+            offset += EVENT_SIZE
+            name = data[offset:offset + name_length].rstrip(b'\0')
+            offset += name_length
+            name = name.decode(sys.getfilesystemencoding()) if name else None
+            events.append(InotifyEvent(wd, mask, name))
+        return events
+
+    def _check(self, result):
+        """Raises an OSError if the given result of a C library call indicates an error
+
+        :param result: The result of the call
+        :type result: int
+        :returns: The result
+        :rtype: int
+        """
+
+        if result < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        return result
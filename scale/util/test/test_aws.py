@@ -84,6 +84,31 @@ class TestS3Client(TestCase):
 
         django.setup()
 
+    def test_session_reused(self):
+        """Tests that clients with the same credentials and region share a pooled session"""
+
+        with S3Client(self.credentials, 'us-east-1') as client_1:
+            with S3Client(self.credentials, 'us-east-1', max_pool_connections=20) as client_2:
+                self.assertIs(client_1._session, client_2._session)
+            with S3Client(self.credentials, 'us-west-2') as client_3:
+                self.assertIsNot(client_1._session, client_3._session)
+
+    def test_delete_objects(self):
+        """Tests deleting objects in chunks of the maximum keys per request"""
+
+        key_names = ['key_%d' % i for i in range(2500)]
+
+        with S3Client(self.credentials) as client:
+            client._client = MagicMock()
+            client._client.delete_objects.side_effect = [{}, {'Errors': [{'Key': 'key_1500', 'Code': 'AccessDenied',
+                                                                          'Message': 'Access Denied'}]}, {}]
+            failed_keys = client.delete_objects('sample-bucket', key_names)
+
+        self.assertEqual(client._client.delete_objects.call_count, 3)
+        chunk_sizes = [len(c[1]['Delete']['Objects']) for c in client._client.delete_objects.call_args_list]
+        self.assertListEqual(chunk_sizes, [1000, 1000, 500])
+        self.assertDictEqual(failed_keys, {'key_1500': 'AccessDenied: Access Denied'})
+
     @patch('botocore.paginate.PageIterator._make_request')
     def test_list_objects_prefix(self, mock_func):
         mock_func.return_value = self.sample_response
@@ -116,6 +141,30 @@ class TestS3Client(TestCase):
 
         self.assertEqual(len(list(results)), 0)
 
+    @patch('botocore.paginate.PageIterator._make_request')
+    def test_list_objects_start_after(self, mock_func):
+        mock_func.return_value = self.sample_response
+
+        with S3Client(self.credentials) as client:
+            results = list(client.list_objects('sample-bucket', True, start_after='test/last.txt'))
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(mock_func.call_args[0][0]['Marker'], 'test/last.txt')
+
+    @patch('botocore.paginate.PageIterator._make_request')
+    def test_list_objects_prefixes_only_page(self, mock_func):
+        response1 = deepcopy(self.sample_response)
+        del response1['Contents']
+        response1['IsTruncated'] = True
+        response1['NextMarker'] = 'test/dir/'
+        response2 = deepcopy(self.sample_response)
+        mock_func.side_effect = [response1, response2]
+
+        with S3Client(self.credentials) as client:
+            results = client.list_objects('sample-bucket', False, 'test/')
+
+        self.assertEqual(len(list(results)), 1)
+
     def test_list_objects_invalid_bucket_name(self):
         with self.assertRaises(ParamValidationError):
             with S3Client(self.credentials) as client:
@@ -221,4 +270,22 @@ class TestSQSClient(TestCase):
             results = list(client.receive_messages('queue'))
             self.assertEquals(results, outputs)
 
-        self.assertEquals(receive_messages.call_count, 2)
\ No newline at end of file
+        self.assertEquals(receive_messages.call_count, 2)
+
+    @patch('util.aws.SQSClient.get_queue_by_name')
+    def test_delete_messages(self, get_queue_by_name):
+        messages = [MagicMock(receipt_handle='handle_%d' % x) for x in range(0, 15)]
+
+        delete_messages = MagicMock(side_effect=[{'Successful': []}, {'Failed': [{'Id': '0', 'Message': 'Error'}]}])
+        get_queue_by_name.return_value.delete_messages = delete_messages
+
+        with SQSClient(self.credentials, self.region_name) as client:
+            failed_count = client.delete_messages('queue', messages)
+            client.send_message('queue', 'message')
+
+        self.assertEquals(failed_count, 1)
+        self.assertEquals(delete_messages.call_count, 2)
+        delete_messages.assert_called_with(Entries=[{'Id': str(x), 'ReceiptHandle': 'handle_%d' % (x + 10)}
+                                                    for x in range(0, 5)])
+        # Queue is only looked up once per client
+        get_queue_by_name.assert_called_once_with('queue')
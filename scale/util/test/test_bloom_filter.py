@@ -0,0 +1,85 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from util.bloom_filter import BloomFilter
+
+
+class TestBloomFilter(SimpleTestCase):
+    """Tests the BloomFilter class"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'test.bloom')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_contains(self):
+        """Tests that added keys are always contained and other keys rarely are"""
+
+        bloom_filter = BloomFilter(self.path, 1000, error_rate=0.01)
+        for i in range(1000):
+            bloom_filter.add('added_%d' % i)
+
+        self.assertEqual(bloom_filter.count, 1000)
+        for i in range(1000):
+            self.assertTrue('added_%d' % i in bloom_filter)
+        false_positives = len([i for i in range(1000) if 'other_%d' % i in bloom_filter])
+        self.assertLess(false_positives, 50)
+        bloom_filter.close()
+
+    def test_persists(self):
+        """Tests that keys persist after the filter is closed and re-opened"""
+
+        bloom_filter = BloomFilter(self.path, 100)
+        bloom_filter.add('file.txt\x0010')
+        bloom_filter.close()
+
+        bloom_filter = BloomFilter(self.path, 100)
+        self.assertEqual(bloom_filter.count, 1)
+        self.assertTrue('file.txt\x0010' in bloom_filter)
+        bloom_filter.close()
+
+    def test_watermark(self):
+        """Tests that the watermark persists and is kept when keys are added"""
+
+        bloom_filter = BloomFilter(self.path, 100)
+        self.assertEqual(bloom_filter.watermark, 0)
+        bloom_filter.watermark = 42
+        bloom_filter.add('file.txt\x0010')
+        bloom_filter.close()
+
+        bloom_filter = BloomFilter(self.path, 100)
+        self.assertEqual(bloom_filter.watermark, 42)
+        self.assertEqual(bloom_filter.count, 1)
+        bloom_filter.clear()
+        self.assertEqual(bloom_filter.watermark, 0)
+        bloom_filter.close()
+
+    def test_different_capacity(self):
+        """Tests that re-opening a filter with a different capacity starts a new empty filter"""
+
+        bloom_filter = BloomFilter(self.path, 100)
+        bloom_filter.add('file.txt\x0010')
+        bloom_filter.close()
+
+        bloom_filter = BloomFilter(self.path, 1000)
+        self.assertEqual(bloom_filter.count, 0)
+        self.assertFalse('file.txt\x0010' in bloom_filter)
+        bloom_filter.close()
+
+    def test_clear(self):
+        """Tests that clearing a filter removes all keys"""
+
+        bloom_filter = BloomFilter(self.path, 100)
+        bloom_filter.add('file.txt\x0010')
+        bloom_filter.clear()
+
+        self.assertEqual(bloom_filter.count, 0)
+        self.assertFalse('file.txt\x0010' in bloom_filter)
+        bloom_filter.close()
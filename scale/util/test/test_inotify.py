@@ -0,0 +1,53 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import struct
+import tempfile
+
+from django.test import SimpleTestCase
+
+from util.inotify import EVENT_FORMAT, IN_CLOSE_WRITE, IN_ISDIR, IN_MOVED_TO, Inotify
+
+
+class TestInotify(SimpleTestCase):
+    """Tests the Inotify class"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_parse_events(self):
+        """Tests parsing raw inotify event data"""
+
+        data = struct.pack(EVENT_FORMAT, 1, IN_CLOSE_WRITE, 0, 16) + b'test.txt'.ljust(16, b'\0')
+        data += struct.pack(EVENT_FORMAT, 1, IN_MOVED_TO | IN_ISDIR, 0, 0)
+
+        events = Inotify._parse_events(data)
+
+        self.assertEqual(len(events), 2)
+        self.assertEqual(events[0].name, 'test.txt')
+        self.assertEqual(events[0].mask, IN_CLOSE_WRITE)
+        self.assertFalse(events[0].is_dir)
+        self.assertIsNone(events[1].name)
+        self.assertTrue(events[1].is_dir)
+
+    def test_read_events(self):
+        """Tests reading events for files written and moved into a watched directory"""
+
+        inotify = Inotify()
+        try:
+            inotify.add_watch(self.temp_dir, IN_CLOSE_WRITE | IN_MOVED_TO)
+            self.assertListEqual(inotify.read_events(0), [])
+
+            with open(os.path.join(self.temp_dir, 'test.txt_tmp'), 'w') as the_file:
+                the_file.write('data')
+            os.rename(os.path.join(self.temp_dir, 'test.txt_tmp'), os.path.join(self.temp_dir, 'test.txt'))
+
+            events = inotify.read_events(1)
+            self.assertListEqual([(event.name, event.mask) for event in events],
+                                 [('test.txt_tmp', IN_CLOSE_WRITE), ('test.txt', IN_MOVED_TO)])
+        finally:
+            inotify.close()